@@ -0,0 +1,89 @@
+"""
+Benchmark the cross-reference lookup of the PLC domain.
+
+Notes a large number of objects (function blocks with methods) and resolves references
+to them in the relaxed search mode, as used for the types in generated signatures.
+
+Run with::
+
+    python benchmarks/bench_find_obj.py --objects 100000 --references 100000
+"""
+
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from plcdoc.domain import StructuredTextDomain
+
+
+def make_domain(number: int) -> StructuredTextDomain:
+    """Make a domain with `number` objects, without a Sphinx application."""
+    env = SimpleNamespace(domaindata={}, docname="index")
+    domain = StructuredTextDomain(env)
+
+    blocks = number // 5
+    for i in range(blocks):
+        name = f"Lib{i % 50}.FB_Block{i}"
+        domain.note_object(name, "functionblock", name)
+        for j in range(4):  # Method names repeat a lot, like in real projects
+            domain.note_object(f"{name}.M_Method{j}", "method", f"{name}.M_Method{j}")
+
+    return domain
+
+
+def find_linear(domain: StructuredTextDomain, name: str, objtypes) -> list:
+    """Relaxed search by scanning all objects (the original implementation)."""
+    searchname = "." + name
+    return [
+        (oname, domain.objects[oname])
+        for oname in domain.objects
+        if oname.endswith(searchname) and domain.objects[oname].objtype in objtypes
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--objects", type=int, default=100000)
+    parser.add_argument("--references", type=int, default=100000)
+    parser.add_argument(
+        "--linear",
+        type=int,
+        default=100,
+        help="Number of references to also resolve with a full scan, for comparison",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    domain = make_domain(args.objects)
+    duration = time.perf_counter() - start
+    print(f"Noted {len(domain.objects)} objects in {duration:.3f} s")
+
+    blocks = args.objects // 5
+    rng = random.Random(0)
+    targets = [f"FB_Block{rng.randrange(blocks)}" for _ in range(args.references)]
+    targets += ["M_Method0", "DoesNotExist"]
+
+    start = time.perf_counter()
+    for target in targets:
+        domain.find_obj(domain.env, None, None, target, "type", 1)
+    duration = time.perf_counter() - start
+    print(
+        f"Resolved {len(targets)} references in {duration:.3f} s "
+        f"({duration / len(targets) * 1e6:.1f} us each)"
+    )
+
+    if args.linear:
+        objtypes = domain.objtypes_for_role("type")
+        start = time.perf_counter()
+        for target in targets[: args.linear]:
+            find_linear(domain, target, objtypes)
+        duration = time.perf_counter() - start
+        print(
+            f"Full scan: {args.linear} references in {duration:.3f} s "
+            f"({duration / args.linear * 1e6:.1f} us each)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Generate a synthetic TwinCAT PLC project, to benchmark with.
+
+The project contains function blocks with methods and properties, structs, enums and
+GVLs, spread over a tree of folders. Types refer to each other, like in real projects.
+
+Run with::
+
+    python benchmarks/generate_project.py <directory> --objects 10000
+"""
+
+import argparse
+import os
+import random
+import uuid
+from dataclasses import dataclass, asdict
+from typing import List, Tuple
+
+
+@dataclass
+class ProjectSize:
+    """Numbers of objects in a generated project."""
+
+    pous: int = 100  # Function blocks
+    methods: int = 5  # Per function block
+    properties: int = 1  # Per function block
+    structs: int = 20
+    enums: int = 10
+    gvls: int = 2
+    gvl_size: int = 50  # Variables per GVL
+    depth: int = 2  # Levels of folders below `POUs/`
+    fanout: int = 3  # Subfolders per folder
+
+    @classmethod
+    def for_objects(cls, objects: int, **kwargs) -> "ProjectSize":
+        """Get a size of roughly `objects` documentable objects (incl. children).
+
+        Function blocks (with their methods and properties) take up 80%, structs 13%,
+        enums 6% and GVLs the remainder.
+        """
+        size = cls(**kwargs)
+        per_pou = 1 + size.methods + size.properties
+        size.pous = max(1, int(objects * 0.8) // per_pou)
+        size.structs = max(1, int(objects * 0.13))
+        size.enums = max(1, int(objects * 0.06))
+        size.gvls = max(1, objects - size.pous * per_pou - size.structs - size.enums)
+        return size
+
+    @property
+    def objects(self) -> int:
+        per_pou = 1 + self.methods + self.properties
+        return self.pous * per_pou + self.structs + self.enums + self.gvls
+
+
+def _guid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128)))
+
+
+def _wrap(tag: str, name: str, declaration: str, rng: random.Random, extra="") -> str:
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<TcPlcObject Version="1.1.0.1" ProductVersion="3.1.4024.11">
+  <{tag} Name="{name}" Id="{{{_guid(rng)}}}">
+    <Declaration><![CDATA[{declaration}]]></Declaration>
+{extra}  </{tag}>
+</TcPlcObject>"""
+
+
+def _method(name: str, types: List[str], rng: random.Random) -> str:
+    inputs = "\n".join(
+        f"    input{i} : {rng.choice(types)}; // Input number {i}" for i in range(3)
+    )
+    return f"""    <Method Name="{name}" Id="{{{_guid(rng)}}}">
+      <Declaration><![CDATA[(*
+Method {name}, which does something useful.
+*)
+METHOD {name} : BOOL
+VAR_INPUT
+{inputs}
+END_VAR
+VAR
+    counter : INT;
+END_VAR
+]]></Declaration>
+      <Implementation>
+        <ST><![CDATA[counter := counter + 1;
+{name} := TRUE;
+]]></ST>
+      </Implementation>
+    </Method>
+"""
+
+
+def _property(name: str, type_: str, rng: random.Random) -> str:
+    return f"""    <Property Name="{name}" Id="{{{_guid(rng)}}}">
+      <Declaration><![CDATA[// Property {name}
+PROPERTY {name} : {type_}
+]]></Declaration>
+      <Get Name="Get" Id="{{{_guid(rng)}}}">
+        <Declaration><![CDATA[VAR
+END_VAR
+]]></Declaration>
+        <Implementation>
+          <ST><![CDATA[]]></ST>
+        </Implementation>
+      </Get>
+    </Property>
+"""
+
+
+def _folders(depth: int, fanout: int) -> List[str]:
+    """Get the leaf folders below `POUs`."""
+    folders = ["POUs"]
+    for level in range(depth):
+        folders = [
+            os.path.join(folder, f"Folder{level}_{i}")
+            for folder in folders
+            for i in range(fanout)
+        ]
+    return folders
+
+
+def generate_project(directory: str, size: ProjectSize, seed: int = 0) -> str:
+    """Write a synthetic PLC project.
+
+    :param directory: Destination, created when needed
+    :param size: Numbers of objects
+    :param seed: Seed for the random choices, the same seed gives the same project
+    :return: Path of the ``.plcproj`` file
+    """
+    rng = random.Random(seed)
+    files: List[Tuple[str, str, str, str]] = []  # (path, tag, declaration, extra)
+
+    builtin = ["BOOL", "INT", "UINT", "DINT", "LREAL", "STRING(80)", "TIME"]
+    enums = [f"E_Enum{i}" for i in range(size.enums)]
+    structs = [f"ST_Struct{i}" for i in range(size.structs)]
+    pous = [f"FB_Block{i}" for i in range(size.pous)]
+
+    for i, name in enumerate(enums):
+        options = ",\n".join(f"    Option{j} := {j}" for j in range(5))
+        declaration = (
+            f"// Enum number {i}\nTYPE {name} :\n(\n{options}\n) UINT;\nEND_TYPE\n"
+        )
+        files.append((os.path.join("DUTs", name + ".TcDUT"), "DUT", declaration, ""))
+
+    for i, name in enumerate(structs):
+        types = builtin + enums[:i] + structs[:i]
+        members = "\n".join(
+            f"    member{j} : {rng.choice(types)}; // Member {j}" for j in range(6)
+        )
+        declaration = (
+            f"(*\nStruct number {i}.\n*)\nTYPE {name} :\nSTRUCT\n{members}\n"
+            f"END_STRUCT\nEND_TYPE\n"
+        )
+        files.append((os.path.join("DUTs", name + ".TcDUT"), "DUT", declaration, ""))
+
+    folders = _folders(size.depth, size.fanout)
+    for i, name in enumerate(pous):
+        types = builtin + enums + structs
+        extends = (
+            f" EXTENDS {pous[rng.randrange(i)]}" if i and rng.random() < 0.3 else ""
+        )
+        inputs = "\n".join(
+            f"    input{j} : {rng.choice(types)}; // Input {j}" for j in range(4)
+        )
+        outputs = "\n".join(
+            f"    output{j} : {rng.choice(types)}; // Output {j}" for j in range(2)
+        )
+        declaration = f"""(*
+Function block number {i}.
+
+It has a longer description, spanning multiple lines.
+*)
+FUNCTION_BLOCK {name}{extends}
+VAR_INPUT
+{inputs}
+END_VAR
+VAR_OUTPUT
+{outputs}
+END_VAR
+VAR
+    state : INT;
+END_VAR
+"""
+        extra = "    <Implementation>\n      <ST><![CDATA[state := 0;\n]]></ST>\n"
+        extra += "    </Implementation>\n"
+        extra += "".join(
+            _method(f"M_Method{j}", types, rng) for j in range(size.methods)
+        )
+        extra += "".join(
+            _property(f"Property{j}", rng.choice(builtin), rng)
+            for j in range(size.properties)
+        )
+        folder = folders[i % len(folders)]
+        files.append((os.path.join(folder, name + ".TcPOU"), "POU", declaration, extra))
+
+    for i in range(size.gvls):
+        name = f"GVL_List{i}"
+        variables = "\n".join(
+            f"    global{j} : {rng.choice(builtin + structs)}; // Global {j}"
+            for j in range(size.gvl_size)
+        )
+        declaration = f"// Globals number {i}\nVAR_GLOBAL\n{variables}\nEND_VAR\n"
+        files.append((os.path.join("GVLs", name + ".TcGVL"), "GVL", declaration, ""))
+
+    compiles = []
+    for relative, tag, declaration, extra in files:
+        name = os.path.splitext(os.path.basename(relative))[0]
+        path = os.path.join(directory, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(_wrap(tag, name, declaration, rng, extra))
+        compiles.append(relative.replace(os.sep, "\\"))
+
+    items = "\n".join(
+        f'    <Compile Include="{item}">\n      <SubType>Code</SubType>\n'
+        f"    </Compile>"
+        for item in compiles
+    )
+    project_file = os.path.join(directory, "Synthetic.plcproj")
+    with open(project_file, "w", encoding="utf-8") as fh:
+        fh.write(
+            '<Project DefaultTargets="Build" '
+            'xmlns="http://schemas.microsoft.com/developer/msbuild/2003">\n'
+            f"  <ItemGroup>\n{items}\n  </ItemGroup>\n</Project>\n"
+        )
+
+    return project_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("directory")
+    parser.add_argument("--objects", type=int, default=None, help="Approximate total")
+    for field, value in asdict(ProjectSize()).items():
+        parser.add_argument("--" + field.replace("_", "-"), type=int, default=value)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    options = {field: getattr(args, field) for field in asdict(ProjectSize())}
+    if args.objects is not None:
+        for field in ("pous", "structs", "enums", "gvls"):
+            options.pop(field)
+        size = ProjectSize.for_objects(args.objects, **options)
+    else:
+        size = ProjectSize(**options)
+
+    project_file = generate_project(args.directory, size, args.seed)
+    print(f"Generated {project_file} with {size.objects} objects ({size})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Run end-to-end benchmarks on synthetic PLC projects of increasing size.
+
+For each size a project is generated (see ``generate_project.py``) and the following is
+measured:
+
+* Parse throughput of :class:`~plcdoc.interpreter.PlcInterpreter`
+* Peak memory of the parsing (through ``tracemalloc``)
+* Wall time of :func:`~plcdoc.extension.analyze`, as far as it is not hidden behind
+  the startup of Sphinx
+* Latency of :meth:`~plcdoc.domain.StructuredTextDomain.find_obj` for type references
+* Wall time of a full Sphinx HTML build
+
+The results are written as JSON, to compare them between commits.
+
+Run with::
+
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 50000 --output results.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Dict, Any, List
+
+from sphinx.application import Sphinx
+
+from plcdoc.__version__ import __version__
+from plcdoc.domain import StructuredTextDomain
+from plcdoc.analysis import wait_for_analysis
+from plcdoc.interpreter import PlcInterpreter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate_project import ProjectSize, generate_project  # noqa: E402
+
+
+def _project_bytes(project_dir: str) -> int:
+    total = 0
+    for folder, _, files in os.walk(project_dir):
+        total += sum(os.path.getsize(os.path.join(folder, file)) for file in files)
+    return total
+
+
+def bench_parse(project_file: str, backend: str, workers: int) -> Dict[str, Any]:
+    """Parse the project once for the time and once more for the memory."""
+    interpreter = PlcInterpreter(backend=backend, workers=workers)
+    start = time.perf_counter()
+    interpreter.parse_plc_project(project_file)
+    duration = time.perf_counter() - start
+
+    files = len(interpreter._file_objects)
+    objects = sum(len(models) for models in interpreter._models.values())
+    size = _project_bytes(os.path.dirname(project_file))
+
+    tracemalloc.start()
+    PlcInterpreter(backend=backend).parse_plc_project(project_file)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": duration,
+        "files": files,
+        "objects": objects,
+        "files_per_second": files / duration,
+        "objects_per_second": objects / duration,
+        "megabytes_per_second": size / duration / 1e6,
+        "peak_memory_bytes": peak,
+    }, interpreter
+
+
+def bench_find_obj(interpreter: PlcInterpreter, repeat: int) -> Dict[str, Any]:
+    """Resolve the type of every variable of every object, like signatures do."""
+    env = SimpleNamespace(domaindata={}, docname="index")
+    domain = StructuredTextDomain(env)
+    for objtype, models in interpreter._models.items():
+        for name in models:
+            domain.note_object(name, objtype, name)
+
+    targets = []
+    for models in interpreter._models.values():
+        for obj in models.values():
+            targets += [var.type.name for var in obj.get_args(skip_internal=False)]
+
+    latencies: List[float] = []
+    for _ in range(repeat):
+        domain._clear_caches()  # Measure the lookups, not the memory
+        for target in targets:
+            start = time.perf_counter()
+            domain.find_obj(env, None, None, target, "type", 1)
+            latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    return {
+        "references": len(targets),
+        "mean_microseconds": statistics.mean(latencies) * 1e6 if latencies else 0.0,
+        "p95_microseconds": (
+            latencies[int(len(latencies) * 0.95)] * 1e6 if latencies else 0.0
+        ),
+    }
+
+
+def _write_docs(srcdir: str, project_file: str, options: Dict):
+    """Write a Sphinx project documenting every folder of the generated project."""
+    config = {"extensions": ["plcdoc"], "plc_project": project_file, **options}
+    with open(os.path.join(srcdir, "conf.py"), "w") as fh:
+        fh.write("\n".join(f"{key} = {value!r}" for key, value in config.items()))
+
+    folders = [("duts", "DUTs"), ("gvls", "GVLs"), ("pous", "POUs")]
+    with open(os.path.join(srcdir, "index.rst"), "w") as fh:
+        fh.write("Benchmark\n=========\n\n.. toctree::\n\n")
+        fh.write("".join(f"   {docname}\n" for docname, _ in folders))
+    for docname, folder in folders:
+        with open(os.path.join(srcdir, docname + ".rst"), "w") as fh:
+            title = folder + "\n" + "=" * len(folder)
+            fh.write(f"{title}\n\n.. plc:autofolder:: {folder}\n   :recursive:\n")
+
+
+def bench_sphinx(workdir: str, project_file: str, options: Dict, html: bool) -> Dict:
+    """Time `analyze()` in a Sphinx application, and optionally a full HTML build.
+
+    The analysis starts in the background as soon as the configuration is read (see
+    ``plc_background_analysis``), so it overlaps with the rest of the startup. The
+    analysis time is what remains to be waited for after the startup, which is what a
+    build actually loses to it. The two times together are an upper bound of the time
+    until the documents can be read.
+    """
+    srcdir = os.path.join(workdir, "docs")
+    os.makedirs(srcdir, exist_ok=True)
+    _write_docs(srcdir, project_file, options)
+    outdir = os.path.join(srcdir, "_build")
+
+    warnings = io.StringIO()
+    start = time.perf_counter()
+    app = Sphinx(
+        srcdir,
+        srcdir,
+        os.path.join(outdir, "html"),
+        os.path.join(outdir, "doctrees"),
+        "html",
+        status=None,
+        warning=warnings,
+        freshenv=True,
+    )
+    startup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    wait_for_analysis(app)
+    results = {
+        "startup_seconds": startup,
+        "analyze_seconds": time.perf_counter() - start,
+    }
+
+    if html:
+        start = time.perf_counter()
+        app.build(force_all=True)
+        results["html_build_seconds"] = time.perf_counter() - start
+        results["warnings"] = warnings.getvalue().count("WARNING")
+
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--workdir", help="Keep generated projects here")
+    parser.add_argument("--backend", default="textx", choices=PlcInterpreter.BACKENDS)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3, help="For find_obj")
+    parser.add_argument("--no-html", action="store_true", help="Skip Sphinx builds")
+    args = parser.parse_args()
+
+    options = {"plc_parser_backend": args.backend, "plc_parse_workers": args.workers}
+
+    results = {
+        "commit": _git_commit(),
+        "plcdoc_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "options": options,
+        "sizes": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for objects in args.sizes:
+            workdir = os.path.join(args.workdir or tmp, f"project_{objects}")
+            size = ProjectSize.for_objects(objects)
+            project_file = generate_project(os.path.join(workdir, "plc"), size)
+            print(f"[{objects}] Generated {size.objects} objects", flush=True)
+
+            parse, interpreter = bench_parse(project_file, args.backend, args.workers)
+            print(f"[{objects}] Parse: {parse['seconds']:.2f} s", flush=True)
+            find_obj = bench_find_obj(interpreter, args.repeat)
+            print(
+                f"[{objects}] find_obj: {find_obj['mean_microseconds']:.1f} us",
+                flush=True,
+            )
+            del interpreter
+            sphinx = bench_sphinx(workdir, project_file, options, not args.no_html)
+            print(f"[{objects}] Sphinx: {sphinx}", flush=True)
+
+            results["sizes"][str(objects)] = {
+                "project": {"objects": size.objects, **vars(size)},
+                "parse": parse,
+                "find_obj": find_obj,
+                "sphinx": sphinx,
+            }
+
+    with open(args.output, "w") as fh:
+        json.dump(results, fh, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
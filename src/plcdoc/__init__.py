@@ -2,12 +2,14 @@
 Extension for Sphinx to integrate TwinCAT PLC code.
 """
 
+from typing import Dict
+
 from sphinx.application import Sphinx
 from .extension import plcdoc_setup
 from .domain import StructuredTextDomain  # noqa: F401
 
 
-def setup(app: Sphinx):
+def setup(app: Sphinx) -> Dict:
     """Initialize Sphinx extension."""
 
-    plcdoc_setup(app)
+    return plcdoc_setup(app)
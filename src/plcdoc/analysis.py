@@ -0,0 +1,58 @@
+"""Contains the analysis of the PLC sources in the background."""
+
+import threading
+from typing import Callable, Optional
+
+from sphinx.application import Sphinx
+
+from .interpreter import PlcInterpreter
+
+
+class AnalysisThread(threading.Thread):
+    """Thread to analyse the PLC sources while Sphinx continues.
+
+    Any error is kept, to be raised again by whoever waits for the result.
+    """
+
+    def __init__(self, app: Sphinx, analyze: Callable[[Sphinx], None]):
+        super().__init__(name="plcdoc-analysis", daemon=True)
+        self._app = app
+        self._analyze = analyze
+        self.error: Optional[Exception] = None
+
+    def run(self):
+        try:
+            self._analyze(self._app)
+        except Exception as err:
+            self.error = err
+
+
+def start_analysis(app: Sphinx, analyze: Callable[[Sphinx], None]):
+    """Run ``analyze(app)`` in the background."""
+    thread = AnalysisThread(app, analyze)
+    app._plc_analysis = thread
+    thread.start()
+
+
+def wait_for_analysis(app: Sphinx):
+    """Wait until a background analysis is done, if any.
+
+    :raises: The error of the analysis, if it failed
+    """
+    thread: Optional[AnalysisThread] = getattr(app, "_plc_analysis", None)
+    if thread is None:
+        return
+
+    thread.join()
+    app._plc_analysis = None
+    if thread.error is not None:
+        raise thread.error
+
+
+def get_interpreter(app: Sphinx) -> Optional[PlcInterpreter]:
+    """Get the interpreter with the analysed sources, once it is available.
+
+    :return: `None` if the PLC sources have not been analysed
+    """
+    wait_for_analysis(app)
+    return getattr(app, "_interpreter", None)
@@ -0,0 +1,187 @@
+"""Contains the persistent cache of parsed PLC files."""
+
+import os
+import time
+import pickle
+import hashlib
+import logging
+import tempfile
+from typing import Any, Optional, List, Tuple
+
+from .__version__ import __version__
+
+PACKAGE_DIR = os.path.dirname(__file__)
+logger = logging.getLogger(__name__)
+
+
+def format_salt() -> bytes:
+    """Get a hash of everything that determines the format of stored parsing results.
+
+    This covers the grammar, the fast parser, the stored model format and the
+    ``plcdoc`` version.
+    """
+    digest = hashlib.sha256()
+    for file in ("st_declaration.tx", "st_parser.py", "model.py"):
+        with open(os.path.join(PACKAGE_DIR, file), "rb") as fh:
+            digest.update(fh.read())
+    digest.update(f"|{__version__}|{pickle.HIGHEST_PROTOCOL}|".encode())
+    return digest.digest()
+
+
+class ParseCache:
+    """On-disk cache of parsing results, keyed by the content of source files.
+
+    Each entry is a pickle file, named after the hash of the file content, the file
+    name, the parser backend, the grammar, the stored format and the ``plcdoc``
+    version. A changed grammar
+    or a new release therefore never reuses old entries.
+
+    Entries are written to a temporary file first and then moved in place, which is
+    atomic. Multiple processes can share a single cache directory: a reader sees either
+    a complete entry or none at all. Reading an entry updates its modification time,
+    which is used to evict the least recently used entries once the cache grows beyond
+    ``max_size``.
+    """
+
+    SUFFIX = ".pickle"
+
+    # Left-over temporary files older than this are considered abandoned [s]
+    STALE_TIME = 3600.0
+
+    def __init__(self, directory: str, max_size: int = 256 * 1024 * 1024):
+        """
+
+        :param directory: Directory to store the entries in, created when needed
+        :param max_size: Total size of entries at which older ones are evicted [bytes]
+        """
+        self._directory = os.path.abspath(directory)
+        self._max_size = max_size
+
+        self._salt = format_salt()
+
+        # Temporary files are only accessible by their owner, entries get the normal
+        # permissions instead, such that other users sharing the cache can use them
+        umask = os.umask(0)
+        os.umask(umask)
+        self._mode = 0o666 & ~umask
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def make_key(self, content: bytes, name: str = "", backend: str = "textx") -> str:
+        """Get the key of a source file.
+
+        :param content: Raw file content
+        :param name: Base name of the file (GVLs take their name from it)
+        :param backend: Parser the result comes from
+        """
+        digest = hashlib.sha256(self._salt)
+        digest.update(backend.encode() + b"\0" + name.encode() + b"\0")
+        digest.update(content)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, key[:2], key + self.SUFFIX)
+
+    def get(self, key: str, count: bool = True) -> Optional[Any]:
+        """Load an entry from the cache.
+
+        :param count: If false, do not include this in the :attr:`hits` and
+                      :attr:`misses` (which are meant for files)
+        :return: `None` if the entry is not (or no longer) available
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fh:
+                value = pickle.load(fh)
+        except FileNotFoundError:
+            self.misses += count
+            return None
+        except Exception as err:  # Corrupt entries are simply treated as misses
+            logger.debug("Ignoring unreadable cache entry `%s` (%s)", path, err)
+            self.misses += count
+            return None
+
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+
+        self.hits += count
+        return value
+
+    def put(self, key: str, value: Any):
+        """Store an entry in the cache.
+
+        Failures to write are logged but otherwise ignored, a cache is optional.
+        """
+        path = self._path(key)
+        folder = os.path.dirname(path)
+        try:
+            os.makedirs(folder, exist_ok=True)
+            handle, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+            try:
+                with os.fdopen(handle, "wb") as fh:
+                    pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+                os.chmod(tmp_path, self._mode)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except (OSError, pickle.PicklingError) as err:
+            logger.warning("Could not write cache entry `%s` (%s)", path, err)
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """Get all files in the cache as (mtime, size, path)."""
+        entries = []
+        try:
+            folders = list(os.scandir(self._directory))
+        except FileNotFoundError:
+            return entries
+
+        now = time.time()
+        for folder in folders:
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Removed by another process
+                if entry.name.endswith(".tmp"):
+                    if now - stat.st_mtime > self.STALE_TIME:
+                        self._remove(entry.path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        return entries
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass  # Another process got there first
+
+    def prune(self):
+        """Evict the least recently used entries until the cache fits its size cap."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self._max_size:
+            return
+
+        entries.sort()  # Oldest first
+        for _, size, path in entries:
+            if total <= self._max_size:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        """Remove all entries."""
+        for _, _, path in self._entries():
+            self._remove(path)
@@ -0,0 +1,119 @@
+"""Contains the tracking of PLC declarations used by each document."""
+
+from typing import Dict, Tuple, Optional, List, Set
+
+from sphinx.application import Sphinx
+from sphinx.environment import BuildEnvironment
+from sphinx.util import logging
+
+from .interpreter import PlcInterpreter, PlcDeclaration
+from .analysis import get_interpreter
+
+logger = logging.getLogger(__name__)
+
+
+DependencyKey = Tuple
+"""Description of something used by a document.
+
+Either ``("object", objtype, name)`` or ``("folder", folder, recursive)``.
+"""
+
+
+def _get_dependencies(
+    env: BuildEnvironment,
+) -> Dict[str, Dict[DependencyKey, Optional[str]]]:
+    """Get the fingerprints of PLC declarations used by each document."""
+    if not hasattr(env, "plc_dependencies"):
+        env.plc_dependencies = {}  # docname -> key -> fingerprint
+    return env.plc_dependencies
+
+
+def note_dependency(env: BuildEnvironment, key: DependencyKey, value: Optional[str]):
+    """Remember that the current document used a declaration or folder.
+
+    :param key: What was used
+    :param value: Fingerprint of what was used (`None` if it did not exist)
+    """
+    _get_dependencies(env).setdefault(env.docname, {})[key] = value
+
+
+def folder_fingerprint(objects: List[PlcDeclaration]) -> str:
+    """Get the fingerprint of the listing of a folder.
+
+    The objects themselves are tracked separately, only the listing counts here.
+    """
+    return ",".join(f"{obj.objtype}:{obj.name}" for obj in objects)
+
+
+def get_fingerprint(interpreter: PlcInterpreter, key: DependencyKey) -> Optional[str]:
+    """Get the current fingerprint of a dependency.
+
+    :return: `None` if the object or folder does not exist (anymore)
+    """
+    try:
+        if key[0] == "object":
+            _, objtype, name = key
+            return interpreter.get_object(name, objtype).fingerprint
+        if key[0] == "folder":
+            _, folder, recursive = key
+            return folder_fingerprint(
+                interpreter.get_objects_in_folder(folder, recursive)
+            )
+    except KeyError:
+        pass
+
+    return None
+
+
+def purge_doc(app: Sphinx, env: BuildEnvironment, docname: str):
+    """Forget the dependencies of a document that is read again or removed."""
+    _get_dependencies(env).pop(docname, None)
+
+
+def merge_info(
+    app: Sphinx, env: BuildEnvironment, docnames: Set[str], other: BuildEnvironment
+):
+    """Take the dependencies of documents read in a parallel process."""
+    dependencies = _get_dependencies(env)
+    for docname, used in _get_dependencies(other).items():
+        if docname in docnames:
+            dependencies[docname] = used
+
+
+def get_outdated(
+    app: Sphinx,
+    env: BuildEnvironment,
+    added: Set[str],
+    changed: Set[str],
+    removed: Set[str],
+) -> List[str]:
+    """Find documents that used a PLC declaration that has changed since.
+
+    Changed source files are already found by Sphinx, through the files recorded by
+    the documenters. This also finds documents of which the used declarations or
+    folders were moved, added or removed.
+    """
+    dependencies = _get_dependencies(env)
+    if not dependencies:
+        return []  # Nothing to compare, no need to wait for the analysis
+
+    interpreter: Optional[PlcInterpreter] = get_interpreter(app)
+    if interpreter is None:
+        return []
+
+    fingerprints: Dict[DependencyKey, Optional[str]] = {}
+    outdated = []
+    for docname, used in dependencies.items():
+        if docname in changed or docname in removed:
+            continue
+        for key, value in used.items():
+            if key not in fingerprints:
+                fingerprints[key] = get_fingerprint(interpreter, key)
+            if fingerprints[key] != value:
+                outdated.append(docname)
+                break
+
+    if outdated:
+        logger.info(f"[plcdoc] {len(outdated)} document(s) use changed PLC objects")
+
+    return outdated
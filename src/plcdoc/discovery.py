@@ -0,0 +1,238 @@
+"""Contains the discovery of PLC source files by wildcard patterns."""
+
+import os
+import re
+import fnmatch
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+SOURCE_EXTENSIONS = (".tcpou", ".tcdut", ".tcgvl", ".tcio")
+"""Extensions of TwinCAT files with PLC code (lower case)."""
+
+DEFAULT_EXCLUDE = ["_Boot", "_CompileInfo", "_Libraries"]
+"""Folders of TwinCAT build output and installed libraries."""
+
+_MAGIC = re.compile(r"[*?[]")
+
+# Windows paths are case-insensitive
+_FLAGS = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+
+
+def has_magic(path: str) -> bool:
+    """Check if a path contains wildcards."""
+    return _MAGIC.search(path) is not None
+
+
+def _split(pattern: str) -> List[str]:
+    if os.path.altsep:
+        pattern = pattern.replace(os.path.sep, os.path.altsep)
+    return pattern.split("/")
+
+
+class _Segment:
+    """Pattern for a single file or folder name, or ``**`` for any folders."""
+
+    __slots__ = ("recursive", "hidden", "regex")
+
+    def __init__(self, pattern: str):
+        self.recursive = pattern == "**"
+        # Like `glob`, wildcards do not match hidden names
+        self.hidden = pattern.startswith(".")
+        self.regex = None
+        if not self.recursive:
+            self.regex = re.compile(fnmatch.translate(pattern), _FLAGS)
+
+    def match(self, name: str) -> bool:
+        if name.startswith(".") and not self.hidden:
+            return False
+        return self.recursive or self.regex.match(name) is not None
+
+
+class _Pattern:
+    """Path pattern, matched one name at a time while walking down the folders.
+
+    The state of a match is the set of positions in the segments that can be reached
+    by the names so far. A folder is only entered if the pattern can still match
+    something inside it.
+    """
+
+    def __init__(self, index: int, segments: List[str]):
+        self.index = index  # Of the pattern in the original list
+        self.segments = [_Segment(segment) for segment in segments]
+        self.start = self._closure({0})
+
+    def _closure(self, states: Set[int]) -> FrozenSet[int]:
+        """Add the positions after each ``**``, which can match no folders at all."""
+        result = set()
+        for state in states:
+            while state < len(self.segments) and self.segments[state].recursive:
+                result.add(state)
+                state += 1
+            result.add(state)
+        return frozenset(result)
+
+    def advance(self, states: FrozenSet[int], name: str) -> FrozenSet[int]:
+        """Get the states after a name."""
+        result = set()
+        for state in states:
+            if state < len(self.segments):
+                segment = self.segments[state]
+                if segment.match(name):
+                    result.add(state if segment.recursive else state + 1)
+        return self._closure(result)
+
+    def is_open(self, states: FrozenSet[int]) -> bool:
+        """Check if more names could still match, i.e. if a folder is worth entering."""
+        return any(state < len(self.segments) for state in states)
+
+    def is_match(self, states: FrozenSet[int]) -> bool:
+        return len(self.segments) in states
+
+    def match_path(self, names: List[str]) -> bool:
+        """Match a complete path at once."""
+        states = self.start
+        for name in names:
+            states = self.advance(states, name)
+            if not states:
+                return False
+        return self.is_match(states)
+
+
+class _Exclude:
+    """Exclude patterns, to skip files and to not enter folders at all.
+
+    A pattern without a slash (e.g. ``_Boot``) is matched against the names at any
+    depth. Other patterns are matched against the absolute path.
+    """
+
+    def __init__(self, patterns: Sequence[str]):
+        self._names = [
+            _Segment(pattern) for pattern in patterns if len(_split(pattern)) == 1
+        ]
+        self._paths = [
+            _Pattern(-1, _split(os.path.abspath(pattern)))
+            for pattern in patterns
+            if len(_split(pattern)) > 1
+        ]
+
+    def match_name(self, name: str) -> bool:
+        return any(segment.match(name) for segment in self._names)
+
+    def match(self, name: str, path: str) -> bool:
+        if self.match_name(name):
+            return True
+        if self._paths:
+            names = _split(os.path.abspath(path))
+            return any(pattern.match_path(names) for pattern in self._paths)
+        return False
+
+
+def find_source_files(
+    patterns: Sequence[str], exclude: Optional[Sequence[str]] = None
+) -> List[List[str]]:
+    """Find the PLC source files matching each of a list of patterns.
+
+    Patterns can contain the wildcards of `glob`, including ``**`` for any number of
+    folders. All patterns are matched in a single walk through the folders: folders
+    that cannot hold any matches are skipped, as are excluded folders. Only files with
+    a TwinCAT extension (see :data:`SOURCE_EXTENSIONS`) are matched by wildcards.
+
+    A path without wildcards is used as it is, if the file exists. Such paths are not
+    checked against ``exclude``.
+
+    :param exclude: Patterns of files and folders to skip (see :class:`_Exclude`),
+                    by default :data:`DEFAULT_EXCLUDE`
+    :return: Files of each pattern, in the order of the folder tree
+    """
+    excluder = _Exclude(DEFAULT_EXCLUDE if exclude is None else exclude)
+    found: List[List[str]] = [[] for _ in patterns]
+
+    # Literal start of each pattern, to only walk the folders below it
+    bases: Dict[Tuple[str, ...], List[Tuple[int, List[str]]]] = {}
+    for index, pattern in enumerate(patterns):
+        if os.path.isfile(pattern):
+            found[index].append(pattern)  # It may contain wildcard characters
+            continue
+        segments = _split(pattern)
+        literal = 0
+        while literal < len(segments) and not has_magic(segments[literal]):
+            literal += 1
+        if literal == len(segments):
+            continue  # No wildcards and no file
+        bases.setdefault(tuple(segments[:literal]), []).append(
+            (index, segments[literal:])
+        )
+
+    def contains(outer: Tuple[str, ...], base: Tuple[str, ...]) -> bool:
+        """Check if a base can be reached by walking down from another."""
+        if base[: len(outer)] != outer:
+            return False
+        # The literal start of a pattern is not subject to the excludes
+        return not any(
+            name in ("", os.curdir, os.pardir) or excluder.match_name(name)
+            for name in base[len(outer) :]
+        )
+
+    # Walk nested bases together, from the outer one
+    walks: Dict[Tuple[str, ...], List[_Pattern]] = {}
+    for base in sorted(bases, key=len):
+        outer = next((b for b in walks if contains(b, base)), base)
+        walks.setdefault(outer, [])
+        for index, segments in bases[base]:
+            walks[outer].append(_Pattern(index, list(base[len(outer) :]) + segments))
+
+    for base, includes in walks.items():
+        top = "/".join(base) if base != ("",) else "/"
+        if os.path.sep != "/":
+            top = top.replace("/", os.path.sep)
+        if top and not os.path.isdir(top):
+            continue
+        states = [(include, include.start) for include in includes]
+        _walk(top, states, excluder, found, set())
+
+    return found
+
+
+def _walk(
+    top: str,
+    includes: List[Tuple[_Pattern, FrozenSet[int]]],
+    excluder: _Exclude,
+    found: List[List[str]],
+    visited: Set[str],
+):
+    """Match the entries of a folder, and walk into the folders worth entering."""
+    try:
+        with os.scandir(top or os.curdir) as iterator:
+            entries = sorted(iterator, key=lambda e: e.name)
+    except OSError:
+        return
+
+    for entry in entries:
+        path = os.path.join(top, entry.name) if top else entry.name
+        if excluder.match(entry.name, path):
+            continue
+
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            continue
+
+        if is_dir:
+            states = []
+            for include, state in includes:
+                state = include.advance(state, entry.name)
+                if include.is_open(state):
+                    states.append((include, state))
+            if not states:
+                continue
+            if entry.is_symlink():
+                # Prevent loops through links to a parent folder
+                real = os.path.realpath(path)
+                if real in visited:
+                    continue
+                visited.add(real)
+            _walk(path, states, excluder, found, visited)
+
+        elif os.path.splitext(entry.name)[1].lower() in SOURCE_EXTENSIONS:
+            for include, state in includes:
+                if include.is_match(include.advance(state, entry.name)):
+                    found[include.index].append(path)
@@ -2,18 +2,21 @@
 
 import os.path
 from abc import ABC
-from typing import Tuple, List, Dict, Optional, Any, Union
+from typing import Tuple, List, Dict, Optional, Any, Union, Sequence
 import re
 
 from sphinx.util import logging
 from sphinx.ext.autodoc import (
     Documenter as AutodocDocumenter,
     members_option,
+    bool_option,
     ALL,
 )
 from docutils.statemachine import StringList
 
 from .interpreter import PlcInterpreter, PlcDeclaration, TextXMetaClass
+from .analysis import get_interpreter
+from .dependencies import note_dependency, folder_fingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -184,18 +187,39 @@ class PlcDocumenter(AutodocDocumenter, ABC):
         In the original Python ``autodoc`` this is where target files are loaded and
         read.
         """
-        interpreter: PlcInterpreter = self.env.app._interpreter
+        interpreter: PlcInterpreter = get_interpreter(self.env.app)
 
+        key = ("object", self.objtype, self.fullname)
         try:
             self.object: PlcDeclaration = interpreter.get_object(
                 self.fullname, self.objtype
             )
         except KeyError as err:
             logger.warning(err)
+            self.record_dependency(key, None)  # Update once the object appears
             return False
 
+        self.record_dependency(key, self.object.fingerprint, [self.object.file])
         return True
 
+    def record_dependency(
+        self, key: Tuple, fingerprint: Optional[str], files: Sequence[str] = ()
+    ):
+        """Record what the current document uses, such that it is updated with it.
+
+        Sphinx checks the modification time of the recorded source files. The
+        fingerprint also catches objects that were moved, added or removed, see
+        :func:`~plcdoc.dependencies.get_outdated`.
+
+        :param key: Dependency, see :data:`~plcdoc.dependencies.DependencyKey`
+        :param fingerprint: Current fingerprint (`None` if it does not exist)
+        :param files: Source files that were used
+        """
+        note_dependency(self.env, key, fingerprint)
+        for file in files:
+            if os.path.isfile(file):
+                self.directive.record_dependencies.add(file)
+
     def add_content(self, more_content: Optional[StringList]) -> None:
         """Add content from docstrings, attribute documentation and user."""
 
@@ -276,9 +300,14 @@ class PlcDocumenter(AutodocDocumenter, ABC):
         """Get origin of info for tracing purposes."""
         return f"{self.object.file}:declaration of {self.fullname}"
 
+    def get_children(self) -> Dict[str, PlcDeclaration]:
+        """Get all children of self.object that can be documented."""
+        return self.object.children
+
     def get_object_children(self, want_all: bool) -> Dict[str, Any]:
         """Get list of children of self.object that overlap with the member settings."""
         selected_children = {}
+        children = self.get_children()
 
         if not want_all:
             if not self.options.members:
@@ -286,15 +315,27 @@ class PlcDocumenter(AutodocDocumenter, ABC):
 
             # Specific members given
             for name in self.options.members:
-                if name in self.object.children:
-                    selected_children[name] = self.object.children[name]
+                if name in children:
+                    selected_children[name] = children[name]
                 else:
                     logger.warning(f"Cannot find {name} inside {self.fullname}")
         else:
-            selected_children = self.object.children
+            selected_children = children
 
         return selected_children
 
+    def get_bases(self) -> List[PlcDeclaration]:
+        """Get the objects that self.object extends, recorded as dependencies.
+
+        A document with inherited members then also gets updated with the bases.
+        """
+        interpreter: PlcInterpreter = get_interpreter(self.env.app)
+        bases = interpreter.get_inheritance().get_bases(self.object)
+        for base in bases:
+            key = ("object", base.objtype, base.name)
+            self.record_dependency(key, base.fingerprint, [base.file])
+        return bases
+
 
 class PlcFunctionDocumenter(PlcDocumenter):
     """Documenter for the plain Function type."""
@@ -321,8 +362,21 @@ class PlcFunctionBlockDocumenter(PlcFunctionDocumenter):
 
     option_spec = {
         "members": members_option,
+        "inherited-members": bool_option,
     }
 
+    def get_children(self) -> Dict[str, PlcDeclaration]:
+        """Get the own children, followed by the inherited ones if requested."""
+        children = self.object.children
+        if self.options.inherited_members:
+            self.get_bases()
+            interpreter: PlcInterpreter = get_interpreter(self.env.app)
+            inherited = interpreter.get_inheritance().get_inherited_children(
+                self.object
+            )
+            children = {**children, **inherited}
+        return children
+
     def document_members(self, all_members: bool = False) -> None:
         """Document nested members."""
         # TODO: Add documenting for members
@@ -387,6 +441,20 @@ class PlcStructDocumenter(PlcDataDocumenter):
 
     objtype = "struct"
 
+    option_spec = {
+        "inherited-members": bool_option,
+    }
+
+    def get_members(self) -> List[TextXMetaClass]:
+        """Get the members, preceded by the inherited ones if requested."""
+        members = self.object.members
+        if self.options.inherited_members:
+            self.get_bases()
+            interpreter: PlcInterpreter = get_interpreter(self.env.app)
+            inherited = interpreter.get_inheritance().get_inherited_members(self.object)
+            members = inherited + members
+        return members
+
     def document_members(self, all_members: bool = False) -> None:
         """Add directives for the struct properties."""
 
@@ -398,7 +466,7 @@ class PlcStructDocumenter(PlcDataDocumenter):
                 parent=self.object,
                 member=member,
             )
-            for member in self.object.members
+            for member in self.get_members()
         ]
 
         # TODO: Sort members
@@ -475,10 +543,18 @@ class PlcStructMemberDocumenter(PlcDataDocumenter):
 
 
 class PlcFolderDocumenter(PlcDataDocumenter):
-    """Document a folder and its contents."""
+    """Document a folder and its contents.
+
+    With the ``recursive`` option, the contents of all subfolders are included too.
+    """
 
     objtype = "folder"
 
+    option_spec = {
+        "noindex": bool_option,
+        "recursive": bool_option,
+    }
+
     def parse_name(self) -> bool:
         # Input is in ``self.name``
         self.modname = None
@@ -504,19 +580,23 @@ class PlcFolderDocumenter(PlcDataDocumenter):
     def import_object(self, raiseerror: bool = False) -> bool:
         """Override import to process the folder name."""
 
-        interpreter: PlcInterpreter = self.env.app._interpreter
+        interpreter: PlcInterpreter = get_interpreter(self.env.app)
 
         folder = os.path.normpath(self.fullname)
         folder.strip(os.sep)
+        recursive = bool(self.options.recursive)
 
+        key = ("folder", folder, recursive)
         try:
             self._contents: List[PlcDeclaration] = interpreter.get_objects_in_folder(
-                folder
+                folder, recursive=recursive
             )
         except KeyError as err:
             logger.warning(err)
+            self.record_dependency(key, None)
             return False
 
+        self.record_dependency(key, folder_fingerprint(self._contents))
         return True
 
     def document_members(self, all_members: bool = False) -> None:
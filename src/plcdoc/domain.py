@@ -22,7 +22,6 @@ from .directives import (
 )
 from .roles import PlcXRefRole
 
-
 logger = logging.getLogger(__name__)
 
 
@@ -79,14 +78,66 @@ class StructuredTextDomain(Domain):
 
     # fmt: on
 
-    initial_data = {"objects": {}, "modules": {}}
+    initial_data = {"objects": {}, "modules": {}, "suffixes": {}, "documents": {}}
+
+    data_version = 3  # Increase when the structure of `initial_data` changes
 
     indices = []
 
+    def __init__(self, env: BuildEnvironment):
+        super().__init__(env)
+
+        # Results of `find_obj`, only valid as long as the objects do not change
+        self._find_cache: Dict[Tuple, List[Tuple[str, ObjectEntry]]] = {}
+        self._object_order: Optional[Dict[str, int]] = None
+
     @property
     def objects(self) -> Dict[str, ObjectEntry]:
         return self.data.setdefault("objects", {})  # fullname -> ObjectEntry
 
+    @property
+    def documents(self) -> Dict[str, Dict[str, None]]:
+        """Names of the objects described in each document.
+
+        Names are the keys of a dict (in the order they were added), so they can be
+        removed one by one in constant time.
+        """
+        return self.data.setdefault("documents", {})  # docname -> fullnames
+
+    @property
+    def suffixes(self) -> Dict[str, Dict[str, Dict[str, None]]]:
+        """Index of objects for relaxed searching.
+
+        The index is by objtype first, then by every ending of the full name after a
+        dot (e.g. ``B.C`` and ``C`` for ``A.B.C``). Names are the keys of a dict, like
+        in :attr:`documents`, and keep the order of :attr:`objects`.
+        """
+        return self.data.setdefault("suffixes", {})  # objtype -> suffix -> fullnames
+
+    @staticmethod
+    def _get_suffixes(name: str) -> List[str]:
+        parts = name.split(".")
+        return [".".join(parts[i:]) for i in range(1, len(parts))]
+
+    def _index_object(self, name: str, objtype: str):
+        index = self.suffixes.setdefault(objtype, {})
+        for suffix in self._get_suffixes(name):
+            index.setdefault(suffix, {})[name] = None
+
+    def _unindex_object(self, name: str, objtype: str):
+        index = self.suffixes.get(objtype, {})
+        for suffix in self._get_suffixes(name):
+            names = index.get(suffix, {})
+            if name in names:
+                del names[name]
+                if not names:
+                    del index[suffix]
+
+    def _clear_caches(self):
+        """Forget any search results, after the objects were changed."""
+        self._find_cache.clear()
+        self._object_order = None
+
     def note_object(
         self,
         name: str,
@@ -95,6 +146,11 @@ class StructuredTextDomain(Domain):
         location: Any = None,
     ) -> None:
         """Note an object for cross reference."""
+        entry = ObjectEntry(self.env.docname, node_id, objtype)
+        self._add_object(name, entry, location)
+
+    def _add_object(self, name: str, entry: ObjectEntry, location: Any = None):
+        """Add an object to the data and the indices, replacing any duplicate."""
         if name in self.objects:  # Duplicated
             other = self.objects[name]
             logger.warning(
@@ -102,8 +158,30 @@ class StructuredTextDomain(Domain):
                 f"{other.docname}, use :noindex: for one of them",
                 location=location,
             )
+            self._remove_object(name)
+
+        self.objects[name] = entry
+        self.documents.setdefault(entry.docname, {})[name] = None
+        self._index_object(name, entry.objtype)
+        self._clear_caches()
+
+    def _remove_object(self, name: str):
+        """Remove an object from the data and the indices."""
+        entry = self.objects.pop(name)
+
+        names = self.documents.get(entry.docname, {})
+        if name in names:
+            del names[name]
+            if not names:
+                del self.documents[entry.docname]
 
-        self.objects[name] = ObjectEntry(self.env.docname, node_id, objtype)
+        self._unindex_object(name, entry.objtype)
+        self._clear_caches()
+
+    def clear_doc(self, docname: str) -> None:
+        """Remove the objects of a document, e.g. because it was changed."""
+        for name in list(self.documents.get(docname, [])):
+            self._remove_object(name)
 
     def find_obj(
         self,
@@ -123,7 +201,26 @@ class StructuredTextDomain(Domain):
         If `searchmode` is equal to 1, the search is relaxed. The full path does not
         needto be specified.
         If `searchmode` is 0, only the full path is checked.
+
+        Results are remembered until the objects change, so repeated references to
+        the same target are cheap.
         """
+        key = (modname, classname, name, typ, searchmode)
+        if key not in self._find_cache:
+            self._find_cache[key] = self._find_obj(
+                modname, classname, name, typ, searchmode
+            )
+        return list(self._find_cache[key])
+
+    def _find_obj(
+        self,
+        modname: Optional[str],
+        classname: Optional[str],
+        name: str,
+        typ: Optional[str],
+        searchmode: int,
+    ) -> List[Tuple[str, ObjectEntry]]:
+        """Uncached version of :meth:`find_obj`."""
         if name[-2:] == "()":
             name = name[:-2]
 
@@ -159,12 +256,9 @@ class StructuredTextDomain(Domain):
                         newname = name
                     else:
                         # "fuzzy" searching mode
-                        searchname = "." + name
                         matches = [
                             (oname, self.objects[oname])
-                            for oname in self.objects
-                            if oname.endswith(searchname)
-                            and self.objects[oname].objtype in objtypes
+                            for oname in self._find_by_suffix(name, objtypes)
                         ]
         else:
             # NOTE: searching for exact match, object type is not considered
@@ -187,6 +281,24 @@ class StructuredTextDomain(Domain):
             matches.append((newname, self.objects[newname]))
         return matches
 
+    def _find_by_suffix(self, suffix: str, objtypes: List[str]) -> List[str]:
+        """Get the names of objects ending in ``.<suffix>``, in their original order."""
+        found = [
+            self.suffixes[objtype][suffix]
+            for objtype in objtypes
+            if suffix in self.suffixes.get(objtype, {})
+        ]
+        if not found:
+            return []
+        if len(found) == 1:
+            return list(found[0])
+
+        if self._object_order is None:
+            self._object_order = {name: i for i, name in enumerate(self.objects)}
+        return sorted(
+            (name for names in found for name in names), key=self._object_order.get
+        )
+
     def resolve_xref(
         self,
         env: BuildEnvironment,
@@ -268,5 +380,13 @@ class StructuredTextDomain(Domain):
                 )
         return results
 
-    def merge_domaindata(self, docnames: List[str], otherdata: Dict):
-        pass
+    def merge_domaindata(self, docnames: List[str], otherdata: Dict) -> None:
+        """Add the objects noted in a parallel process.
+
+        Only the objects of ``docnames`` are taken, the other data already came from
+        this process. Objects also described elsewhere give a warning, like in
+        :meth:`note_object`.
+        """
+        for docname in docnames:
+            for name in otherdata["documents"].get(docname, []):
+                self._add_object(name, otherdata["objects"][name], location=docname)
@@ -1,14 +1,22 @@
 """Contains the technical Sphinx extension stuff."""
 
-from typing import Dict, Optional
+import os
+from typing import Dict, List, Optional
 import logging
 from sphinx.application import Sphinx
+from sphinx.config import Config
 from docutils.nodes import Element
 from sphinx.addnodes import pending_xref
 from sphinx.environment import BuildEnvironment
 
 from .__version__ import __version__
 from .interpreter import PlcInterpreter
+from .analysis import start_analysis, wait_for_analysis
+from .cache import ParseCache
+from .store import SymbolStore
+from .discovery import DEFAULT_EXCLUDE
+from .dependencies import purge_doc, merge_info, get_outdated
+from .stats import ParseStats, report_parse_stats
 from .domain import StructuredTextDomain
 from .auto_directives import PlcAutodocDirective
 from .documenters import (
@@ -32,16 +40,35 @@ def plcdoc_setup(app: Sphinx) -> Dict:
     Real setup function is put in the module ``__init__``.
     """
 
-    # We place a callback for Sphinx for when the builder is about ready to start to
-    # index the PLC files. The moment of reading the PLC files could probably be
-    # anything.
+    # We place a callback for Sphinx for when the config is known, to start indexing
+    # the PLC files. By default this happens in the background, such that Sphinx can
+    # meanwhile load the environment and read documents that do not need PLC objects.
 
     app.setup_extension("sphinx.ext.autodoc")  # Require the autodoc extension
 
-    app.connect("builder-inited", analyze)
+    app.connect("config-inited", start_background_analysis)
+    app.connect("builder-inited", analyze_in_foreground)
+    app.connect("env-before-read-docs", join_analysis)
 
     app.add_config_value("plc_sources", [], True)  # List[str]
+    # List[str]
+    app.add_config_value("plc_sources_exclude", list(DEFAULT_EXCLUDE), True)
     app.add_config_value("plc_project", None, True)  # str
+    app.add_config_value("plc_cache_dir", None, "env")  # Optional[str]
+    app.add_config_value("plc_cache_size", 256 * 1024 * 1024, "env")  # int [bytes]
+    app.add_config_value("plc_parse_workers", 1, "")  # Union[int, str]
+    app.add_config_value("plc_io_workers", 1, "")  # int
+    app.add_config_value("plc_lazy", False, "env")  # bool
+    app.add_config_value("plc_lazy_cache_size", 16 * 1024 * 1024, "")  # int [bytes]
+    app.add_config_value("plc_parser_backend", "textx", "env")  # str
+    app.add_config_value("plc_parse_stats", False, "")  # bool
+    app.add_config_value("plc_parse_stats_top", 10, "")  # int
+    app.add_config_value("plc_parse_stats_file", None, "")  # Optional[str]
+    app.add_config_value("plc_textx_memoization", False, "")  # bool
+    app.add_config_value("plc_textx_profile", False, "")  # bool
+    app.add_config_value("plc_shared_index", "auto", "")  # Union[bool, str]
+    app.add_config_value("plc_background_analysis", True, "")  # bool
+    app.add_config_value("plc_symbol_store", None, "env")  # Optional[str]
 
     app.add_domain(StructuredTextDomain)
 
@@ -67,6 +94,15 @@ def plcdoc_setup(app: Sphinx) -> Dict:
     app.registry.add_documenter("plc:folder", PlcFolderDocumenter)
     app.add_directive_to_domain("plc", "autofolder", PlcAutodocDirective)
 
+    # Update the documents that use changed PLC objects
+    app.connect("env-get-outdated", get_outdated)
+    app.connect("env-purge-doc", purge_doc)
+    app.connect("env-merge-info", merge_info)
+
+    # Show where the time of parsing went
+    app.connect("build-finished", finish_analysis)
+    app.connect("build-finished", report_parse_stats)
+
     # Insert a resolver for built-in types
     app.connect("missing-reference", builtin_resolver, priority=900)
 
@@ -77,6 +113,35 @@ def plcdoc_setup(app: Sphinx) -> Dict:
     }
 
 
+def start_background_analysis(app: Sphinx, config: Config):
+    """Start :func:`analyze` in the background, if enabled."""
+    if config.plc_background_analysis:
+        start_analysis(app, analyze)
+
+
+def analyze_in_foreground(app: Sphinx):
+    """Run :func:`analyze` right away, if it is not done in the background."""
+    if not app.config.plc_background_analysis:
+        analyze(app)
+
+
+def join_analysis(app: Sphinx, env: BuildEnvironment, docnames: List[str]):
+    """Wait for the analysis before documents are read in parallel.
+
+    Parallel readers are forked processes, which would not get the result of a thread
+    that is still running. Reading in the main process waits only once a document
+    needs PLC objects.
+    """
+    if app.parallel > 1:
+        wait_for_analysis(app)
+
+
+def finish_analysis(app: Sphinx, exception: Optional[Exception]):
+    """Wait for an analysis that was never needed, before the build ends."""
+    if exception is None:
+        wait_for_analysis(app)
+
+
 def analyze(app: Sphinx):
     """Perform the analysis of PLC source and extract docs.
 
@@ -89,24 +154,83 @@ def analyze(app: Sphinx):
     # Inserting the shared interpreter into an existing object is not the neatest, but
     # it's the best way to keep an instance linked to an `app` object. The alternative
     # would be the `app.env.temp_data` dict, which is also nasty.
-    interpreter = PlcInterpreter()
+    cache = None
+    store = None
+    if app.config.plc_symbol_store:
+        # The store replaces the cache
+        store = SymbolStore(os.path.join(app.confdir, app.config.plc_symbol_store))
+    elif app.config.plc_cache_dir:
+        cache = ParseCache(
+            os.path.join(app.confdir, app.config.plc_cache_dir),
+            app.config.plc_cache_size,
+        )
+
+    workers = app.config.plc_parse_workers
+    if workers == "auto":
+        workers = os.cpu_count() or 1
+
+    interpreter = PlcInterpreter(
+        cache,
+        workers=int(workers),
+        lazy=app.config.plc_lazy,
+        lazy_cache_size=app.config.plc_lazy_cache_size,
+        backend=app.config.plc_parser_backend,
+        stats=(
+            ParseStats(profile_rules=app.config.plc_textx_profile)
+            if app.config.plc_parse_stats
+            or app.config.plc_parse_stats_file
+            or app.config.plc_textx_profile
+            else None
+        ),
+        memoization=app.config.plc_textx_memoization,
+        io_workers=int(app.config.plc_io_workers),
+        store=store,
+    )
 
     source_paths = (
         [app.config.plc_sources]
         if isinstance(app.config.plc_sources, str)
-        else app.config.plc_sources
+        else list(app.config.plc_sources)
     )
-    if source_paths:
-        if not interpreter.parse_source_files(source_paths):
-            logger.warning("Could not parse all files in `plc_sources` from conf.py")
 
+    # Parse the sources and the project in one go, such that a file in both is
+    # only parsed once
     project_file = app.config.plc_project
     if project_file:
-        if not interpreter.parse_plc_project(project_file):
+        project_sources = interpreter.read_plc_project(project_file)
+        if project_sources is None:
+            logger.warning(f"Could not read project file {project_file}")
+        else:
+            source_paths += project_sources
+
+    if source_paths:
+        exclude = app.config.plc_sources_exclude
+        if isinstance(exclude, str):
+            exclude = [exclude]
+        if not interpreter.parse_source_files(source_paths, list(exclude)):
             logger.warning(
-                f"Could not parse all files found in project file {project_file}"
+                "Could not parse all files in `plc_sources` and `plc_project` from "
+                "conf.py"
             )
 
+    if cache is not None:
+        logger.info(
+            f"[plcdoc] Parse cache: {cache.hits} file(s) loaded, "
+            f"{cache.misses} file(s) parsed"
+        )
+
+    shared_index = app.config.plc_shared_index
+    if shared_index == "auto":
+        shared_index = app.parallel > 1
+    if shared_index and not app.config.plc_lazy and store is None:
+        # Parallel readers load the objects they need from a shared file, instead of
+        # each getting a copy of all objects
+        path = os.path.join(app.doctreedir, "plc_index.bin")
+        interpreter.freeze(path)
+        interpreter = PlcInterpreter.from_index(
+            path, app.config.plc_lazy_cache_size, stats=interpreter.stats
+        )
+
     app._interpreter = interpreter
 
 
@@ -0,0 +1,285 @@
+"""Contains a read-only index of parsed PLC objects in a memory-mapped file."""
+
+import os
+import json
+import mmap
+import pickle
+import struct
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .interpreter import PlcDeclaration
+
+
+class FrozenIndex:
+    """Index of the objects of an interpreter, written once and then only read.
+
+    With parallel reading, Sphinx forks a process for each job. Objects inherited from
+    the main process are copied into a process as soon as it touches them (through
+    their reference count), so each process ends up with its own copy of the parsed
+    project. Instead, the objects are written to this index after parsing. The file is
+    mapped into memory, which the operating system shares between the processes, and
+    each process only unpickles the files it actually documents.
+
+    The file holds a header, three tables of fixed-size records sorted by their key,
+    and a pool with the keys and the pickled objects of each source file:
+
+    * Files: path -> pickled objects of the file
+    * Names: object name -> file
+    * Folders: relative folder -> range of files in a list of file numbers
+
+    Files are listed by a depth-first walk of the folders, such that the files of a
+    folder including all of its subfolders are a single range as well.
+    """
+
+    MAGIC = b"PLCIDX02"
+
+    # Magic, then offset and count of each table and of the file numbers, and offset
+    # and size of the properties of the interpreter (as JSON)
+    _HEADER = struct.Struct("<8s10Q")
+    _FILE = struct.Struct("<QIQQ")  # Key offset and size, objects offset and size
+    _NAME = struct.Struct("<QII")  # Key offset and size, file number
+    _FOLDER = struct.Struct("<QIIII")  # Key offset and size, start, own and total
+    _NUMBER = struct.Struct("<I")
+
+    def __init__(self, path: str):
+        """Open an existing index file."""
+        self._path = path
+        with open(path, "rb") as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, *fields = self._HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC:
+            raise ValueError(f"`{path}` is no index of PLC objects")
+        (
+            self._files,
+            self._file_count,
+            self._names,
+            self._name_count,
+            self._folders,
+            self._folder_count,
+            self._numbers,
+            _,
+            info_offset,
+            info_size,
+        ) = fields
+        info = json.loads(self._map[info_offset : info_offset + info_size])
+        self.root_folder: Optional[str] = info["root_folder"]
+        self.projects: Dict[str, str] = info["projects"]
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def close(self):
+        self._map.close()
+
+    # ---------------------------------------------------------------------------------
+    # Reading
+
+    def _key(self, offset: int, size: int) -> bytes:
+        return self._map[offset : offset + size]
+
+    def _search(
+        self, table: int, count: int, record: struct.Struct, key: str
+    ) -> Optional[Tuple]:
+        """Binary search for the record of a key in a sorted table."""
+        encoded = key.encode()
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            values = record.unpack_from(self._map, table + middle * record.size)
+            found = self._key(values[0], values[1])
+            if found < encoded:
+                low = middle + 1
+            elif found > encoded:
+                high = middle
+            else:
+                return values
+        return None
+
+    def _file_path(self, number: int) -> str:
+        values = self._FILE.unpack_from(
+            self._map, self._files + number * self._FILE.size
+        )
+        return self._key(values[0], values[1]).decode()
+
+    def files(self) -> List[str]:
+        """Get all files in the index, sorted by their path."""
+        return [self._file_path(number) for number in range(self._file_count)]
+
+    def find_file(self, name: str) -> Optional[str]:
+        """Get the file of a (top-level) object by its name."""
+        values = self._search(self._names, self._name_count, self._NAME, name)
+        return None if values is None else self._file_path(values[2])
+
+    def find_folder_files(self, parts: List[str], recursive: bool = False) -> List[str]:
+        """Get the files of a folder, in the same order as the folder tree.
+
+        :param parts: Names of the folder and its parents
+        """
+        values = self._search(
+            self._folders, self._folder_count, self._FOLDER, "/".join(parts)
+        )
+        if values is None:
+            return []
+        _, _, start, own, total = values
+        return [
+            self._file_path(
+                self._NUMBER.unpack_from(
+                    self._map, self._numbers + i * self._NUMBER.size
+                )[0]
+            )
+            for i in range(start, start + (total if recursive else own))
+        ]
+
+    def get_size(self, filepath: str) -> int:
+        """Get the size of the pickled objects of a file (0 if not in the index)."""
+        values = self._search(self._files, self._file_count, self._FILE, filepath)
+        return 0 if values is None else values[3]
+
+    def load(self, filepath: str) -> List["PlcDeclaration"]:
+        """Unpickle the objects of a file.
+
+        :raises KeyError: If the file is not part of the index
+        """
+        values = self._search(self._files, self._file_count, self._FILE, filepath)
+        if values is None:
+            raise KeyError(f"File `{filepath}` is not in the index")
+        _, _, offset, size = values
+        return pickle.loads(memoryview(self._map)[offset : offset + size])
+
+    # ---------------------------------------------------------------------------------
+    # Writing
+
+    @classmethod
+    def write(
+        cls,
+        path: str,
+        file_objects: Dict[str, List["PlcDeclaration"]],
+        folder_files: Any,
+        root_folder: Optional[str] = None,
+        projects: Optional[Dict[str, str]] = None,
+        namespaces: Optional[Dict[str, str]] = None,
+    ):
+        """Write an index file, replacing any existing one.
+
+        :param file_objects: Objects by their source file, in the order of the project
+        :param folder_files: Folder tree with the source files in each folder
+        :param root_folder: Root of the project
+        :param projects: Projects of a solution, name by root folder
+        :param namespaces: Project name of each file, under which its objects can be
+                           found as well
+        """
+        files = sorted(path for path, objects in file_objects.items() if objects)
+        numbers = {filepath: number for number, filepath in enumerate(files)}
+        namespaces = namespaces or {}
+
+        # Later files win, like in the interpreter, but only within a project: the first
+        # project of a solution keeps the unqualified names
+        names: Dict[str, int] = {}
+        owners: Dict[str, Optional[str]] = {}
+        for filepath, objects in file_objects.items():
+            namespace = namespaces.get(filepath)
+            for obj in objects:
+                owner = owners.get(obj.name)
+                if owner is None or namespace is None or owner == namespace:
+                    names[obj.name] = numbers[filepath]
+                    owners[obj.name] = namespace
+                if namespace is not None:
+                    names[namespace + "." + obj.name] = numbers[filepath]
+
+        folders: List[Tuple[str, int, int, int]] = []  # Key, start, own and total
+        order: List[int] = []
+        cls._walk(folder_files, [], numbers, folders, order)
+
+        pool = bytearray()
+
+        def add(data: bytes) -> Tuple[int, int]:
+            offset = len(pool)
+            pool.extend(data)
+            return offset, len(data)
+
+        file_records = []
+        for filepath in files:
+            key = add(filepath.encode())
+            blob = add(
+                pickle.dumps(file_objects[filepath], protocol=pickle.HIGHEST_PROTOCOL)
+            )
+            file_records.append((*key, *blob))
+        name_records = [
+            (*add(name.encode()), number)
+            for name, number in sorted(names.items(), key=lambda i: i[0].encode())
+        ]
+        folder_records = [
+            (*add(key.encode()), start, own, total)
+            for key, start, own, total in sorted(folders, key=lambda f: f[0].encode())
+        ]
+        info = add(
+            json.dumps(
+                {"root_folder": root_folder, "projects": projects or {}}
+            ).encode()
+        )
+
+        # Tables come after the header, the pool after the tables
+        tables = [
+            (cls._FILE, file_records),
+            (cls._NAME, name_records),
+            (cls._FOLDER, folder_records),
+            (cls._NUMBER, [(number,) for number in order]),
+        ]
+        pool_offset = cls._HEADER.size + sum(
+            record.size * len(records) for record, records in tables
+        )
+
+        def relocate(record: struct.Struct, values: Tuple) -> Tuple:
+            """Make the offsets into the pool absolute."""
+            if record is cls._NUMBER:
+                return values
+            values = (values[0] + pool_offset,) + values[1:]
+            if record is cls._FILE:
+                values = values[:2] + (values[2] + pool_offset,) + values[3:]
+            return values
+
+        header = [cls.MAGIC]
+        body = bytearray()
+        offset = cls._HEADER.size
+        for record, records in tables:
+            header += [offset, len(records)]
+            for values in records:
+                body += record.pack(*relocate(record, values))
+            offset += record.size * len(records)
+        header += [info[0] + pool_offset, info[1]]
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(cls._HEADER.pack(*header))
+                fh.write(body)
+                fh.write(pool)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    @classmethod
+    def _walk(
+        cls,
+        node: Any,
+        parts: List[str],
+        numbers: Dict[str, int],
+        folders: List[Tuple[str, int, int, int]],
+        order: List[int],
+    ):
+        """List the files depth-first, with the range of each folder."""
+        start = len(order)
+        own = [numbers[filepath] for filepath in node.items if filepath in numbers]
+        order += own
+        index = len(folders)
+        folders.append(("", 0, 0, 0))  # Filled in once the subfolders are done
+        for part, child in node.children.items():
+            cls._walk(child, parts + [part], numbers, folders, order)
+        folders[index] = ("/".join(parts), start, len(own), len(order) - start)
@@ -0,0 +1,197 @@
+"""Contains the relations between PLC objects by ``EXTENDS`` and ``IMPLEMENTS``."""
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+import logging
+
+if TYPE_CHECKING:
+    from .interpreter import PlcDeclaration
+
+logger = logging.getLogger(__name__)
+
+_Key = Tuple[str, str]
+"""Identity of a top-level object: its file and name."""
+
+
+def _key(obj: "PlcDeclaration") -> _Key:
+    return obj.file, obj.name
+
+
+class InheritanceGraph:
+    """Graph of the objects that extend or implement other objects.
+
+    Function blocks, interfaces and structs can extend another object, function
+    blocks can also implement interfaces. The bases of an object are resolved when
+    they are first asked for and remembered from then on, so a deep hierarchy is only
+    walked once for all objects in it. A base that cannot be found (e.g. one from a
+    library) ends the hierarchy.
+
+    The reverse relations ("extended by" and "implemented by") need all objects, they
+    are collected once when first used.
+
+    Objects are identified by their file and name, such that the graph also works
+    when objects are loaded again (in lazy mode).
+    """
+
+    def __init__(
+        self,
+        resolve: Callable[[str, "PlcDeclaration"], Optional["PlcDeclaration"]],
+        files: Callable[[], Iterable[str]],
+        load: Callable[[str], List["PlcDeclaration"]],
+    ):
+        """
+
+        :param resolve: Find the object of a name, as used in the declaration of
+                        another object (`None` if it does not exist)
+        :param files: List all source files
+        :param load: Get the (top-level) objects of a source file
+        """
+        self._resolve = resolve
+        self._files = files
+        self._load = load
+
+        self._parents: Dict[_Key, Optional["PlcDeclaration"]] = {}
+        self._bases: Dict[_Key, List["PlcDeclaration"]] = {}
+        self._interfaces: Dict[_Key, List["PlcDeclaration"]] = {}
+        self._children: Dict[_Key, Dict[str, "PlcDeclaration"]] = {}
+        self._members: Dict[_Key, List] = {}
+        self._extended_by: Optional[Dict[_Key, List[_Key]]] = None
+        self._implemented_by: Optional[Dict[_Key, List[_Key]]] = None
+
+    def _get_parent(self, obj: "PlcDeclaration") -> Optional["PlcDeclaration"]:
+        key = _key(obj)
+        if key not in self._parents:
+            parent = None
+            for name in obj.extends:
+                parent = self._resolve(name, obj)
+                if parent is not None:
+                    break
+            self._parents[key] = parent
+        return self._parents[key]
+
+    def get_bases(self, obj: "PlcDeclaration") -> List["PlcDeclaration"]:
+        """Get the objects extended by an object, the nearest one first.
+
+        A circular hierarchy is reported and cut off where it repeats.
+        """
+        key = _key(obj)
+        if key in self._bases:
+            return self._bases[key]
+
+        chain = []
+        visited = {key}
+        current = obj
+        while True:
+            parent = self._get_parent(current)
+            if parent is None:
+                break
+            parent_key = _key(parent)
+            if parent_key in visited:
+                logger.warning(
+                    f"PLC object `{obj.name}` is part of a circular hierarchy, through "
+                    f"`{current.name}` extending `{parent.name}`"
+                )
+                break
+            visited.add(parent_key)
+            chain.append(parent)
+            if parent_key in self._bases:
+                # Rest of the hierarchy is known already, up to any repetition
+                for base in self._bases[parent_key]:
+                    if _key(base) in visited:
+                        break
+                    visited.add(_key(base))
+                    chain.append(base)
+                break
+            current = parent
+
+        self._bases[key] = chain
+        return chain
+
+    def get_interfaces(self, obj: "PlcDeclaration") -> List["PlcDeclaration"]:
+        """Get all interfaces implemented by an object, also through its bases.
+
+        Interfaces extended by those interfaces are included too.
+        """
+        key = _key(obj)
+        if key in self._interfaces:
+            return self._interfaces[key]
+
+        interfaces: Dict[_Key, "PlcDeclaration"] = {}
+        for source in [obj] + self.get_bases(obj):
+            for name in source.implements:
+                interface = self._resolve(name, source)
+                if interface is None:
+                    continue
+                for item in [interface] + self.get_bases(interface):
+                    interfaces.setdefault(_key(item), item)
+
+        self._interfaces[key] = list(interfaces.values())
+        return self._interfaces[key]
+
+    def get_inherited_children(
+        self, obj: "PlcDeclaration"
+    ) -> Dict[str, "PlcDeclaration"]:
+        """Get the methods and properties an object inherits from its bases.
+
+        Children that the object overrides are left out. Of children declared in
+        multiple bases, the one of the nearest base is used.
+        """
+        key = _key(obj)
+        if key not in self._children:
+            children = {}
+            for base in self.get_bases(obj):
+                for name, child in base.children.items():
+                    if name not in obj.children:
+                        children.setdefault(name, child)
+            self._children[key] = children
+        return self._children[key]
+
+    def get_inherited_members(self, obj: "PlcDeclaration") -> List:
+        """Get the members a struct inherits, in the order of the memory layout.
+
+        The members of the furthest base come first.
+        """
+        key = _key(obj)
+        if key not in self._members:
+            members = []
+            for base in reversed(self.get_bases(obj)):
+                if base.objtype in ("struct", "union"):
+                    members += base.members
+            self._members[key] = members
+        return self._members[key]
+
+    def _collect(self):
+        """Find the reverse relations of all objects."""
+        self._extended_by = {}
+        self._implemented_by = {}
+        for filepath in self._files():
+            for obj in self._load(filepath):
+                parent = self._get_parent(obj)
+                if parent is not None:
+                    self._extended_by.setdefault(_key(parent), []).append(_key(obj))
+                for name in obj.implements:
+                    interface = self._resolve(name, obj)
+                    if interface is not None:
+                        self._implemented_by.setdefault(_key(interface), []).append(
+                            _key(obj)
+                        )
+
+    def _get_objects(self, keys: List[_Key]) -> List["PlcDeclaration"]:
+        objects = []
+        for filepath, name in sorted(keys, key=lambda k: (k[1], k[0])):
+            objects += [obj for obj in self._load(filepath) if obj.name == name]
+        return objects
+
+    def get_extended_by(self, obj: "PlcDeclaration") -> List["PlcDeclaration"]:
+        """Get the objects that directly extend an object, sorted by name."""
+        if self._extended_by is None:
+            self._collect()
+        return self._get_objects(self._extended_by.get(_key(obj), []))
+
+    def get_implemented_by(self, obj: "PlcDeclaration") -> List["PlcDeclaration"]:
+        """Get the objects that directly implement an interface, sorted by name.
+
+        Objects that implement it through a base or another interface are not listed.
+        """
+        if self._implemented_by is None:
+            self._collect()
+        return self._get_objects(self._implemented_by.get(_key(obj), []))
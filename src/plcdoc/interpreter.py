@@ -1,12 +1,44 @@
 """Contains the PLC StructuredText interpreter."""
 
 import os
-from typing import List, Dict, Optional, Any
-from glob import glob
+import re
+import time
+import hashlib
+import itertools
+import threading
+import multiprocessing
+from typing import (
+    List,
+    Dict,
+    Optional,
+    Any,
+    Tuple,
+    Callable,
+    Iterable,
+    Iterator,
+    Union,
+)
+from collections import OrderedDict, deque
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    Future,
+    wait,
+    FIRST_COMPLETED,
+)
 import logging
 import xml.etree.ElementTree as ET
 from textx import metamodel_from_file, TextXSyntaxError
 
+from .cache import ParseCache
+from .discovery import find_source_files
+from .frozen import FrozenIndex
+from .inheritance import InheritanceGraph
+from .store import SymbolStore
+from .model import detach, fingerprint
+from .st_parser import StDeclarationParser, FastParserError
+from .stats import FileStats, ParseStats
+
 PACKAGE_DIR = os.path.dirname(__file__)
 logger = logging.getLogger(__name__)
 
@@ -15,16 +47,220 @@ TextXMetaClass = Any
 """Stub for the result of a TextX interpretation.
 
 The result are nested classes. But there is no useful inheritance to use for type
-checking.
+checking. After parsing the models are converted into
+:class:`~plcdoc.model.DetachedNode` objects with the same structure.
 """
 
 
+_meta_models: Dict[bool, TextXMetaClass] = {}
+"""Meta-models of the declaration grammar (by memoization), shared by all interpreters.
+"""
+
+
+def get_meta_model(memoization: bool = False) -> TextXMetaClass:
+    """Get the TextX meta-model of ``st_declaration.tx``.
+
+    Compiling the grammar takes a noticeable amount of time, so it is only done once
+    per process, and only when a declaration actually needs to be parsed by TextX.
+
+    :param memoization: If true, the parser remembers the result of each rule at each
+                        position, such that alternatives are not parsed again. This
+                        costs time of its own, so it depends on the code if it pays off
+    """
+    if memoization not in _meta_models:
+        _meta_models[memoization] = load_meta_model(memoization)
+    return _meta_models[memoization]
+
+
+def load_meta_model(memoization: bool = False) -> TextXMetaClass:
+    """Compile a new (not shared) TextX meta-model of ``st_declaration.tx``."""
+    return metamodel_from_file(
+        os.path.join(PACKAGE_DIR, "st_declaration.tx"), memoization=memoization
+    )
+
+
+class _XmlNode:
+    """Object node from a PLC file (e.g. ``POU`` or ``Method``), as far as needed."""
+
+    __slots__ = ("tag", "name", "declaration", "children")
+
+    def __init__(self, tag: str, name: str):
+        self.tag = tag
+        self.name = name
+        self.declaration: Optional[str] = None
+        self.children: List["_XmlNode"] = []
+
+
+class _FolderTree:
+    """Trie of relative folders, each with a list of items (objects or files).
+
+    Finding a folder takes time proportional to its depth, and listing everything
+    below it takes time proportional to the result. Items keep the order in which they
+    were added and subfolders the order in which they were first used.
+    """
+
+    __slots__ = ("items", "children")
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.children: Dict[str, "_FolderTree"] = {}
+
+    @staticmethod
+    def split(folder: str) -> List[str]:
+        """Get the parts of a relative folder path."""
+        return [part for part in re.split(r"[\\/]", folder) if part and part != "."]
+
+    def add(self, folder: str, item: Any):
+        node = self
+        for part in self.split(folder):
+            if part not in node.children:
+                node.children[part] = _FolderTree()
+            node = node.children[part]
+        node.items.append(item)
+
+    def remove(self, folder: str, item: Any):
+        """Remove an item again, dropping any folders that became empty."""
+        path = [(None, self)]
+        for part in self.split(folder):
+            node = path[-1][1].children.get(part)
+            if node is None:
+                return
+            path.append((part, node))
+
+        node = path[-1][1]
+        if item in node.items:
+            node.items.remove(item)
+
+        for (_, parent), (part, node) in reversed(list(zip(path, path[1:]))):
+            if node.items or node.children:
+                break
+            del parent.children[part]
+
+    def find(self, folder: str) -> Optional["_FolderTree"]:
+        node = self
+        for part in self.split(folder):
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def walk(self) -> List[Any]:
+        """Get all items of this folder and its subfolders, depth first."""
+        items = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            items += node.items
+            stack += reversed(node.children.values())
+        return items
+
+
+class _StopReading(Exception):
+    """Raised inside :class:`_DeclarationReader` to stop the XML parser early."""
+
+
+class _DeclarationReader:
+    """XML parser target that only collects the declarations from a PLC file.
+
+    The XML parser calls this target for every tag and every piece of text. Only the
+    text of the ``Declaration`` nodes of the object and its direct children (e.g.
+    methods and properties) is kept. Everything else, like the ``Implementation``
+    bodies, is dropped right away instead of being built into an XML tree.
+
+    Reading stops directly after the root tag for files that are no PLC object, and
+    after the object tag for objects that cannot be processed (e.g. a task).
+    """
+
+    CHUNK_SIZE = 16 * 1024
+
+    def __init__(self, xml_types: List[str], header_only: bool = False):
+        """
+
+        :param xml_types: Object tags to process (like "POU")
+        :param header_only: If true, stop after the object tag, to only get its name
+        """
+        self.is_plc_object = False
+        self.objects: List[_XmlNode] = []
+        self.skipped: List[str] = []  # Tags of unprocessed objects
+
+        self._xml_types = xml_types
+        self._header_only = header_only
+        self._stack: List[str] = []
+        self._text: Optional[List[str]] = None  # Only set inside a declaration
+
+    def read(self, content: bytes):
+        """Process the full content of a file."""
+        parser = ET.XMLParser(target=self)
+        try:
+            parser.feed(content)
+            parser.close()
+        except _StopReading:
+            pass
+
+    def read_stream(self, stream):
+        """Process a file in chunks, such that it is only read as far as needed."""
+        parser = ET.XMLParser(target=self)
+        try:
+            while True:
+                chunk = stream.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+            parser.close()
+        except _StopReading:
+            pass
+
+    def start(self, tag: str, attrib: Dict[str, str]):
+        self._stack.append(tag)
+        depth = len(self._stack)
+
+        if depth == 1:
+            if tag != "TcPlcObject":
+                raise _StopReading
+            self.is_plc_object = True
+        elif depth == 2:
+            if tag not in self._xml_types:
+                self.skipped.append(tag)
+                raise _StopReading
+            self.objects.append(_XmlNode(tag, attrib.get("Name", "<Unknown>")))
+            if self._header_only:
+                raise _StopReading
+        elif depth == 3:
+            if tag == "Declaration":
+                self._text = []
+            elif tag != "Implementation":
+                child = _XmlNode(tag, attrib.get("Name", "<Unknown>"))
+                self.objects[-1].children.append(child)
+        elif depth == 4 and tag == "Declaration":
+            if self._stack[2] not in ("Declaration", "Implementation"):
+                self._text = []
+
+    def end(self, tag: str):
+        if self._text is not None and tag == "Declaration":
+            node = self.objects[-1]
+            if len(self._stack) == 4:
+                node = node.children[-1]
+            node.declaration = "".join(self._text)
+            self._text = None
+
+        self._stack.pop()
+
+    def data(self, data: str):
+        if self._text is not None:
+            self._text.append(data)
+
+    def close(self):
+        pass
+
+
 class PlcInterpreter:
     """Class to perform the PLC file parsing.
 
-    It uses TextX with a declaration to parse the files.
+    It uses TextX with a declaration to parse the files. Optionally, the hand-written
+    :class:`~plcdoc.st_parser.StDeclarationParser` is tried first.
 
-    The parsed objects are stored as their raw TextX format, as meta-models
+    The parsed objects are stored as detached copies of their TextX format, such that
+    they can be pickled (e.g. into a :class:`~plcdoc.cache.ParseCache`).
     """
 
     # Some object types are documented the same
@@ -36,108 +272,787 @@ class PlcInterpreter:
     # Document types (as XML nodes) that can be processed
     XML_TYPES = ["POU", "DUT", "GVL", "Itf"]
 
-    def __init__(self):
-        self._meta_model = metamodel_from_file(
-            os.path.join(PACKAGE_DIR, "st_declaration.tx")
-        )
+    # Files that refer to PLC projects, instead of being one
+    SOLUTION_EXTENSIONS = (".sln", ".tsproj")
+
+    # Available parsers for declarations
+    BACKENDS = ("textx", "fast")
+
+    def __init__(
+        self,
+        cache: Optional[ParseCache] = None,
+        workers: int = 1,
+        lazy: bool = False,
+        lazy_cache_size: int = 16 * 1024 * 1024,
+        backend: str = "textx",
+        stats: Optional[ParseStats] = None,
+        memoization: bool = False,
+        io_workers: int = 1,
+        store: Optional[SymbolStore] = None,
+    ):
+        """
+
+        :param cache: Persistent cache to skip the parsing of unchanged files
+        :param workers: Number of processes to parse files with (1 to not use any)
+        :param lazy: If true, source files are only indexed at first and parsed when
+                     one of their objects is requested
+        :param lazy_cache_size: Total size of the parsed files to keep in lazy mode,
+                                before the least recently used are dropped again
+                                [bytes]. The memory used by the objects of a file is
+                                estimated by the size of the file, or of its stored
+                                objects when they are loaded from an index or store.
+        :param backend: Parser for declarations, either "textx" or "fast" (the
+                        hand-written parser, using TextX for anything it cannot handle)
+        :param stats: If given, measurements of processing each file are added to it.
+                      When it profiles the grammar rules too, files are parsed in this
+                      process only.
+        :param memoization: If true, use TextX with memoization (see
+                            :func:`get_meta_model`)
+        :param io_workers: Number of threads to read files ahead of the parsing with
+                           (1 to read each file only when it is parsed)
+        :param store: Database to parse files into, instead of keeping all objects in
+                      memory. Objects are then loaded from it when used, like in lazy
+                      mode (see :meth:`_fill_store`).
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(
+                f"Unknown parser backend `{backend}`, use one of {self.BACKENDS}"
+            )
 
         # Library of processed models, keyed by the objtype and then by the name
         self._models: Dict[str, Dict[str, "PlcDeclaration"]] = {}
 
-        # List of relative folders with model key,name
-        self._folders: Dict[str, List["PlcDeclaration"]] = {}
+        # Relative folders with their (top-level) models
+        self._folders = _FolderTree()
 
         self._active_file = ""  # For better logging of errors
 
+        # Messages logged while processing the active file, kept with cache entries
+        self._messages: List[Tuple[int, str]] = []
+
+        self._cache = cache
+
+        self._workers = workers
+        self._io_workers = io_workers
+
+        self._backend = backend
+        self._fast_parser = StDeclarationParser() if backend == "fast" else None
+
+        # Objects added to the library, by their source file in order of use
+        self._file_objects: "OrderedDict[str, List[PlcDeclaration]]" = OrderedDict()
+
+        # Parsed declarations of each file, by the hash of their text, to only parse
+        # the changed declarations of a changed file again
+        self._file_blocks: Dict[str, Dict[str, TextXMetaClass]] = {}
+        self._previous_blocks: Dict[str, TextXMetaClass] = {}  # Of the active file
+        self._blocks: Dict[str, TextXMetaClass] = {}
+
+        self._lazy = lazy
+        self._lazy_cache_size = lazy_cache_size
+        self._file_sizes: Dict[str, int] = {}  # Estimated sizes in lazy mode [bytes]
+        self._lazy_size = 0  # Total of those
+
+        # Index for lazy mode: source file by object name and source files by folder
+        self._file_index: Dict[str, str] = {}
+        self._folder_files = _FolderTree()
+
+        # Shared index to load objects from instead (also in lazy mode)
+        self._index: Optional[Union[FrozenIndex, SymbolStore]] = None
+
         self._root_folder: Optional[str] = None  # For folder references
 
+        # Projects of a solution, each with a namespace and folder root: name by the
+        # root folder
+        self._projects: Dict[str, str] = {}
+
+        # Relations by EXTENDS and IMPLEMENTS, made when first needed
+        self._inheritance: Optional[InheritanceGraph] = None
+
+        self._stats = stats
+        self._file_stats: Optional[FileStats] = None  # Of the active file
+
+        self._memoization = memoization
+        self._meta_model: Optional[TextXMetaClass] = None  # Own one, for profiling
+
+        self._store = store
+        if store is not None:
+            self._lazy = True
+            self._index = store
+            self._root_folder = store.root_folder
+            self._projects = dict(store.projects)
+
+    @property
+    def stats(self) -> Optional[ParseStats]:
+        """Measurements of processing the files (`None` if not collected)."""
+        return self._stats
+
     def parse_plc_project(self, path: str) -> bool:
-        """Parse a PLC project.
+        """Parse a PLC project, or all PLC projects of a solution.
 
-        The ``*.plcproj`` file is searched for references to source files.
+        The ``*.plcproj`` file is searched for references to source files (see
+        :meth:`read_plc_project`).
 
         :returns: True if successful
         """
-        tree = ET.parse(path)
-        root = tree.getroot()
-
-        # The items in the project XML are namespaced, so addressing each item by name
-        # does not work
-        if not root.tag.endswith("Project"):
+        source_files = self.read_plc_project(path)
+        if source_files is None:
             return False
 
+        return self.parse_source_files(source_files)
+
+    def read_plc_project(self, path: str) -> Optional[List[str]]:
+        """Get the source files of a PLC project, without parsing them yet.
+
+        The folder of the project becomes the root for folder references.
+
+        A solution (``*.sln``) or TwinCAT project (``*.tsproj``) is searched for PLC
+        projects instead, see :meth:`read_plc_solution`.
+
+        :returns: `None` if the file is no PLC project
+        """
+        if os.path.splitext(path)[1].lower() in self.SOLUTION_EXTENSIONS:
+            return self.read_plc_solution(path)
+
+        source_files = _read_plc_project(path)
+        if source_files is None:
+            return None
+
         # Find project root
         self._root_folder = os.path.dirname(os.path.normpath(path))
 
-        source_files = []
+        return source_files
 
-        for item_group in root:
-            if not item_group.tag.endswith("ItemGroup"):
-                continue
+    def read_plc_solution(self, path: str) -> Optional[List[str]]:
+        """Get the source files of all PLC projects in a solution.
 
-            for item in item_group:
-                if item.tag.endswith("Compile"):
-                    source_files.append(item.attrib["Include"])
+        Each PLC project gets its own namespace and folder root, named like the
+        project: object ``FB_Block`` of project ``MyPLC`` can also be found as
+        ``MyPLC.FB_Block``, its folder ``POUs`` becomes ``MyPLC/POUs``. The project
+        files are read ahead like source files, after which the source files of all
+        projects are parsed together (and in parallel with ``workers``), sharing the
+        cache.
 
-        # The paths in the PLC Project are relative to the project file itself:
-        dir_path = os.path.dirname(path)
-        source_files = [
-            os.path.normpath(os.path.join(dir_path, item)) for item in source_files
-        ]
+        :param path: ``*.sln`` or ``*.tsproj`` file
+        :returns: `None` if no PLC project could be found
+        """
+        projects = _find_plc_projects(path)
+        if not projects:
+            return None
 
-        if os.path.sep == "/":
-            # The project will likely contain Windows paths, which can cause issues
-            # on Linux
-            source_files = [path.replace("\\", "/") for path in source_files]
+        def read(project_file: str) -> Optional[List[str]]:
+            try:
+                return _read_plc_project(project_file)
+            except (OSError, ET.ParseError):
+                return None
 
-        return self.parse_source_files(source_files)
+        source_files = []
+        results = self._prefetch(read, [file for _, file in projects])
+        for (name, _), (project_file, files) in zip(projects, results):
+            if files is None:
+                logger.warning(f"Could not read PLC project file {project_file}")
+                continue
+            root = os.path.dirname(os.path.normpath(project_file))
+            self._projects[root] = name
+            source_files += files
+
+        return source_files if self._projects else None
 
-    def parse_source_files(self, paths: List[str]) -> bool:
+    def parse_source_files(
+        self, paths: List[str], exclude: Optional[List[str]] = None
+    ) -> bool:
         """Parse a set of source files.
 
-        `glob` is used, so wildcards are allowed.
+        Wildcards are allowed. Each file is parsed once, also when it is matched by
+        multiple paths (see :meth:`resolve_source_files`).
 
         :param paths: Source paths to process
+        :param exclude: Patterns of files and folders to skip
         """
-        result = True
+        source_files = self.resolve_source_files(paths, exclude)
+        self._inheritance = None
+
+        if self._store is not None:
+            return self._fill_store(source_files)
+
+        if self._lazy:
+            for source_file, reader in self._prefetch(_read_header, source_files):
+                self._index_file(source_file, reader)
+            return True
+
+        profiling = self._stats is not None and self._stats.rules is not None
+        if self._workers > 1 and len(source_files) > 1 and not profiling:
+            result = self._parse_files_parallel(source_files)
+        elif self._io_workers > 1:
+            result = True
+            for source_file, (content, read_time) in self._prefetch(
+                _read_file, source_files
+            ):
+                if not self._parse_content(source_file, content, read_time):
+                    result = False
+        else:
+            result = True
+            for source_file in source_files:
+                if not self._parse_file(source_file):
+                    result = False
+
+        if self._cache is not None:
+            self._cache.prune()
+
+        return result
 
-        for path in paths:
-            source_files = glob(path)
+    @staticmethod
+    def resolve_source_files(
+        paths: List[str], exclude: Optional[List[str]] = None
+    ) -> List[str]:
+        """Get the set of source files to parse from a list of paths.
+
+        Wildcards are expanded in a single walk through the folders (see
+        :func:`~plcdoc.discovery.find_source_files`). Files are compared by their real
+        path (case-insensitive on Windows), such that a file matched by multiple paths
+        is only listed once, as it was found first.
+
+        :param exclude: Patterns of files and folders to skip, by default the TwinCAT
+                        build output and libraries
+        """
+        source_files = []
+        seen = set()
 
-            if not source_files:
+        for path, matches in zip(paths, find_source_files(paths, exclude)):
+            if not matches:
                 logging.warning(f"Could not find file(s) in: {path}")
+
+            for match in matches:
+                key = os.path.normcase(os.path.realpath(match))
+                if key not in seen:
+                    seen.add(key)
+                    source_files.append(match)
+
+        return source_files
+
+    def _prefetch(
+        self, function: Callable[[str], Any], files: Iterable[str]
+    ) -> Iterator[Tuple[str, Any]]:
+        """Call ``function`` for each file in a pool of threads, ahead of the consumer.
+
+        This is for reading files, such that the latency of e.g. a network share
+        overlaps with processing the files that were read already. At most two files
+        per thread are read ahead.
+
+        :return: Files with their result, in the original order
+        """
+        files = iter(files)
+        if self._io_workers <= 1:
+            for filepath in files:
+                yield filepath, function(filepath)
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=self._io_workers, thread_name_prefix="plcdoc-io"
+        ) as executor:
+            pending: "deque[Tuple[str, Future]]" = deque()
+
+            def submit(count: int):
+                for filepath in itertools.islice(files, count):
+                    pending.append((filepath, executor.submit(function, filepath)))
+
+            submit(2 * self._io_workers)
+            while pending:
+                filepath, future = pending.popleft()
+                submit(1)
+                yield filepath, future.result()
+
+    def _fill_store(self, files: List[str]) -> bool:
+        """Parse the changed files into the symbol store, one file at a time.
+
+        Files with the same size and modification time as stored are skipped, without
+        reading them. So are files with a new modification time but the same content.
+        Files with errors or warnings are parsed again every time, to report them.
+        Objects are not kept in memory after storing them, so the memory use does not
+        depend on the size of the project. Files that are no longer listed are removed
+        from the store.
+
+        :return: True if all files were processed successfully
+        """
+        store = self._store
+        store.set_info(self._root_folder, self._projects)
+
+        # Objects loaded from the store before may be outdated now
+        for objects in self._file_objects.values():
+            for obj in objects:
+                self._remove_model(obj)
+        self._file_objects.clear()
+        self._file_sizes.clear()
+        self._lazy_size = 0
+
+        stored = store.get_files()
+        changed: Dict[str, Tuple] = {}
+        for position, filepath in enumerate(files):
+            stat = os.stat(filepath)
+            folder = self._get_folder(filepath)
+            if folder is not None:
+                folder = "/".join(_FolderTree.split(folder))
+            state = (stat.st_size, stat.st_mtime_ns)
+            location = (folder, self._get_namespace(filepath))
+            previous = stored.get(filepath)
+            if previous is None or previous[3:] != location:
+                changed[filepath] = (position, state, location, None)
+            elif previous[:2] != state or not previous[2]:
+                changed[filepath] = (position, state, location, previous[2])
             else:
-                for source_file in source_files:
-                    if not self._parse_file(source_file):
-                        result = False
+                store.update_files([(filepath, position, *state)])
+
+        keys: Dict[str, Tuple[str, float]] = {}
+
+        def read_changed() -> Iterator[Tuple[str, bytes]]:
+            for filepath, (content, read_time) in self._prefetch(_read_file, changed):
+                position, state, _, previous_key = changed[filepath]
+                key = store.make_key(content, os.path.basename(filepath), self._backend)
+                if key == previous_key:
+                    store.update_files([(filepath, position, *state)])  # Only touched
+                    continue
+                keys[filepath] = (key, read_time)
+                yield filepath, content
+
+        result = True
+        for filepath, entry, file_stats in self._process_contents(read_changed()):
+            success, objects, _, messages = entry
+            for level, message in messages:
+                logger.log(level, message)
+            key, read_time = keys.pop(filepath)
+            self._add_file_stats(file_stats, filepath, 0, read_time)
+            if not success:
+                store.discard(filepath)
+                result = False
+                continue
+            if any(level >= logging.WARNING for level, _ in messages):
+                key = ""  # To parse it again, and report the problems in every build
+
+            for obj in objects:
+                obj.set_file(filepath)
+            position, state, location, _ = changed[filepath]
+            store.put(filepath, position, *state, key, *location, objects)
+
+        store.retain(files)
+        store.commit()
+
+        for name, first, second in store.find_duplicates():
+            self._warn_duplicate(name, first, second)
 
         return result
 
+    def _process_contents(
+        self, items: Iterator[Tuple[str, bytes]]
+    ) -> Iterator[Tuple[str, Tuple, Optional[FileStats]]]:
+        """Process the contents of files one by one, in the given order.
+
+        With a pool of processes, at most two files per process are in progress.
+
+        :return: Files with their result entry and measurements
+        """
+        profiling = self._stats is not None and self._stats.rules is not None
+        if self._workers <= 1 or profiling:
+            for filepath, content in items:
+                entry, _, file_stats = self._process_file(content, filepath)
+                yield filepath, entry, file_stats
+            return
+
+        executor: Optional[ProcessPoolExecutor] = None
+        pending: "deque[Tuple[str, Future]]" = deque()
+        try:
+            for filepath, content in items:
+                if executor is None:
+                    executor = self._start_worker_pool(self._workers)
+                future = executor.submit(_process_file_in_worker, content, filepath, {})
+                pending.append((filepath, future))
+                while len(pending) > 2 * self._workers:
+                    filepath, future = pending.popleft()
+                    entry, _, file_stats = future.result()
+                    yield filepath, entry, file_stats
+            while pending:
+                filepath, future = pending.popleft()
+                entry, _, file_stats = future.result()
+                yield filepath, entry, file_stats
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
     def _parse_file(self, filepath) -> bool:
         """Process a single PLC file.
 
+        When a cache is used, the result is loaded from it if the file is unchanged.
+
         :return: True if a file was processed successfully
         """
+        content, read_time = _read_file(filepath)
+        return self._parse_content(filepath, content, read_time)
+
+    def _parse_content(self, filepath: str, content: bytes, read_time: float) -> bool:
+        """Process the content of a PLC file that was read already."""
+        key, entry = self._get_cache_entry(content, filepath)
+        file_stats = None
+        if entry is None:
+            entry, blocks, file_stats = self._process_file(
+                content, filepath, self._get_file_blocks(filepath)
+            )
+            self._set_file_blocks(filepath, blocks)
+            if key is not None:
+                self._cache.put(key, entry)
+
+        self._add_file_stats(file_stats, filepath, len(content), read_time)
+        return self._add_file_result(entry, filepath)
+
+    def _parse_files_parallel(self, files: List[str]) -> bool:
+        """Process multiple PLC files in a pool of processes.
+
+        The largest files are read and started first, to keep the pool busy until the
+        end. Each file is started as soon as it is read, such that reading and parsing
+        overlap, and at most two files per process are in progress. The content of a
+        file is not kept once it is started, so the memory use does not grow with the
+        size of the project. The results are added in the original order of ``files``
+        regardless, so the outcome does not depend on the scheduling.
+
+        :return: True if all files were processed successfully
+        """
+        sizes: Dict[str, int] = {}
+        for filepath in files:
+            try:
+                sizes[filepath] = os.stat(filepath).st_size
+            except OSError:
+                sizes[filepath] = 0  # Reported when it is read
+        order = sorted(files, key=lambda filepath: sizes[filepath], reverse=True)
+
+        keys: Dict[str, Optional[str]] = {}
+        entries: Dict[str, Tuple] = {}
+        read_times: Dict[str, float] = {}
+        file_stats: Dict[str, FileStats] = {}
+        futures: Dict[Future, str] = {}
+        executor: Optional[ProcessPoolExecutor] = None
+
+        def collect(futures_done: Iterable[Future]):
+            for future in futures_done:
+                filepath = futures.pop(future)
+                entries[filepath], blocks, file_stats[filepath] = future.result()
+                self._set_file_blocks(filepath, blocks)
+                if keys[filepath] is not None:
+                    self._cache.put(keys[filepath], entries[filepath])
+
+        try:
+            for filepath, (content, read_time) in self._prefetch(_read_file, order):
+                sizes[filepath] = len(content)
+                read_times[filepath] = read_time
+                keys[filepath], entry = self._get_cache_entry(content, filepath)
+                if entry is not None:
+                    entries[filepath] = entry
+                    continue
+
+                if executor is None:
+                    executor = self._start_worker_pool(len(files))
+                future = executor.submit(
+                    _process_file_in_worker,
+                    content,
+                    filepath,
+                    self._get_file_blocks(filepath),
+                )
+                futures[future] = filepath
+                del content
+                if len(futures) > 2 * self._workers:
+                    collect(wait(futures, return_when=FIRST_COMPLETED).done)
+
+            collect(list(futures))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        result = True
+        for filepath in files:
+            self._add_file_stats(
+                file_stats.get(filepath),
+                filepath,
+                sizes[filepath],
+                read_times[filepath],
+            )
+            if not self._add_file_result(entries[filepath], filepath):
+                result = False
+
+        return result
+
+    def _start_worker_pool(self, count: int) -> ProcessPoolExecutor:
+        """Start the pool of processes to parse (at most) ``count`` files with."""
+        # Forking while other threads run (e.g. a background analysis next to Sphinx)
+        # could copy locks held by those threads into the workers
+        mp_context = None
+        if threading.current_thread() is not threading.main_thread():
+            mp_context = multiprocessing.get_context("spawn")
+        return ProcessPoolExecutor(
+            max_workers=min(self._workers, count),
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(self._backend, self._stats is not None, self._memoization),
+        )
+
+    def _add_file_stats(
+        self,
+        file_stats: Optional[FileStats],
+        filepath: str,
+        size: int,
+        read_time: float,
+    ):
+        """Add the measurements of a file, which are empty if it came from the cache."""
+        if self._stats is None:
+            return
+        if file_stats is None:
+            file_stats = FileStats(filepath, size)
+            file_stats.cached = True
+        file_stats.read_time = read_time
+        self._stats.add(file_stats)
+
+    def _get_cache_entry(
+        self, content: bytes, filepath: str
+    ) -> Tuple[Optional[str], Optional[Tuple]]:
+        """Look for the result of a file in the cache.
+
+        :return: Cache key (`None` without cache) and the entry (`None` if missing)
+        """
+        if self._cache is None:
+            return None, None
 
-        tree = ET.parse(filepath)
-        root = tree.getroot()
+        key = self._cache.make_key(content, os.path.basename(filepath), self._backend)
+        return key, self._cache.get(key)
 
+    def _get_file_blocks(self, filepath: str) -> Dict[str, TextXMetaClass]:
+        """Get the parsed declarations of the previous version of a file.
+
+        :return: Models by the hash of their declaration (empty if unknown)
+        """
+        if filepath in self._file_blocks:
+            return self._file_blocks[filepath]
+
+        if self._cache is not None:
+            blocks = self._cache.get(self._get_blocks_key(filepath), count=False)
+            if blocks is not None:
+                return blocks
+
+        return {}
+
+    def _set_file_blocks(self, filepath: str, blocks: Dict[str, TextXMetaClass]):
+        """Remember the parsed declarations of the latest version of a file."""
+        self._file_blocks[filepath] = blocks
+        if self._cache is not None:
+            self._cache.put(self._get_blocks_key(filepath), blocks)
+
+    def _get_blocks_key(self, filepath: str) -> str:
+        """Get the cache key of the declarations of a file (by its path)."""
+        return self._cache.make_key(
+            os.path.abspath(filepath).encode(), "<blocks>", self._backend
+        )
+
+    def _process_file(
+        self,
+        content: bytes,
+        filepath: str,
+        previous_blocks: Optional[Dict[str, TextXMetaClass]] = None,
+    ) -> Tuple[Tuple, Dict[str, TextXMetaClass], Optional[FileStats]]:
+        """Parse the content of a file into a result entry.
+
+        Nothing is added to the library yet and nothing is logged, such that this can
+        also run in a worker process or be stored in the cache.
+
+        :param previous_blocks: Parsed declarations of the previous version of the
+                                file, these are reused when the text is unchanged
+        :return: Tuple of (success, objects, file path, logged messages), the parsed
+                 declarations of this version and the measurements (`None` if no
+                 statistics are collected)
+        """
         self._active_file = filepath
+        self._messages = []
+        self._previous_blocks = previous_blocks or {}
+        self._blocks = {}
+        if self._stats is not None:
+            self._file_stats = FileStats(filepath, len(content))
 
-        if root.tag != "TcPlcObject":
-            return False
+        result, objects = self._extract_file(content, filepath)
 
-        # Files really only contain a single object per file anyway
-        for item in root:
-            plc_item = item.tag  # I.e. "POU"
+        file_stats, self._file_stats = self._file_stats, None
+        self._previous_blocks = {}
+        return (result, objects, filepath, self._messages), self._blocks, file_stats
 
-            if plc_item not in self.XML_TYPES:
-                logger.warning(f"Skipping file with XML tag {plc_item}")
-                continue
+    def _add_file_result(self, entry: Tuple, filepath: str) -> bool:
+        """Add the result of a processed (or cached) file to the library.
 
-            # Name is repeated inside the declaration, use it from there instead
-            # name = item.attrib["Name"]
+        Messages of the original parsing are repeated, so problems are not hidden.
+        """
+        result, objects, origin_path, messages = entry
+
+        for level, message in messages:
+            logger.log(level, message.replace(origin_path, filepath))
+
+        # Objects of an earlier version of the file are replaced
+        for obj in self._file_objects.pop(filepath, []):
+            self._remove_model(obj)
+
+        for obj in objects:
+            obj.set_file(filepath)
+            self._add_model(obj)
 
+        self._file_objects[filepath] = objects
+
+        return result
+
+    def _index_file(self, filepath: str, reader: "_DeclarationReader"):
+        """Register a source file for lazy mode, without parsing it.
+
+        :param reader: Start of the XML of the file (see :func:`_read_header`), to find
+                       the name of the object it holds
+        """
+        if not reader.is_plc_object:
+            return
+
+        namespace = self._get_namespace(filepath)
+
+        for item in reader.objects:
+            other = self._file_index.get(item.name)
+            if (
+                other is None
+                or other == filepath
+                or self._replaces_duplicate(item.name, other, filepath)
+            ):
+                self._file_index[item.name] = filepath
+            if namespace is not None:
+                self._file_index[namespace + "." + item.name] = filepath
+
+        # GVLs are named after their file, which is normally identical
+        name, _ = os.path.splitext(os.path.basename(filepath))
+        self._file_index.setdefault(name, filepath)
+        if namespace is not None:
+            self._file_index.setdefault(namespace + "." + name, filepath)
+
+        folder = self._get_folder(filepath)
+        if folder is not None:
+            self._folder_files.add(folder, filepath)
+
+    def freeze(self, path: str):
+        """Write all parsed objects to a shared index file (see :class:`FrozenIndex`).
+
+        Use :meth:`from_index` to get an interpreter for it.
+        """
+        if self._lazy:
+            raise ValueError("An interpreter in lazy mode cannot be frozen")
+
+        folder_files = _FolderTree()
+        for filepath, objects in self._file_objects.items():
+            folder = self._get_folder(filepath)
+            if objects and folder is not None:
+                folder_files.add(folder, filepath)
+
+        namespaces = {}
+        for filepath in self._file_objects:
+            namespace = self._get_namespace(filepath)
+            if namespace is not None:
+                namespaces[filepath] = namespace
+
+        FrozenIndex.write(
+            path,
+            self._file_objects,
+            folder_files,
+            self._root_folder,
+            self._projects,
+            namespaces,
+        )
+
+    @classmethod
+    def from_index(
+        cls,
+        path: str,
+        lazy_cache_size: int = 16 * 1024 * 1024,
+        stats: Optional[ParseStats] = None,
+    ) -> "PlcInterpreter":
+        """Get an interpreter for an index file written by :meth:`freeze`.
+
+        It works like lazy mode, except that the objects of a file are loaded from
+        the index instead of parsed.
+
+        :param stats: Statistics of the original interpreter, to keep reporting them
+        """
+        interpreter = cls(lazy=True, lazy_cache_size=lazy_cache_size, stats=stats)
+        interpreter._index = FrozenIndex(path)
+        interpreter._root_folder = interpreter._index.root_folder
+        interpreter._projects = interpreter._index.projects
+        return interpreter
+
+    def _find_file(self, name: str) -> Optional[str]:
+        """Get the source file of a top-level object (lazy mode)."""
+        if self._index is not None:
+            return self._index.find_file(name)
+        return self._file_index.get(name)
+
+    def _find_folder_files(self, folder: str, recursive: bool) -> List[str]:
+        """Get the source files in a folder (lazy mode)."""
+        if self._index is not None:
+            return self._index.find_folder_files(_FolderTree.split(folder), recursive)
+        return self._find_in_folder(self._folder_files, folder, recursive)
+
+    def _load_file(self, filepath: str) -> List["PlcDeclaration"]:
+        """Get the objects of a source file, parsing it first if needed (lazy mode).
+
+        The least recently used files are removed from the library again, once the
+        parsed files are larger than ``lazy_cache_size`` in total. The file that was
+        used last is always kept.
+        """
+        if filepath in self._file_objects:
+            self._file_objects.move_to_end(filepath)
+        else:
+            if self._index is not None:
+                entry = (True, self._index.load(filepath), filepath, [])
+                size = self._index.get_size(filepath)
+                self._add_file_result(entry, filepath)
+            else:
+                content, read_time = _read_file(filepath)
+                size = len(content)
+                self._parse_content(filepath, content, read_time)
+            self._lazy_size += size - self._file_sizes.get(filepath, 0)
+            self._file_sizes[filepath] = size
+            while (
+                self._lazy_size > self._lazy_cache_size and len(self._file_objects) > 1
+            ):
+                dropped, objects = self._file_objects.popitem(last=False)
+                self._lazy_size -= self._file_sizes.pop(dropped, 0)
+                self._file_blocks.pop(dropped, None)
+                for obj in objects:
+                    self._remove_model(obj)
+
+        return self._file_objects[filepath]
+
+    def _log(self, level: int, message: str):
+        """Register a message about the active file, to be logged afterwards."""
+        self._messages.append((level, message))
+
+    def _extract_file(
+        self, content: bytes, filepath: str
+    ) -> Tuple[bool, List["PlcDeclaration"]]:
+        """Extract the declarations from the raw content of a PLC file.
+
+        :return: Success and the list of objects found
+        """
+        start = time.perf_counter()
+        reader = _DeclarationReader(self.XML_TYPES)
+        reader.read(content)
+
+        file_stats = self._file_stats
+        if file_stats is not None:
+            file_stats.xml_time = time.perf_counter() - start
+            file_stats.skipped = len(reader.skipped) + (not reader.is_plc_object)
+
+        if not reader.is_plc_object:
+            return False, []
+
+        for plc_item in reader.skipped:
+            self._log(logging.WARNING, f"Skipping file with XML tag {plc_item}")
+
+        objects = []
+
+        # Files really only contain a single object per file anyway
+        for item in reader.objects:
+            # Name is repeated inside the declaration, use it from there instead
             object_model = self._parse_declaration(item)
             if object_model is None:
                 # Log entry is made inside _parse_declaration() already
@@ -147,37 +1062,76 @@ class PlcInterpreter:
 
             # Methods are inside their own subtree with a `Declaration` - simply append
             # them to the object
-            for node in item:
-                if node.tag in ["Declaration", "Implementation"]:
-                    continue
+            for node in item.children:
                 method_model = self._parse_declaration(node)
                 if method_model is None:
                     continue
                 method = PlcDeclaration(method_model, filepath)
                 obj.add_child(method)
 
-            self._add_model(obj)
+            objects.append(obj)
+
+        return True, objects
 
-        return True
+    def _parse_declaration(self, item: "_XmlNode") -> Optional["TextXMetaClass"]:
+        """Get the model of a declaration.
 
-    def _parse_declaration(self, item) -> Optional["TextXMetaClass"]:
-        declaration_node = item.find("Declaration")
-        if declaration_node is None:
+        The model of the previous version of the file is reused if the text of the
+        declaration is unchanged.
+        """
+        if item.declaration is None or not item.declaration.strip():
             return None
+
+        digest = hashlib.sha1(item.declaration.encode()).hexdigest()
+        model = self._previous_blocks.get(digest)
+        file_stats = self._file_stats
+        if model is not None:
+            if file_stats is not None:
+                file_stats.reused += 1
+        elif file_stats is None:
+            model = self._parse_declaration_text(item)
+        else:
+            start = time.perf_counter()
+            model = self._parse_declaration_text(item)
+            file_stats.add_declaration(
+                item.name, time.perf_counter() - start, len(item.declaration)
+            )
+        if model is not None:
+            self._blocks[digest] = model
+
+        return model
+
+    def _parse_declaration_text(self, item: "_XmlNode") -> Optional["TextXMetaClass"]:
+        if self._fast_parser is not None:
+            try:
+                return self._fast_parser.parse(item.declaration)
+            except FastParserError:
+                # Let TextX try, which also gives a proper error message
+                if self._file_stats is not None:
+                    self._file_stats.fallbacks += 1
         try:
-            meta_model = self._meta_model.model_from_str(declaration_node.text)
-            return meta_model
+            meta_model = self._get_meta_model().model_from_str(item.declaration)
+            return detach(meta_model)
         except TextXSyntaxError as err:
-            name = item.attrib.get("Name", "<Unknown>")
-            logger.error(
-                "Error parsing node `%s` in file `%s`\n(%s)",
-                name,
-                self._active_file,
-                str(err),
+            if self._file_stats is not None:
+                self._file_stats.failures += 1
+            self._log(
+                logging.ERROR,
+                f"Error parsing node `{item.name}` in file `{self._active_file}`\n"
+                f"({err})",
             )
 
         return None
 
+    def _get_meta_model(self) -> TextXMetaClass:
+        """Get the shared meta-model, or an own one to profile the grammar rules."""
+        if self._stats is None or self._stats.rules is None:
+            return get_meta_model(self._memoization)
+        if self._meta_model is None:
+            self._meta_model = load_meta_model(self._memoization)
+            self._stats.rules.instrument(self._meta_model)
+        return self._meta_model
+
     def reduce_type(self, key: str):
         """If key is one of multiple, return the main type.
 
@@ -190,7 +1144,10 @@ class PlcInterpreter:
         return key
 
     def _add_model(
-        self, obj: "PlcDeclaration", parent: Optional["PlcDeclaration"] = None
+        self,
+        obj: "PlcDeclaration",
+        parent: Optional["PlcDeclaration"] = None,
+        namespace: Optional[str] = None,
     ):
         """Get processed model and add it to our library.
 
@@ -199,27 +1156,146 @@ class PlcInterpreter:
 
         :param obj: Processed model
         :param parent: Object that this object belongs to
+        :param namespace: Project of the object in a solution, under which it is added
+                          as well
         """
         key = self.reduce_type(obj.objtype)
 
         name = (parent.name + "." if parent else "") + obj.name
+        if not parent:
+            namespace = self._get_namespace(obj.file)
 
         if key not in self._models:
             self._models[key] = {}
 
-        self._models[key][name] = obj
+        if parent:
+            # Children are found by the unqualified name only along with their parent
+            unqualified = (
+                self._models[self.reduce_type(parent.objtype)].get(parent.name)
+                is parent
+            )
+        else:
+            other = self._models[key].get(name)
+            unqualified = (
+                other is None
+                or other.file == obj.file
+                or self._replaces_duplicate(name, other.file, obj.file)
+            )
+
+        if unqualified:
+            self._models[key][name] = obj
+        if namespace is not None:
+            self._models[key][namespace + "." + name] = obj
 
         if not parent:
             for child in obj.children.values():
-                self._add_model(child, obj)
+                self._add_model(child, obj, namespace)
 
             # Build a lookup of the folders (but skip child items!)
-            if self._root_folder and obj.file.startswith(self._root_folder):
-                file_relative = obj.file[len(self._root_folder) :]  # Remove common path
-                folder = os.path.dirname(file_relative).lstrip(os.sep)
-                if folder not in self._folders:
-                    self._folders[folder] = []
-                self._folders[folder].append(obj)
+            folder = self._get_folder(obj.file)
+            if folder is not None:
+                self._folders.add(folder, obj)
+
+    def _replaces_duplicate(self, name: str, first: str, second: str) -> bool:
+        """Check if a top-level object takes the name of one in another file.
+
+        Within a project, the latter file is used and the duplicate is reported. Each
+        project of a solution has its own namespace, so the same name in different
+        projects is no problem. The unqualified name then refers to the object of the
+        first project in the solution.
+        """
+        first_namespace = self._get_namespace(first)
+        second_namespace = self._get_namespace(second)
+        if (
+            first_namespace is None
+            or second_namespace is None
+            or first_namespace == second_namespace
+        ):
+            self._warn_duplicate(name, first, second)
+            return True
+        order = list(self._projects.values())
+        return order.index(second_namespace) < order.index(first_namespace)
+
+    @staticmethod
+    def _warn_duplicate(name: str, first: str, second: str):
+        logger.warning(
+            f"PLC object `{name}` is declared in both `{first}` and `{second}`, "
+            f"the latter is used"
+        )
+
+    def _remove_model(
+        self,
+        obj: "PlcDeclaration",
+        parent: Optional["PlcDeclaration"] = None,
+        namespace: Optional[str] = None,
+    ):
+        """Remove a model (and its children) from our library again.
+
+        This is the reverse of :meth:`_add_model`.
+        """
+        key = self.reduce_type(obj.objtype)
+
+        name = (parent.name + "." if parent else "") + obj.name
+        if not parent:
+            namespace = self._get_namespace(obj.file)
+
+        names = [name] if namespace is None else [name, namespace + "." + name]
+        for name in names:
+            if self._models.get(key, {}).get(name) is obj:
+                del self._models[key][name]
+
+        if not parent:
+            for child in obj.children.values():
+                self._remove_model(child, obj, namespace)
+
+            folder = self._get_folder(obj.file)
+            if folder is not None:
+                self._folders.remove(folder, obj)
+
+    def _get_project(self, filepath: str) -> Optional[Tuple[str, str]]:
+        """Get the project of a solution a file belongs to.
+
+        :return: Root folder and name of the project (`None` if none)
+        """
+        folder = os.path.dirname(filepath)
+        while folder:
+            name = self._projects.get(folder)
+            if name is not None:
+                return folder, name
+            parent = os.path.dirname(folder)
+            if parent == folder:
+                break
+            folder = parent
+        return None
+
+    def _get_namespace(self, filepath: str) -> Optional[str]:
+        """Get the name of the project of a solution a file belongs to."""
+        if not self._projects:
+            return None
+        project = self._get_project(filepath)
+        return None if project is None else project[1]
+
+    def _get_folder(self, filepath: str) -> Optional[str]:
+        """Get the folder of a file relative to the project root.
+
+        In a solution, the folder is relative to the solution, through the name of the
+        project of the file instead.
+
+        :return: `None` if there is no project or the file is outside of it
+        """
+        if self._projects:
+            project = self._get_project(filepath)
+            if project is None:
+                return None
+            root, name = project
+            relative = os.path.relpath(os.path.dirname(filepath), root)
+            return name if relative == os.curdir else os.path.join(name, relative)
+
+        if self._root_folder and filepath.startswith(self._root_folder):
+            file_relative = filepath[len(self._root_folder) :]  # Remove common path
+            return os.path.dirname(file_relative).lstrip(os.sep)
+
+        return None
 
     def get_object(self, name: str, objtype: Optional[str] = None) -> "PlcDeclaration":
         """Search for an object by name in parsed models.
@@ -230,6 +1306,18 @@ class PlcInterpreter:
         :param objtype: objtype of the object to look for ("function", etc.)
         :raises: KeyError if the object could not be found
         """
+        if self._lazy:
+            # Children are part of the file of their parent, which may be prefixed
+            # with the project in a solution
+            parts = name.split(".")
+            filepath = None
+            if len(parts) > 1:
+                filepath = self._find_file(parts[0] + "." + parts[1])
+            if filepath is None:
+                filepath = self._find_file(parts[0])
+            if filepath is not None:
+                self._load_file(filepath)
+
         if objtype:
             objtype = self.reduce_type(objtype)
             try:
@@ -242,21 +1330,247 @@ class PlcInterpreter:
                 if name in models_set:
                     return models_set[name]
 
+        # A method or property can also be inherited from a base
+        parent_name, _, child_name = name.rpartition(".")
+        if parent_name:
+            try:
+                parent = self.get_object(parent_name)
+            except KeyError:
+                parent = None
+            if parent is not None:
+                inherited = self.get_inheritance().get_inherited_children(parent)
+                child = inherited.get(child_name)
+                if child is not None and (
+                    objtype is None or self.reduce_type(child.objtype) == objtype
+                ):
+                    return child
+
         raise KeyError(f"Failed to find object `{name}` for the type `{objtype}`")
 
-    def get_objects_in_folder(self, folder: str) -> List["PlcDeclaration"]:
+    def get_inheritance(self) -> InheritanceGraph:
+        """Get the relations between the objects by ``EXTENDS`` and ``IMPLEMENTS``.
+
+        The graph is made once after parsing, and remembers what it resolved. In lazy
+        mode, finding what extends or implements an object loads all files.
+        """
+        if self._inheritance is None:
+            self._inheritance = InheritanceGraph(
+                self._resolve_base, self._list_files, self._get_file_objects
+            )
+        return self._inheritance
+
+    def _resolve_base(
+        self, name: str, obj: "PlcDeclaration"
+    ) -> Optional["PlcDeclaration"]:
+        """Find an object by a name in the declaration of another object.
+
+        In a solution, an object of the same project is preferred.
+        """
+        names = [name]
+        namespace = self._get_namespace(obj.file)
+        if namespace is not None:
+            names.insert(0, namespace + "." + name)
+        for candidate in names:
+            try:
+                return self.get_object(candidate)
+            except KeyError:
+                pass
+        return None
+
+    def _list_files(self) -> List[str]:
+        """Get all source files with objects."""
+        if self._index is not None:
+            return self._index.files()
+        if self._lazy:
+            return list(dict.fromkeys(self._file_index.values()))
+        return list(self._file_objects)
+
+    def _get_file_objects(self, filepath: str) -> List["PlcDeclaration"]:
+        """Get the top-level objects of a source file."""
+        if self._lazy:
+            return self._load_file(filepath)
+        return self._file_objects.get(filepath, [])
+
+    @staticmethod
+    def _find_in_folder(tree: _FolderTree, folder: str, recursive: bool) -> List:
+        node = tree.find(folder)
+        if node is None:
+            return []
+        return node.walk() if recursive else list(node.items)
+
+    def get_objects_in_folder(
+        self, folder: str, recursive: bool = False
+    ) -> List["PlcDeclaration"]:
         """Search for objects inside a folder.
 
-        Currently no recursion is possible!
+        Objects are listed in the order of the project. With recursion, the objects
+        of a folder come before those of its subfolders.
 
-        :param folder: Folder name
+        :param folder: Folder name, relative to the project
+        :param recursive: If true, also include the objects of all subfolders
         """
-        if folder in self._folders:
-            return self._folders[folder]
+        if self._lazy:
+            objects = []
+            for filepath in self._find_folder_files(folder, recursive):
+                objects += self._load_file(filepath)
+        else:
+            objects = self._find_in_folder(self._folders, folder, recursive)
+
+        if objects:
+            return objects
 
         raise KeyError(f"Found no models in the folder `{folder}`")
 
 
+def _read_plc_project(path: str) -> Optional[List[str]]:
+    """Get the source files listed in a ``*.plcproj`` file.
+
+    :returns: `None` if the file is no PLC project
+    """
+    tree = ET.parse(path)
+    root = tree.getroot()
+
+    # The items in the project XML are namespaced, so addressing each item by name
+    # does not work
+    if not root.tag.endswith("Project"):
+        return None
+
+    source_files = []
+
+    for item_group in root:
+        if not item_group.tag.endswith("ItemGroup"):
+            continue
+
+        for item in item_group:
+            if item.tag.endswith("Compile"):
+                source_files.append(item.attrib["Include"])
+
+    # The paths in the PLC Project are relative to the project file itself:
+    dir_path = os.path.dirname(path)
+    source_files = [
+        os.path.normpath(os.path.join(dir_path, item)) for item in source_files
+    ]
+
+    if os.path.sep == "/":
+        # The project will likely contain Windows paths, which can cause issues
+        # on Linux
+        source_files = [path.replace("\\", "/") for path in source_files]
+
+    return source_files
+
+
+def _project_path(folder: str, path: str) -> str:
+    """Get a path from a project file, relative to the folder of that file."""
+    if os.path.sep == "/":
+        path = path.replace("\\", "/")  # Project files use Windows paths
+    return os.path.normpath(os.path.join(folder, path))
+
+
+# Project reference in a solution file, with the name and the path of the project
+_SOLUTION_PROJECT_RE = re.compile(
+    r'^Project\("[^"]*"\)\s*=\s*"([^"]*)"\s*,\s*"([^"]*)"', re.MULTILINE
+)
+
+
+def _find_plc_projects(path: str) -> List[Tuple[str, str]]:
+    """Find the PLC projects in a solution or TwinCAT project.
+
+    :param path: ``*.sln`` or ``*.tsproj`` file
+    :return: Name and path of each ``*.plcproj`` file
+    """
+    folder = os.path.dirname(path)
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".sln":
+        with open(path, encoding="utf-8-sig") as fh:
+            content = fh.read()
+        projects = []
+        for name, project in _SOLUTION_PROJECT_RE.findall(content):
+            project = _project_path(folder, project)
+            project_extension = os.path.splitext(project)[1].lower()
+            if project_extension == ".plcproj":
+                projects.append((name, project))
+            elif project_extension in PlcInterpreter.SOLUTION_EXTENSIONS:
+                if os.path.isfile(project):
+                    projects += _find_plc_projects(project)
+                else:
+                    logger.warning(f"Could not find project file {project}")
+        return projects
+
+    # A TwinCAT project lists its PLC projects like:
+    # <Plc><Project Name="MyPLC" PrjFilePath="MyPLC\MyPLC.plcproj"> ... </Project></Plc>
+    # or refers to a separate file with that: <Plc><Project File="MyPLC.xti"/></Plc>
+    projects = []
+    for plc in ET.parse(path).getroot().iter("Plc"):
+        for project in plc.iter("Project"):
+            if "PrjFilePath" not in project.attrib and "File" in project.attrib:
+                xti = os.path.join(folder, "_Config", "PLC", project.attrib["File"])
+                if not os.path.isfile(xti):
+                    logger.warning(f"Could not find PLC project reference {xti}")
+                    continue
+                project = next(ET.parse(xti).getroot().iter("Project"), project)
+            if "PrjFilePath" not in project.attrib:
+                continue
+            project_file = _project_path(folder, project.attrib["PrjFilePath"])
+            name = (
+                project.attrib.get("Name")
+                or os.path.splitext(os.path.basename(project_file))[0]
+            )
+            projects.append((name, project_file))
+
+    return projects
+
+
+def _read_file(filepath: str) -> Tuple[bytes, float]:
+    """Read the content of a file.
+
+    :return: The content and the time it took to read it
+    """
+    start = time.perf_counter()
+    with open(filepath, "rb") as fh:
+        content = fh.read()
+    return content, time.perf_counter() - start
+
+
+def _read_header(filepath: str) -> _DeclarationReader:
+    """Read only the start of the XML of a file, up to the first object."""
+    reader = _DeclarationReader(PlcInterpreter.XML_TYPES, header_only=True)
+    with open(filepath, "rb") as fh:
+        reader.read_stream(fh)
+    return reader
+
+
+def _split_names(names: Optional[str]) -> List[str]:
+    """Split a list of names like ``I_One, I_Two``."""
+    if not names:
+        return []
+    return [name.strip() for name in names.split(",") if name.strip()]
+
+
+_worker_interpreter: Optional[PlcInterpreter] = None
+"""Interpreter instance of a worker process."""
+
+
+def _init_worker(backend: str, stats: bool = False, memoization: bool = False):
+    """Prepare a worker process for parsing, with one interpreter for all files.
+
+    :param stats: If true, measure the processing of each file
+    """
+    global _worker_interpreter
+    _worker_interpreter = PlcInterpreter(
+        backend=backend,
+        stats=ParseStats() if stats else None,
+        memoization=memoization,
+    )
+
+
+def _process_file_in_worker(
+    content: bytes, filepath: str, previous_blocks: Dict[str, TextXMetaClass]
+) -> Tuple:
+    """Call :meth:`PlcInterpreter._process_file` in a worker process."""
+    return _worker_interpreter._process_file(content, filepath, previous_blocks)
+
+
 class PlcDeclaration:
     """Wrapper class for the result of the TextX parsing of a PLC source file.
 
@@ -265,8 +1579,13 @@ class PlcDeclaration:
     An object also stores a list of all child objects (e.g. methods).
 
     The `objtype` is as they appear in :class:`StructuredTextDomain`.
+
+    The model is a compact detached copy (see :mod:`plcdoc.model`), so declarations
+    can be pickled for the cache and for worker processes.
     """
 
+    __slots__ = ("_objtype", "_name", "_model", "_file", "_children")
+
     def __init__(self, meta_model: TextXMetaClass, file=None):
         """
 
@@ -342,6 +1661,27 @@ class PlcDeclaration:
     def children(self) -> Dict[str, "PlcDeclaration"]:
         return self._children
 
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the declaration, including those of the children.
+
+        Use it to find out if the documentation of an object needs to be updated.
+        """
+        return fingerprint(
+            [self._objtype, self._name, self._model]
+            + [[name, child.fingerprint] for name, child in self._children.items()]
+        )
+
+    @property
+    def extends(self) -> List[str]:
+        """Names of the objects this object extends (empty if none)."""
+        return _split_names(getattr(self._model, "extends", None))
+
+    @property
+    def implements(self) -> List[str]:
+        """Names of the interfaces this object implements (empty if none)."""
+        return _split_names(getattr(self._model, "implements", None))
+
     @property
     def members(self) -> List[TextXMetaClass]:
         if not self._model.type:
@@ -423,3 +1763,9 @@ class PlcDeclaration:
 
     def add_child(self, child: "PlcDeclaration"):
         self._children[child.name] = child
+
+    def set_file(self, file: str):
+        """Update the origin of this object and its children, e.g. after a move."""
+        self._file = file
+        for child in self._children.values():
+            child.set_file(file)
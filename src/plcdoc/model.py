@@ -0,0 +1,156 @@
+"""Contains a compact, plain data copy of the parsed TextX models."""
+
+import sys
+import hashlib
+from typing import Any, Dict, Tuple
+
+# Attributes of each rule of ``st_declaration.tx`` that results in an object, plus
+# those filled in later (the ``kind`` of a variable is set from its variable list)
+NODE_ATTRIBUTES: Dict[str, Tuple[str, ...]] = {
+    "Declaration": ("types", "properties", "functions", "variable_lists"),
+    "TypeDef": ("comments", "name", "extends", "type"),
+    "TypeStruct": ("members",),
+    "TypeUnion": ("members",),
+    "TypeEnum": ("values", "base_type", "default"),
+    "EnumOption": ("name", "number", "comment"),
+    "EnumDefault": ("option",),
+    "TypeAlias": ("base",),
+    "Function": (
+        "comments",
+        "function_type",
+        "abstract",
+        "final",
+        "visibility",
+        "name",
+        "extends",
+        "implements",
+        "return",
+        "arglist",
+        "lists",
+    ),
+    "Property": ("comments", "visibility", "name", "type"),
+    "VariableList": ("name", "constant", "persistent", "variables"),
+    "Variable": ("name", "address", "type", "arglist", "value", "comment", "kind"),
+    "VariableType": ("array", "pointer", "name"),
+    "CommentLine": ("text",),
+    "CommentBlock": ("text",),
+    "Attribute": ("field", "name", "content"),
+}
+
+# Attributes that are not part of the parsed content
+DERIVED_ATTRIBUTES = {"kind"}
+
+# Attributes holding names, which occur many times over in a project
+INTERNED_ATTRIBUTES = {
+    "name",
+    "extends",
+    "implements",
+    "base_type",
+    "function_type",
+    "visibility",
+    "option",
+    "field",
+}
+
+
+class DetachedNode:
+    """Plain copy of an object from a TextX model.
+
+    TextX creates its classes on the fly for each meta-model, which makes the models
+    impossible to pickle. A detached copy only keeps the grammar attributes, without any
+    reference to the parser or the parent objects.
+
+    A subclass is made for each grammar rule, such that the rule name remains available
+    through ``type(node).__name__``. The subclasses use ``__slots__`` to stay small, and
+    names (like those of types) are interned so they are stored only once.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **attrs):
+        for name in self.__slots__:
+            value = attrs.pop(name, None)
+            if type(value) is str and name in INTERNED_ATTRIBUTES:
+                value = sys.intern(value)
+            setattr(self, name, value)
+
+        if attrs:
+            raise TypeError(
+                f"Unexpected attributes for `{type(self).__name__}`: {list(attrs)}"
+            )
+
+    def __reduce__(self):
+        values = tuple(getattr(self, name) for name in self.__slots__)
+        return _restore_node, (type(self).__name__, values)
+
+    def __repr__(self):
+        return f"<{type(self).__name__}:{getattr(self, 'name', '')}>"
+
+
+_node_classes: Dict[str, type] = {}
+
+
+def node_class(rule: str) -> type:
+    """Get the (cached) detached class for a grammar rule."""
+    if rule not in _node_classes:
+        if rule not in NODE_ATTRIBUTES:
+            raise ValueError(f"No detached class for grammar rule `{rule}`")
+        _node_classes[rule] = type(
+            rule,
+            (DetachedNode,),
+            {"__module__": __name__, "__slots__": NODE_ATTRIBUTES[rule]},
+        )
+    return _node_classes[rule]
+
+
+def make_node(rule: str, **attrs) -> DetachedNode:
+    """Create a detached node for a grammar rule."""
+    return node_class(rule)(**attrs)
+
+
+def _restore_node(rule: str, values: Tuple) -> DetachedNode:
+    """Create a detached node from pickled data."""
+    return make_node(rule, **dict(zip(NODE_ATTRIBUTES[rule], values)))
+
+
+def detach(obj: Any) -> Any:
+    """Recursively copy a TextX object into detached nodes.
+
+    Plain values (strings, numbers, booleans and ``None``) are returned as they are.
+    """
+    if isinstance(obj, list):
+        return [detach(item) for item in obj]
+
+    attrs = getattr(type(obj), "_tx_attrs", None)
+    if attrs is None:
+        return obj
+
+    return make_node(
+        type(obj).__name__, **{name: detach(getattr(obj, name)) for name in attrs}
+    )
+
+
+def fingerprint(obj: Any) -> str:
+    """Get a hash of the parsed content of detached nodes (or plain values).
+
+    Two objects have the same fingerprint if they would be documented the same.
+    """
+    digest = hashlib.sha1()
+    _update_digest(digest, obj)
+    return digest.hexdigest()
+
+
+def _update_digest(digest: Any, obj: Any):
+    if isinstance(obj, list):
+        digest.update(b"[")
+        for item in obj:
+            _update_digest(digest, item)
+        digest.update(b"]")
+    elif isinstance(obj, DetachedNode):
+        digest.update(type(obj).__name__.encode() + b"(")
+        for name in obj.__slots__:
+            if name not in DERIVED_ATTRIBUTES:
+                _update_digest(digest, getattr(obj, name))
+        digest.update(b")")
+    else:
+        digest.update(repr(obj).encode() + b",")
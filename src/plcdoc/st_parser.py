@@ -0,0 +1,569 @@
+"""Contains a hand-written parser for StructuredText declarations.
+
+This parser is a faster alternative to the TextX meta-model of ``st_declaration.tx``.
+It is a plain recursive-descent parser that mirrors the rules of that grammar one by
+one, including the ordered choices and backtracking of a PEG parser. Terminals are
+matched by a scanner over the input string with precompiled regular expressions, with
+the same whitespace rules as TextX.
+
+Comments and attribute pragmas may appear at almost every rule boundary, so a PEG parser
+tries to match them over and over. Instead, they are found up front in a single pass
+over the text and recorded by their position. The structural rules then skip (or pick
+up) a comment by a lookup of the position, without matching its text again.
+
+The result is a tree of :class:`~plcdoc.model.DetachedNode` objects identical to a
+detached TextX model. Whenever the parser fails, it raises :class:`FastParserError` and
+the TextX meta-model should be used instead (which also gives the proper error).
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from .model import make_node, DetachedNode
+
+T = TypeVar("T")
+
+# All regular expressions are compiled like TextX does
+_WS = re.compile(r"[\t\n\r ]*")
+_SPACE = re.compile(r"\s*", re.MULTILINE)
+_ID = re.compile(r"[^\d\W]\w*\b", re.MULTILINE)
+_INT = re.compile(r"[-+]?[0-9]+", re.MULTILINE)
+_STRICTFLOAT = re.compile(
+    r"[+-]?(((\d+\.(\d*)?|\.\d+)([eE][+-]?\d+)?)|((\d+)([eE][+-]?\d+)))"
+    r"(?<=[\w\.])(?![\w\.])",
+    re.MULTILINE,
+)
+_STRING = re.compile(r'("(\\"|[^"])*")|(\'(\\\'|[^\'])*\')', re.MULTILINE)
+_VAR_LIST_TYPE = re.compile(r"VAR_\w+", re.MULTILINE)
+_ARRAY_RANGE = re.compile(r"[^\]]+", re.MULTILINE)
+_UNTIL_SEMICOLON = re.compile(r"[^;]*", re.MULTILINE)
+_EXPRESSION_STRING = re.compile(r"'.*'", re.MULTILINE)
+_ADDRESS_CHAR = re.compile(r"[A-Z%\.\*]", re.MULTILINE)
+_LINE = re.compile(r".*$", re.MULTILINE)
+_ATTRIBUTE_CONTENT = re.compile(r"[^}]+", re.MULTILINE)
+
+# Possible start of a comment or attribute, for the pre-scan
+_COMMENT_START = re.compile(r"//|\(\*|\{")
+
+# Whitespace that TextX does not skip, but the `\s` of the grammar does match
+_EXOTIC_WS = re.compile(r"[^\S\t\n\r ]")
+
+_FUNCTION_TYPES = ("FUNCTION_BLOCK", "FUNCTION", "INTERFACE", "METHOD", "PROGRAM")
+_VISIBILITIES = ("PUBLIC", "PRIVATE", "PROTECTED", "INTERNAL")
+
+
+class FastParserError(Exception):
+    """Raised when the fast parser cannot process a declaration."""
+
+
+class _NoMatch(Exception):
+    """Raised by a rule that does not match, to backtrack."""
+
+
+class StDeclarationParser:
+    """Recursive-descent parser for the ``Declaration`` rule of the ST grammar.
+
+    Each ``_rule`` method parses a rule of ``st_declaration.tx`` at the current
+    position, or raises :class:`_NoMatch`. Restoring the position after a failed
+    attempt is left to the caller, like :meth:`_many` and :meth:`_optional`.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        # Last search for the end of a comment block, as (searched from, found at)
+        self._block_end = (0, -1)
+        # Comments by their start, as (node, end) or `None` if there is none
+        self._comments: Dict[int, Optional[Tuple[DetachedNode, int]]] = {}
+
+    def parse(self, text: str) -> DetachedNode:
+        """Parse a full declaration.
+
+        :raises FastParserError: If the declaration could not be parsed
+        """
+        if _EXOTIC_WS.search(text):
+            raise FastParserError("Unsupported whitespace characters")
+        if not text.strip():
+            raise FastParserError("Empty declaration")
+
+        self._text = text
+        self._pos = 0
+        self._block_end = (len(text), -1)
+        self._scan_comments()
+        try:
+            return self._declaration()
+        except _NoMatch:
+            raise FastParserError(f"Failed to parse near position {self._pos}")
+        except RecursionError:
+            raise FastParserError("Declaration is nested too deeply")
+        finally:
+            self._text = ""
+            self._comments = {}
+
+    # ---------------------------------------------------------------------------------
+    # Scanner
+
+    def _skip(self):
+        self._pos = _WS.match(self._text, self._pos).end()
+
+    def _peek(self) -> str:
+        """Get the next character after any whitespace (without consuming it)."""
+        pos = _WS.match(self._text, self._pos).end()
+        return self._text[pos : pos + 1]
+
+    def _literal(self, literal: str) -> str:
+        self._skip()
+        if not self._text.startswith(literal, self._pos):
+            raise _NoMatch
+        self._pos += len(literal)
+        return literal
+
+    def _check(self, literal: str) -> bool:
+        """Consume a literal if it is next."""
+        pos = self._pos
+        self._skip()
+        if self._text.startswith(literal, self._pos):
+            self._pos += len(literal)
+            return True
+        self._pos = pos
+        return False
+
+    def _choice_literal(self, literals) -> str:
+        for literal in literals:
+            if self._check(literal):
+                return literal
+        raise _NoMatch
+
+    def _regex(self, regex, skip: bool = True, allow_empty: bool = False) -> str:
+        """Match a regular expression.
+
+        Like TextX, an empty match does not count as a match, unless it is part of a
+        sequence (``allow_empty``).
+        """
+        if skip:
+            self._skip()
+        match = regex.match(self._text, self._pos)
+        if match is None or not (allow_empty or match.end() > self._pos):
+            raise _NoMatch
+        self._pos = match.end()
+        return match.group()
+
+    def _id(self) -> str:
+        return self._regex(_ID)
+
+    def _find_block_end(self, start: int) -> int:
+        """Find the first ``*)`` from a position (-1 if there is none).
+
+        Comment blocks are tried at the same positions over and over. Any search from a
+        position between an earlier start and its result gives the same result, so the
+        text is scanned only once, also for an unterminated comment.
+        """
+        searched, found = self._block_end
+        if searched <= start and (found < 0 or start <= found):
+            return found
+        found = self._text.find("*)", start)
+        self._block_end = (start, found)
+        return found
+
+    def _scan_comments(self):
+        """Find all comments and attributes in a single pass over the text.
+
+        Text inside a comment is skipped, like the parser would. Should the parser
+        still look for a comment at a position that was skipped (e.g. because a quoted
+        string contains ``(*``), it is matched on demand in :meth:`_comment_at`.
+        """
+        pos = 0
+        while True:
+            match = _COMMENT_START.search(self._text, pos)
+            if match is None:
+                return
+            found = self._comment_at(match.start())
+            pos = match.start() + 1 if found is None else found[1]
+
+    def _comment_at(self, pos: int) -> Optional[Tuple[DetachedNode, int]]:
+        """Get the comment starting at a position and the position after it."""
+        if pos in self._comments:
+            return self._comments[pos]
+
+        found = None
+        if self._text.startswith(("//", "(*", "{"), pos):
+            start = self._pos
+            self._pos = pos
+            try:
+                node = self._choice(
+                    self._comment_line, self._comment_block, self._attribute
+                )
+                found = (node, self._pos)
+            except _NoMatch:
+                pass
+            self._pos = start
+
+        self._comments[pos] = found
+        return found
+
+    # ---------------------------------------------------------------------------------
+    # Repetitions
+
+    def _many(self, rule: Callable[[], T]) -> List[T]:
+        items = []
+        while True:
+            pos = self._pos
+            try:
+                items.append(rule())
+            except _NoMatch:
+                self._pos = pos
+                return items
+
+    def _optional(self, rule: Callable[[], T]) -> Optional[T]:
+        pos = self._pos
+        try:
+            return rule()
+        except _NoMatch:
+            self._pos = pos
+            return None
+
+    def _choice(self, *rules: Callable[[], T]) -> T:
+        pos = self._pos
+        for rule in rules:
+            try:
+                return rule()
+            except _NoMatch:
+                self._pos = pos
+        raise _NoMatch
+
+    # ---------------------------------------------------------------------------------
+    # Rules
+
+    def _declaration(self) -> DetachedNode:
+        types = self._many(self._type_def)
+        properties = self._many(self._property)
+        functions = self._many(self._function)
+        variable_lists = self._many(self._variable_list)
+        self._skip_comments()
+
+        self._skip()
+        if self._pos != len(self._text):
+            raise _NoMatch  # Not the end of the input
+
+        return make_node(
+            "Declaration",
+            types=types,
+            properties=properties,
+            functions=functions,
+            variable_lists=variable_lists,
+        )
+
+    def _type_def(self) -> DetachedNode:
+        comments = self._many(self._comment_any)
+        self._literal("TYPE")
+        name = self._id()
+        extends = self._optional(self._extends)
+        self._literal(":")
+        self._skip_comments()
+        type_ = self._choice(
+            self._type_struct, self._type_union, self._type_enum, self._type_alias
+        )
+        self._skip_comments()
+        self._literal("END_TYPE")
+
+        return make_node(
+            "TypeDef", comments=comments, name=name, extends=extends, type=type_
+        )
+
+    def _extends(self) -> str:
+        self._literal("EXTENDS")
+        return self._fqn()
+
+    def _implements(self) -> str:
+        self._literal("IMPLEMENTS")
+        return self._fqn()
+
+    def _type_struct(self) -> DetachedNode:
+        self._literal("STRUCT")
+        members = self._many(self._variable)
+        self._skip_comments()
+        self._literal("END_STRUCT")
+        return make_node("TypeStruct", members=members)
+
+    def _type_union(self) -> DetachedNode:
+        self._literal("UNION")
+        members = self._many(self._variable)
+        self._skip_comments()
+        self._literal("END_UNION")
+        return make_node("TypeUnion", members=members)
+
+    def _type_enum(self) -> DetachedNode:
+        self._literal("(")
+        values = self._many(self._enum_option)
+        self._skip_comments()
+        self._literal(")")
+        base_type = self._optional(self._fqn)
+        default = self._optional(self._enum_default)
+        self._semicolon()
+        return make_node(
+            "TypeEnum", values=values, base_type=base_type, default=default
+        )
+
+    def _enum_option(self) -> DetachedNode:
+        self._skip_comments()
+        name = self._id()
+        number = self._optional(self._enum_number)
+        self._check(",")
+        comment = self._optional(self._comment_line)
+        return make_node(
+            "EnumOption",
+            name=name,
+            number=0 if number is None else number,
+            comment=comment,
+        )
+
+    def _enum_number(self) -> int:
+        self._literal(":=")
+        return int(self._regex(_INT))
+
+    def _enum_default(self) -> DetachedNode:
+        self._literal(":=")
+        return make_node("EnumDefault", option=self._id())
+
+    def _type_alias(self) -> DetachedNode:
+        base = self._variable_type()
+        self._skip_comments()
+        self._semicolon()
+        return make_node("TypeAlias", base=base)
+
+    def _function(self) -> DetachedNode:
+        comments = self._many(self._comment_any)
+        function_type = self._choice_literal(_FUNCTION_TYPES)
+
+        # Unordered group: each modifier at most once, in any order
+        abstract = final = False
+        visibility = None
+        while True:
+            if not abstract and self._check("ABSTRACT"):
+                abstract = True
+            elif not final and self._check("FINAL"):
+                final = True
+            elif visibility is None:
+                visibility = self._optional(self._visibility)
+                if visibility is None:
+                    break
+            else:
+                break
+
+        name = self._id()
+        extends = self._optional(self._extends)
+        implements = self._optional(self._implements)
+        return_ = arglist = None
+        returns = self._optional(self._function_return)
+        if returns is not None:
+            return_, arglist = returns
+        self._optional(self._semicolon)
+        lists = self._many(self._variable_list)
+
+        return make_node(
+            "Function",
+            comments=comments,
+            function_type=function_type,
+            abstract=abstract,
+            final=final,
+            visibility=visibility,
+            name=name,
+            extends=extends,
+            implements=implements,
+            arglist=arglist,
+            lists=lists,
+            **{"return": return_},
+        )
+
+    def _function_return(self):
+        self._literal(":")
+        return_ = self._variable_type()
+        return return_, self._optional(self._arglist)
+
+    def _visibility(self) -> str:
+        return self._choice_literal(_VISIBILITIES)
+
+    def _property(self) -> DetachedNode:
+        comments = self._many(self._comment_any)
+        self._literal("PROPERTY")
+        visibility = self._optional(self._visibility)
+        name = self._id()
+        self._literal(":")
+        type_ = self._variable_type()
+        return make_node(
+            "Property", comments=comments, visibility=visibility, name=name, type=type_
+        )
+
+    def _variable_list(self) -> DetachedNode:
+        self._skip_comments()
+        name = self._choice(lambda: self._regex(_VAR_LIST_TYPE), self._var_keyword)
+        constant = self._check("CONSTANT")
+        persistent = self._check("PERSISTENT")
+        variables = self._many(self._variable)
+        self._skip_comments()
+        self._literal("END_VAR")
+        return make_node(
+            "VariableList",
+            name=name,
+            constant=constant,
+            persistent=persistent,
+            variables=variables,
+        )
+
+    def _var_keyword(self) -> str:
+        return self._literal("VAR")
+
+    def _variable(self) -> DetachedNode:
+        self._skip_comments()
+        name = self._id()
+        self._many(self._extra_name)
+        address = self._optional(self._address)
+        self._literal(":")
+        type_ = self._variable_type()
+        arglist = self._optional(self._arglist)
+        value = self._optional(self._assignment)
+        self._semicolon()
+        comment = self._optional(self._comment_line)
+        return make_node(
+            "Variable",
+            name=name,
+            address=address,
+            type=type_,
+            arglist=arglist,
+            value=value,
+            comment=comment,
+        )
+
+    def _extra_name(self) -> str:
+        self._literal(",")
+        return self._id()
+
+    def _assignment(self) -> str:
+        self._choice_literal((":=", "REF="))
+        return self._choice(self._arglist, self._expression)
+
+    def _variable_type(self) -> DetachedNode:
+        array = self._optional(self._variable_type_array)
+        pointer = self._optional(self._pointer)
+        name = self._choice(self._string_type, self._fqn)
+        return make_node("VariableType", array=array, pointer=pointer, name=name)
+
+    def _variable_type_array(self) -> str:
+        self._literal("ARRAY")
+        self._literal("[")
+        array_range = self._regex(_ARRAY_RANGE)
+        self._literal("]")
+        self._literal("OF")
+        return array_range
+
+    def _pointer(self) -> str:
+        pointer = self._choice_literal(("POINTER", "REFERENCE"))
+        self._literal("TO")
+        return pointer
+
+    def _string_type(self) -> str:
+        self._literal("STRING")
+        return "STRING" + self._choice(
+            lambda: self._string_size("(", ")"), lambda: self._string_size("[", "]")
+        )
+
+    def _string_size(self, opening: str, closing: str) -> str:
+        self._literal(opening)
+        size = self._choice(self._number, self._fqn)
+        self._literal(closing)
+        return opening + size + closing
+
+    def _number(self) -> str:
+        # Like TextX, convert a number and use the string of it
+        try:
+            return str(float(self._regex(_STRICTFLOAT)))
+        except _NoMatch:
+            return str(int(self._regex(_INT)))
+
+    def _arglist(self) -> str:
+        opening = self._choice_literal(("(", "["))
+        return opening + self._regex(_UNTIL_SEMICOLON, allow_empty=True)
+
+    def _address(self) -> str:
+        self._literal("AT")
+        self._literal("%")
+        chars = [self._regex(_ADDRESS_CHAR)]
+        chars += self._many(lambda: self._regex(_ADDRESS_CHAR))
+        return "AT%" + "".join(chars)
+
+    def _fqn(self) -> str:
+        # Whitespace is not skipped inside this rule
+        self._regex(_SPACE, skip=False, allow_empty=True)
+        parts = [self._regex(_ID, skip=False)]
+        parts += self._many(self._fqn_part)
+        self._regex(_SPACE, skip=False, allow_empty=True)
+        return "".join(parts)
+
+    def _fqn_part(self) -> str:
+        if not self._text.startswith(".", self._pos):
+            raise _NoMatch
+        self._pos += 1
+        return "." + self._regex(_ID, skip=False)
+
+    def _semicolon(self):
+        self._literal(";")
+        while self._check(";"):
+            pass
+
+    def _expression(self) -> str:
+        return self._choice(
+            lambda: self._regex(_EXPRESSION_STRING),
+            lambda: self._regex(_UNTIL_SEMICOLON),
+        )
+
+    def _next_comment(self) -> Optional[Tuple[DetachedNode, int]]:
+        """Get the comment after any whitespace (the result only depends on that)."""
+        pos = _WS.match(self._text, self._pos).end()
+        if pos in self._comments:
+            return self._comments[pos]
+        if self._text[pos : pos + 1] not in ("/", "(", "{"):
+            return None  # Shortcut, no need to try each option
+        return self._comment_at(pos)
+
+    def _comment_any(self) -> DetachedNode:
+        found = self._next_comment()
+        if found is None:
+            raise _NoMatch
+        node, self._pos = found
+        return node
+
+    def _skip_comments(self):
+        """Skip any comments, like an unnamed ``CommentAny*``."""
+        found = self._next_comment()
+        while found is not None:
+            self._pos = found[1]
+            found = self._next_comment()
+
+    def _comment_line(self) -> DetachedNode:
+        self._literal("//")
+        return make_node("CommentLine", text=self._regex(_LINE))
+
+    def _comment_block(self) -> DetachedNode:
+        # Whitespace is not skipped inside this rule
+        self._regex(_SPACE, skip=False, allow_empty=True)
+        if not self._text.startswith("(*", self._pos):
+            raise _NoMatch
+        end = self._find_block_end(self._pos + 2)
+        if end < 0:
+            raise _NoMatch
+        text = self._text[self._pos : end + 2]
+        self._pos = end + 2
+        self._regex(_SPACE, skip=False, allow_empty=True)
+        return make_node("CommentBlock", text=text)
+
+    def _attribute(self) -> DetachedNode:
+        self._literal("{")
+        field = self._id()
+        name = self._optional(lambda: self._regex(_STRING))
+        if name is not None:
+            name = name[1:-1].replace(r"\"", r'"').replace(r"\'", "'")
+        content = self._optional(lambda: self._regex(_ATTRIBUTE_CONTENT))
+        self._literal("}")
+        return make_node(
+            "Attribute", field=field, name=name or "", content=content or ""
+        )
@@ -0,0 +1,241 @@
+"""Contains the optional statistics of processing PLC files."""
+
+import os
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sphinx.application import Sphinx
+from sphinx.util import logging
+
+logger = logging.getLogger(__name__)
+
+
+class FileStats:
+    """Measurements of processing a single PLC file.
+
+    Times are in seconds, sizes in characters (of declarations) or bytes (of files).
+    """
+
+    __slots__ = (
+        "path",
+        "size",
+        "read_time",
+        "xml_time",
+        "parse_time",
+        "declarations",
+        "reused",
+        "fallbacks",
+        "failures",
+        "skipped",
+        "cached",
+    )
+
+    def __init__(self, path: str, size: int = 0):
+        self.path = path
+        self.size = size
+        self.read_time = 0.0  # Reading the file from disk
+        self.xml_time = 0.0  # Extracting the declarations from the XML
+        self.parse_time = 0.0  # Parsing the declarations
+        # Parsed declarations, as (name, time, size)
+        self.declarations: List[Tuple[str, float, int]] = []
+        self.reused = 0  # Declarations unchanged since the previous version
+        self.fallbacks = 0  # Declarations the fast parser left to TextX
+        self.failures = 0  # Declarations that could not be parsed
+        self.skipped = 0  # Objects (or the file itself) that cannot be processed
+        self.cached = False  # True if the result was loaded from the cache
+
+    @property
+    def total_time(self) -> float:
+        return self.read_time + self.xml_time + self.parse_time
+
+    def add_declaration(self, name: str, duration: float, size: int):
+        self.declarations.append((name, duration, size))
+        self.parse_time += duration
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["total_time"] = self.total_time
+        data["declarations"] = [
+            {"name": name, "time": duration, "size": size}
+            for name, duration, size in self.declarations
+        ]
+        return data
+
+
+class RuleStats:
+    """Measurements of a single rule of the TextX grammar."""
+
+    __slots__ = ("attempts", "matches", "time", "own_time")
+
+    def __init__(self):
+        self.attempts = 0
+        self.matches = 0
+        self.time = 0.0  # Including the rules inside it
+        self.own_time = 0.0  # Excluding the rules inside it
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class RuleProfile:
+    """Time and number of match attempts of each rule of the TextX grammar.
+
+    The ``parse`` method of each rule in the parser of a meta-model is replaced by a
+    measuring wrapper. The meta-model should therefore not be shared with anything
+    that is not profiled.
+    """
+
+    def __init__(self):
+        self.rules: Dict[str, RuleStats] = {}
+        self._nested: List[float] = []  # Time of nested rules, for each active rule
+
+    def instrument(self, meta_model: Any):
+        """Measure all rules of a TextX meta-model from now on."""
+        seen = set()
+        stack = [meta_model._parser_blueprint.parser_model]
+        while stack:
+            expression = stack.pop()
+            if id(expression) in seen:
+                continue
+            seen.add(id(expression))
+            stack += expression.nodes
+            # Skip the expressions TextX inserts for assignments
+            if expression.root and not expression.rule_name.startswith("__"):
+                self._wrap(expression)
+
+    def _wrap(self, expression: Any):
+        stats = self.rules.setdefault(expression.rule_name, RuleStats())
+        parse = expression.parse
+        nested = self._nested
+
+        def profiled_parse(parser):
+            stats.attempts += 1
+            nested.append(0.0)
+            start = time.perf_counter()
+            try:
+                result = parse(parser)
+                stats.matches += 1
+                return result
+            finally:
+                duration = time.perf_counter() - start
+                stats.time += duration
+                stats.own_time += duration - nested.pop()
+                if nested:
+                    nested[-1] += duration
+
+        expression.parse = profiled_parse
+
+    def report(self, count: int = 10) -> List[str]:
+        """Get lines of text about the rules that took the most time themselves."""
+        rules = sorted(self.rules.items(), key=lambda r: r[1].own_time, reverse=True)
+        lines = ["[plcdoc] Grammar rules with the most time spent in them:"]
+        for name, stats in rules[:count]:
+            lines.append(
+                f"  {stats.own_time:8.3f} s  {name} ({stats.attempts} attempt(s), "
+                f"{stats.matches} match(es), {stats.time:.3f} s including nested)"
+            )
+        return lines
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: stats.as_dict() for name, stats in self.rules.items()}
+
+
+class ParseStats:
+    """Collection of :class:`FileStats` of all processed files.
+
+    A file that is processed again (e.g. in lazy mode) replaces its earlier numbers.
+    """
+
+    COUNTERS = ("reused", "fallbacks", "failures", "skipped")
+
+    def __init__(self, profile_rules: bool = False):
+        """
+
+        :param profile_rules: If true, also measure each rule of the TextX grammar
+                              (see :class:`RuleProfile`)
+        """
+        self.files: Dict[str, FileStats] = {}
+        self.rules: Optional[RuleProfile] = RuleProfile() if profile_rules else None
+
+    def add(self, stats: FileStats):
+        self.files[stats.path] = stats
+
+    def totals(self) -> Dict[str, Any]:
+        """Get the sums over all files."""
+        files = self.files.values()
+        totals = {
+            "files": len(self.files),
+            "cached": sum(stats.cached for stats in files),
+            "size": sum(stats.size for stats in files),
+            "declarations": sum(len(stats.declarations) for stats in files),
+            "declaration_size": sum(
+                size for stats in files for _, _, size in stats.declarations
+            ),
+        }
+        for name in ("read_time", "xml_time", "parse_time", "total_time"):
+            totals[name] = sum(getattr(stats, name) for stats in files)
+        for name in self.COUNTERS:
+            totals[name] = sum(getattr(stats, name) for stats in files)
+        return totals
+
+    def slowest(self, count: int) -> List[FileStats]:
+        """Get the files that took the longest to process."""
+        return sorted(self.files.values(), key=lambda s: s.total_time, reverse=True)[
+            :count
+        ]
+
+    def report(self, count: int = 10) -> List[str]:
+        """Get lines of text summarizing the totals and the slowest files."""
+        totals = self.totals()
+        lines = [
+            f"[plcdoc] Processed {totals['files']} PLC file(s) "
+            f"({totals['cached']} from cache) in {totals['total_time']:.2f} s: "
+            f"read {totals['read_time']:.2f} s, XML {totals['xml_time']:.2f} s, "
+            f"parse {totals['parse_time']:.2f} s "
+            f"({totals['declarations']} declaration(s), {totals['reused']} reused, "
+            f"{totals['fallbacks']} fallback(s), {totals['failures']} failure(s), "
+            f"{totals['skipped']} skipped)"
+        ]
+        for stats in self.slowest(count):
+            slowest = max(stats.declarations, key=lambda d: d[1], default=None)
+            line = (
+                f"  {stats.total_time:8.3f} s  {stats.path} "
+                f"(XML {stats.xml_time:.3f} s, parse {stats.parse_time:.3f} s"
+            )
+            if slowest is not None:
+                line += f", slowest `{slowest[0]}` {slowest[1]:.3f} s"
+            lines.append(line + ")")
+        if self.rules is not None:
+            lines += self.rules.report(count)
+        return lines
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = {
+            "totals": self.totals(),
+            "files": [stats.as_dict() for stats in self.files.values()],
+        }
+        if self.rules is not None:
+            data["rules"] = self.rules.as_dict()
+        return data
+
+    def write_json(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.as_dict(), fh, indent=2)
+
+
+def report_parse_stats(app: Sphinx, exception: Optional[Exception]):
+    """Show the slowest PLC files and write all statistics, if enabled."""
+    interpreter = getattr(app, "_interpreter", None)
+    stats: Optional[ParseStats] = getattr(interpreter, "stats", None)
+    if stats is None:
+        return
+
+    for line in stats.report(app.config.plc_parse_stats_top):
+        logger.info(line)
+
+    if app.config.plc_parse_stats_file:
+        path = os.path.join(app.confdir, app.config.plc_parse_stats_file)
+        stats.write_json(path)
+        logger.info(f"[plcdoc] Parse statistics written to {path}")
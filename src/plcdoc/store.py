@@ -0,0 +1,426 @@
+"""Contains the optional persistent store of parsed PLC objects, in SQLite."""
+
+import os
+import json
+import pickle
+import sqlite3
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+from .cache import format_salt
+
+if TYPE_CHECKING:
+    from .interpreter import PlcDeclaration
+
+_inherited_connections: List[sqlite3.Connection] = []
+"""Connections of a parent process, kept alive so they are never closed in a child."""
+
+
+class SymbolStore:
+    """Database of the parsed objects of all source files.
+
+    The pickled objects of each source file are stored together with the file, like in
+    :class:`~plcdoc.frozen.FrozenIndex`, and loaded again when one of them is used. The
+    interpreter therefore only keeps a limited number of files in memory, regardless
+    of the size of the project. Files are stored one by one while they are parsed, and
+    unchanged files (by their size and modification time) are skipped in the next
+    build.
+
+    The declarations, their variables and comments are also stored in tables of their
+    own, for queries with any SQLite client:
+
+    * ``files``: Source files, with their folder in the project
+    * ``names``: Names of the top-level objects, to find their file
+    * ``declarations``: All objects including methods and properties, with their
+      comment (``parent_id`` refers to the object they belong to)
+    * ``variables``: Variables of each declaration, with their kind (e.g.
+      ``var_input``), type and comment
+
+    A store is only used by a single process at a time. After a fork (e.g. for parallel
+    reading in Sphinx), a new connection is opened for reading. SQLite connections
+    must not be used or closed across a fork, so the one inherited from the parent is
+    left alone.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS info (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS files (
+        id INTEGER PRIMARY KEY,
+        path TEXT NOT NULL UNIQUE,
+        position INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        mtime INTEGER NOT NULL,
+        key TEXT NOT NULL,
+        folder TEXT,
+        namespace TEXT,
+        objects BLOB NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS files_folder ON files (folder);
+    CREATE TABLE IF NOT EXISTS names (
+        name TEXT NOT NULL,
+        file_id INTEGER NOT NULL REFERENCES files (id) ON DELETE CASCADE,
+        qualified INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS names_name ON names (name);
+    CREATE INDEX IF NOT EXISTS names_file ON names (file_id);
+    CREATE TABLE IF NOT EXISTS declarations (
+        id INTEGER PRIMARY KEY,
+        file_id INTEGER NOT NULL REFERENCES files (id) ON DELETE CASCADE,
+        parent_id INTEGER REFERENCES declarations (id) ON DELETE CASCADE,
+        name TEXT NOT NULL,
+        objtype TEXT NOT NULL,
+        comment TEXT,
+        fingerprint TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS declarations_name ON declarations (name);
+    CREATE INDEX IF NOT EXISTS declarations_objtype ON declarations (objtype, name);
+    CREATE INDEX IF NOT EXISTS declarations_file ON declarations (file_id);
+    CREATE INDEX IF NOT EXISTS declarations_parent ON declarations (parent_id);
+    CREATE TABLE IF NOT EXISTS variables (
+        declaration_id INTEGER NOT NULL
+            REFERENCES declarations (id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        name TEXT NOT NULL,
+        type TEXT,
+        comment TEXT
+    );
+    CREATE INDEX IF NOT EXISTS variables_declaration ON variables (declaration_id);
+    CREATE INDEX IF NOT EXISTS variables_name ON variables (name);
+    """
+
+    # Commit after this many stored files, to keep the journal small
+    COMMIT_INTERVAL = 500
+
+    def __init__(self, path: str):
+        """Open a store, creating it if needed.
+
+        Everything stored by another version of the grammar or of ``plcdoc`` is
+        removed.
+        """
+        self._path = os.path.abspath(path)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._salt = format_salt()
+        self._pending = 0
+
+        salt = self._get_info("salt")
+        if salt != self._salt.hex():
+            self.clear()
+            self._set_info("salt", self._salt.hex())
+            self.commit()
+
+        self.root_folder: Optional[str] = self._get_info("root_folder")
+        self.projects: Dict[str, str] = json.loads(self._get_info("projects") or "{}")
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """Connection of the current process, opened when first needed."""
+        if self._pid != os.getpid():
+            self._discard_inherited()
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            # The connection is shared with a background analysis thread, which is
+            # done before anything else uses it
+            self._connection = sqlite3.connect(self._path, check_same_thread=False)
+            self._connection.execute("PRAGMA foreign_keys = ON")
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute("PRAGMA synchronous = NORMAL")
+            self._connection.executescript(self.SCHEMA)
+            self._pid = os.getpid()
+        return self._connection
+
+    def _discard_inherited(self):
+        """Forget a connection of the parent process, without touching it."""
+        if self._connection is not None:
+            _inherited_connections.append(self._connection)
+        self._connection = None
+
+    def close(self):
+        if self._pid != os.getpid():
+            self._discard_inherited()
+        elif self._connection is not None:
+            self._connection.close()
+        self._connection = None
+
+    def commit(self):
+        self._db.commit()
+        self._pending = 0
+
+    def clear(self):
+        """Remove all files and their objects."""
+        self._db.execute("DELETE FROM files")
+        self.commit()
+
+    def _get_info(self, key: str) -> Optional[str]:
+        row = self._db.execute(
+            "SELECT value FROM info WHERE key = ?", (key,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def _set_info(self, key: str, value: str):
+        self._db.execute("INSERT OR REPLACE INTO info VALUES (?, ?)", (key, value))
+
+    # ---------------------------------------------------------------------------------
+    # Reading, like FrozenIndex
+
+    def files(self) -> List[str]:
+        """Get all stored files, in the order of the project."""
+        rows = self._db.execute("SELECT path FROM files ORDER BY position")
+        return [path for (path,) in rows]
+
+    def find_file(self, name: str) -> Optional[str]:
+        """Get the file of a (top-level) object by its name.
+
+        If multiple files declare it, the last one in the project is used. Of multiple
+        projects in a solution, the first one is used.
+        """
+        rows = self._db.execute(
+            "SELECT files.path, files.namespace FROM names "
+            "JOIN files ON files.id = names.file_id "
+            "WHERE names.name = ? ORDER BY files.position",
+            (name,),
+        ).fetchall()
+        if not rows:
+            return None
+        namespace = rows[0][1]
+        return [path for path, other in rows if other == namespace][-1]
+
+    def find_folder_files(self, parts: List[str], recursive: bool = False) -> List[str]:
+        """Get the files of a folder, in the same order as the folder tree.
+
+        :param parts: Names of the folder and its parents
+        """
+        folder = "/".join(parts)
+        if not recursive:
+            query, args = "folder = ?", (folder,)
+        elif not folder:
+            query, args = "folder IS NOT NULL", ()
+        else:
+            prefix = folder + "/"
+            query = "(folder = ? OR substr(folder, 1, ?) = ?)"
+            args = (folder, len(prefix), prefix)
+        rows = self._db.execute(
+            f"SELECT folder, position, path FROM files WHERE {query}", args
+        ).fetchall()
+
+        # Subfolders come in the order they were first used, after the files of their
+        # parent folder
+        depth = len(parts)
+        first_use: Dict[Tuple[str, ...], int] = {}
+        for row_folder, position, _ in rows:
+            names = tuple(row_folder.split("/")) if row_folder else ()
+            for end in range(depth + 1, len(names) + 1):
+                first_use[names[:end]] = min(
+                    first_use.get(names[:end], position), position
+                )
+
+        def order(row: Tuple) -> List[Tuple[int, int]]:
+            names = tuple(row[0].split("/")) if row[0] else ()
+            subfolders = [names[:end] for end in range(depth + 1, len(names) + 1)]
+            return [(1, first_use[key]) for key in subfolders] + [(0, row[1])]
+
+        return [row[2] for row in sorted(rows, key=order)]
+
+    def get_size(self, filepath: str) -> int:
+        """Get the size of the pickled objects of a file (0 if not in the store)."""
+        row = self._db.execute(
+            "SELECT length(objects) FROM files WHERE path = ?", (filepath,)
+        ).fetchone()
+        return 0 if row is None else row[0]
+
+    def load(self, filepath: str) -> List["PlcDeclaration"]:
+        """Unpickle the objects of a file.
+
+        :raises KeyError: If the file is not in the store
+        """
+        row = self._db.execute(
+            "SELECT objects FROM files WHERE path = ?", (filepath,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"File `{filepath}` is not in the store")
+        return pickle.loads(row[0])
+
+    # ---------------------------------------------------------------------------------
+    # Writing
+
+    def make_key(self, content: bytes, name: str = "", backend: str = "textx") -> str:
+        """Get the key of the content of a source file (see :class:`ParseCache`)."""
+        digest = hashlib.sha256(self._salt)
+        digest.update(backend.encode() + b"\0" + name.encode() + b"\0")
+        digest.update(content)
+        return digest.hexdigest()
+
+    def set_info(self, root_folder: Optional[str], projects: Dict[str, str]):
+        """Remember the project(s) the files belong to."""
+        self.root_folder = root_folder
+        self.projects = dict(projects)
+        if root_folder:
+            self._set_info("root_folder", root_folder)
+        else:
+            self._db.execute("DELETE FROM info WHERE key = 'root_folder'")
+        self._set_info("projects", json.dumps(self.projects))
+
+    def get_files(self) -> Dict[str, Tuple]:
+        """Get the stored state of each file.
+
+        :return: Tuples of (size, modification time, key, folder, namespace) by path
+        """
+        rows = self._db.execute(
+            "SELECT path, size, mtime, key, folder, namespace FROM files"
+        )
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def update_files(self, files: Iterable[Tuple[str, int, int, int]]):
+        """Update the position and modification time of unchanged files.
+
+        :param files: Tuples of (path, position, size, modification time)
+        """
+        self._db.executemany(
+            "UPDATE files SET position = ?, size = ?, mtime = ? WHERE path = ?",
+            [(position, size, mtime, path) for path, position, size, mtime in files],
+        )
+
+    def put(
+        self,
+        filepath: str,
+        position: int,
+        size: int,
+        mtime: int,
+        key: str,
+        folder: Optional[str],
+        namespace: Optional[str],
+        objects: List["PlcDeclaration"],
+    ):
+        """Store (or replace) the objects of a file.
+
+        :param folder: Folder in the project (`None` if not in it)
+        :param namespace: Project of the file in a solution, its objects can be found
+                          under it as well
+        """
+        db = self._db
+        db.execute("DELETE FROM files WHERE path = ?", (filepath,))
+        cursor = db.execute(
+            "INSERT INTO files (path, position, size, mtime, key, folder, namespace, "
+            "objects) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                filepath,
+                position,
+                size,
+                mtime,
+                key,
+                folder,
+                namespace,
+                pickle.dumps(objects, protocol=pickle.HIGHEST_PROTOCOL),
+            ),
+        )
+        file_id = cursor.lastrowid
+
+        names = [(obj.name, file_id, 0) for obj in objects]
+        if namespace is not None:
+            names += [(namespace + "." + obj.name, file_id, 1) for obj in objects]
+        db.executemany("INSERT INTO names VALUES (?, ?, ?)", names)
+
+        for obj in objects:
+            self._put_declaration(file_id, obj, None, obj.name)
+
+        self._pending += 1
+        if self._pending >= self.COMMIT_INTERVAL:
+            self.commit()
+
+    def _put_declaration(
+        self,
+        file_id: int,
+        obj: "PlcDeclaration",
+        parent_id: Optional[int],
+        name: str,
+    ):
+        cursor = self._db.execute(
+            "INSERT INTO declarations (file_id, parent_id, name, objtype, comment, "
+            "fingerprint) VALUES (?, ?, ?, ?, ?, ?)",
+            (file_id, parent_id, name, obj.objtype, obj.get_comment(), obj.fingerprint),
+        )
+        declaration_id = cursor.lastrowid
+
+        variables = []
+        for position, var in enumerate(self._get_variables(obj)):
+            comment = getattr(var, "comment", None)
+            variables.append(
+                (
+                    declaration_id,
+                    position,
+                    var.kind,
+                    var.name,
+                    getattr(var.type, "name", None),
+                    None if comment is None else comment.text.strip(),
+                )
+            )
+        self._db.executemany(
+            "INSERT INTO variables VALUES (?, ?, ?, ?, ?, ?)", variables
+        )
+
+        for child in obj.children.values():
+            self._put_declaration(
+                file_id, child, declaration_id, name + "." + child.name
+            )
+
+    @staticmethod
+    def _get_variables(obj: "PlcDeclaration") -> List[Any]:
+        if obj.objtype in ("struct", "union"):
+            return [_Member(member) for member in obj.members]
+        return obj.get_args(skip_internal=False)
+
+    def discard(self, filepath: str):
+        """Remove a file (and its objects), e.g. to parse it again next time."""
+        self._db.execute("DELETE FROM files WHERE path = ?", (filepath,))
+
+    def retain(self, filepaths: Iterable[str]):
+        """Remove all files (and their objects) that are not listed."""
+        keep = set(filepaths)
+        removed = [
+            (path,)
+            for (path,) in self._db.execute("SELECT path FROM files")
+            if path not in keep
+        ]
+        self._db.executemany("DELETE FROM files WHERE path = ?", removed)
+
+    def find_duplicates(self) -> List[Tuple[str, str, str]]:
+        """Find top-level names declared in multiple files of the same project.
+
+        :return: Tuples of (name, first file, second file), in the order of the project
+        """
+        rows = self._db.execute(
+            "SELECT names.name, files.path, files.namespace FROM names "
+            "JOIN files ON files.id = names.file_id "
+            "WHERE names.qualified = 0 AND names.name IN "
+            "(SELECT name FROM names WHERE qualified = 0 "
+            "GROUP BY name HAVING COUNT(*) > 1) "
+            "ORDER BY names.name, files.position"
+        ).fetchall()
+        return [
+            (name, first, second)
+            for (name, first, space), (other, second, other_space) in zip(
+                rows, rows[1:]
+            )
+            if name == other
+            and (space is None or other_space is None or space == other_space)
+        ]
+
+
+class _Member:
+    """View of a struct member as a variable."""
+
+    __slots__ = ("name", "type", "comment", "kind")
+
+    def __init__(self, member: Any):
+        self.name = member.name
+        self.type = member.type
+        self.comment = getattr(member, "comment", None)
+        self.kind = "member"
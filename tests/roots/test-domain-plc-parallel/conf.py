@@ -0,0 +1,11 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("."))
+
+extensions = ["plcdoc"]
+
+# The suffix of source filenames.
+source_suffix = ".rst"
+
+nitpicky = True
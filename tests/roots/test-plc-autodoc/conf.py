@@ -12,5 +12,5 @@ nitpicky = True
 
 plc_sources = [
     os.path.join(os.path.abspath("."), "src_plc", item)
-    for item in ["*.TcPOU", "*.TcDUT", "*.TcGVL"]
+    for item in ["*.TcPOU", "*.TcDUT", "*.TcGVL", "*.TcIO"]
 ]
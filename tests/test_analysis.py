@@ -0,0 +1,77 @@
+"""
+Test the analysis of PLC sources in the background.
+"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from plcdoc.analysis import start_analysis, wait_for_analysis, get_interpreter
+
+
+def test_analysis_waited_for():
+    """The result is only used once the analysis is done."""
+    app = SimpleNamespace()
+    started, proceed = threading.Event(), threading.Event()
+
+    def analyze(app):
+        started.set()
+        proceed.wait()
+        app._interpreter = "interpreter"
+
+    start_analysis(app, analyze)
+    assert started.wait(5)
+    assert not hasattr(app, "_interpreter")  # Still running
+
+    proceed.set()
+    assert get_interpreter(app) == "interpreter"
+    assert app._plc_analysis is None
+    wait_for_analysis(app)  # Nothing left to wait for
+
+
+def test_analysis_error():
+    """An error in the background is raised when waiting for the result."""
+    app = SimpleNamespace()
+
+    def analyze(app):
+        raise ValueError("Broken project")
+
+    start_analysis(app, analyze)
+    with pytest.raises(ValueError, match="Broken project"):
+        get_interpreter(app)
+    assert get_interpreter(app) is None  # Raised only once
+
+
+@pytest.mark.sphinx("dummy", testroot="plc-project")
+def test_analysis_background(app, status, warning):
+    app.build()
+
+    assert get_interpreter(app).get_object("FB_MyBlock")
+    assert app._plc_analysis is None
+    assert "WARNING" not in warning.getvalue()
+
+
+@pytest.mark.sphinx(
+    "dummy",
+    testroot="plc-project",
+    confoverrides={"plc_background_analysis": False},
+)
+def test_analysis_foreground(app, status, warning):
+    """Without a background analysis, sources are analysed when the builder starts."""
+    assert not hasattr(app, "_plc_analysis")
+    assert app._interpreter.get_object("FB_MyBlock")
+
+
+@pytest.mark.sphinx(
+    "dummy",
+    testroot="plc-project",
+    parallel=2,
+    confoverrides={"plc_parse_workers": 2},
+)
+def test_analysis_background_workers(app, status, warning):
+    """Worker processes can be used from the background, documents read in parallel."""
+    app.build()
+
+    assert app._plc_analysis is None
+    assert app._interpreter.get_object("FB_MyBlock")
@@ -0,0 +1,60 @@
+"""
+Test the generator of synthetic projects used by the benchmarks.
+"""
+
+import importlib.util
+import os
+
+import pytest
+
+from plcdoc.interpreter import PlcInterpreter
+
+BENCHMARKS_DIR = os.path.join(os.path.dirname(__file__), "..", "benchmarks")
+
+
+@pytest.fixture(scope="module")
+def generator():
+    path = os.path.join(BENCHMARKS_DIR, "generate_project.py")
+    spec = importlib.util.spec_from_file_location("generate_project", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_generate_project(generator, tmp_path):
+    """Test all generated objects are parsed."""
+    size = generator.ProjectSize(pous=7, structs=3, enums=2, gvls=2, depth=2, fanout=2)
+    project_file = generator.generate_project(str(tmp_path), size)
+
+    interpreter = PlcInterpreter()
+    assert interpreter.parse_plc_project(project_file)
+
+    assert len(interpreter._models["functionblock"]) == 7
+    assert len(interpreter._models["function"]) == 7 * size.methods  # Methods
+    assert len(interpreter._models["property"]) == 7 * size.properties
+    assert len(interpreter._models["struct"]) == 3
+    assert len(interpreter._models["enum"]) == 2
+    assert len(interpreter._models["gvl"]) == 2
+
+    blocks = interpreter.get_objects_in_folder("POUs", recursive=True)
+    assert len(blocks) == 7
+    with pytest.raises(KeyError):
+        interpreter.get_objects_in_folder("POUs")  # Only subfolders
+
+
+def test_generate_project_for_objects(generator):
+    size = generator.ProjectSize.for_objects(1000)
+    assert size.objects == 1000
+
+
+def test_generate_project_seed(generator, tmp_path):
+    """Test the same seed results in the same project."""
+    size = generator.ProjectSize(pous=5, structs=2, enums=1, gvls=1)
+    contents = []
+    for name in ("a", "b"):
+        project_file = generator.generate_project(str(tmp_path / name), size, seed=3)
+        folder = os.path.join(os.path.dirname(project_file), "POUs", "Folder0_0")
+        with open(os.path.join(folder, "Folder1_0", "FB_Block0.TcPOU")) as fh:
+            contents.append(fh.read())
+
+    assert contents[0] == contents[1]
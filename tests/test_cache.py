@@ -0,0 +1,197 @@
+"""
+Test the persistent cache of parsed PLC files.
+"""
+
+import os
+import re
+import pickle
+import shutil
+
+import pytest
+
+from plcdoc.cache import ParseCache
+from plcdoc.interpreter import PlcInterpreter
+
+CODE_DIR = os.path.join(os.path.dirname(__file__), "plc_code", "TwinCAT PLC", "MyPLC")
+
+FILES = [
+    "POUs/FB_MyBlock.TcPOU",
+    "POUs/RegularFunction.TcPOU",
+    "DUTs/E_Options.TcDUT",
+    "GVLs/GVL_Main.TcGVL",
+]
+
+
+@pytest.fixture()
+def cache(tmp_path):
+    return ParseCache(str(tmp_path / "cache"))
+
+
+def test_cache_hit(cache, monkeypatch):
+    """Parse files twice, the second time should not need any parsing."""
+    files = [os.path.join(CODE_DIR, file) for file in FILES]
+
+    interpreter = PlcInterpreter(cache)
+    assert interpreter.parse_source_files(files)
+    assert cache.misses == len(files) and cache.hits == 0
+
+    def fail(*args, **kwargs):
+        pytest.fail("Declaration was parsed despite a cache hit")
+
+    interpreter = PlcInterpreter(cache)
+    monkeypatch.setattr(interpreter, "_parse_declaration", fail)
+    assert interpreter.parse_source_files(files)
+    assert cache.hits == len(files)
+
+    fb = interpreter.get_object("FB_MyBlock")
+    assert fb.file == files[0]
+    assert "MyMethod" in fb.children
+    assert [var.name for var in fb.get_args()] == [
+        "someInput",
+        "otherInput",
+        "secondClause",
+        "myOutput",
+    ]
+    assert interpreter.get_object("GVL_Main").objtype == "gvl"
+
+
+def test_cache_moved_file(cache, tmp_path):
+    """A cached result should be valid for a file with identical content elsewhere."""
+    original = os.path.join(CODE_DIR, FILES[0])
+    copy = str(tmp_path / "FB_MyBlock.TcPOU")
+    shutil.copy(original, copy)
+
+    PlcInterpreter(cache).parse_source_files([original])
+
+    interpreter = PlcInterpreter(cache)
+    interpreter.parse_source_files([copy])
+    assert cache.hits == 1
+    assert interpreter.get_object("FB_MyBlock").file == copy
+    assert interpreter.get_object("FB_MyBlock.MyMethod").file == copy
+
+
+def test_cache_failure(cache, caplog):
+    """Parse failures are cached too, and still reported."""
+    file = os.path.join(
+        os.path.dirname(__file__),
+        "roots",
+        "test-plc-project",
+        "src_plc",
+        "POUs",
+        "F_SyntaxError.TcPOU",
+    )
+
+    PlcInterpreter(cache).parse_source_files([file])
+    caplog.clear()
+
+    interpreter = PlcInterpreter(cache)
+    interpreter.parse_source_files([file])
+    assert cache.hits == 1
+    assert "Error parsing node" in caplog.text
+
+    with pytest.raises(KeyError):
+        interpreter.get_object("F_SyntaxError")
+
+
+def test_cache_corrupt_entry(cache):
+    key = cache.make_key(b"content")
+    cache.put(key, [1, 2, 3])
+    assert cache.get(key) == [1, 2, 3]
+
+    with open(cache._path(key), "wb") as fh:
+        fh.write(b"garbage")
+
+    assert cache.get(key) is None
+
+
+@pytest.mark.skipif(os.name != "posix", reason="Needs POSIX permissions")
+def test_cache_permissions(tmp_path):
+    """Entries get the permissions of the umask, to share the cache with other users."""
+    umask = os.umask(0o022)
+    try:
+        cache = ParseCache(str(tmp_path))
+    finally:
+        os.umask(umask)
+
+    key = cache.make_key(b"content")
+    cache.put(key, [1, 2, 3])
+    assert os.stat(cache._path(key)).st_mode & 0o777 == 0o644
+
+
+def test_cache_key():
+    """Keys change with the content and the name of a file."""
+    cache = ParseCache("unused")
+    key = cache.make_key(b"content", "GVL_Main.TcGVL")
+    assert key == cache.make_key(b"content", "GVL_Main.TcGVL")
+    assert key != cache.make_key(b"content2", "GVL_Main.TcGVL")
+    assert key != cache.make_key(b"content", "GVL_Other.TcGVL")
+
+
+def test_cache_backend(cache):
+    """Results of one parser backend are not used for another."""
+    key = cache.make_key(b"content", "GVL_Main.TcGVL")
+    assert key == cache.make_key(b"content", "GVL_Main.TcGVL", "textx")
+    assert key != cache.make_key(b"content", "GVL_Main.TcGVL", "fast")
+
+    files = [os.path.join(CODE_DIR, file) for file in FILES]
+    assert PlcInterpreter(cache).parse_source_files(files)
+    assert PlcInterpreter(cache, backend="fast").parse_source_files(files)
+    assert cache.hits == 0
+
+
+def test_cache_prune(tmp_path):
+    """The least recently used entries are evicted when the size cap is exceeded."""
+    value = b"x" * 1000
+    size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    cache = ParseCache(str(tmp_path), max_size=3 * size)
+
+    keys = [cache.make_key(str(i).encode()) for i in range(5)]
+    for i, key in enumerate(keys):
+        cache.put(key, value)
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+
+    cache.get(keys[0])  # Use the oldest one again
+    cache.prune()
+
+    remaining = [key for key in keys if os.path.exists(cache._path(key))]
+    assert remaining == [keys[0], keys[3], keys[4]]
+
+
+def test_cache_changed_declaration(cache, tmp_path, monkeypatch):
+    """Only the changed declarations of a changed file are parsed again."""
+    file = str(tmp_path / "FB_MyBlock.TcPOU")
+    shutil.copy(os.path.join(CODE_DIR, FILES[0]), file)
+
+    first = PlcInterpreter(cache)
+    first.parse_source_files([file])
+
+    parsed = []
+    original = PlcInterpreter._parse_declaration_text
+
+    def parse(self, item):
+        parsed.append(item.name)
+        return original(self, item)
+
+    monkeypatch.setattr(PlcInterpreter, "_parse_declaration_text", parse)
+
+    # In the same interpreter and in a new one (through the cache)
+    for interpreter, return_type in [
+        (first, "INT"),
+        (PlcInterpreter(cache), "BOOL"),
+    ]:
+        with open(file, "r") as fh:
+            content = fh.read()
+        with open(file, "w") as fh:
+            fh.write(
+                re.sub(
+                    r"METHOD AnotherMethod : \w+",
+                    "METHOD AnotherMethod : " + return_type,
+                    content,
+                )
+            )
+
+        parsed.clear()
+        interpreter.parse_source_files([file])
+        assert parsed == ["AnotherMethod"]
+        method = interpreter.get_object("FB_MyBlock.AnotherMethod")
+        assert getattr(method._model, "return").name == return_type
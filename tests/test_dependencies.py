@@ -0,0 +1,79 @@
+"""
+Test that documents are updated when the PLC objects they use change.
+"""
+
+import os
+import shutil
+import time
+
+import pytest
+from sphinx.testing.path import path
+
+ROOT = os.path.join(os.path.dirname(__file__), "roots", "test-plc-project")
+
+
+@pytest.fixture()
+def srcdir(tmp_path):
+    """Copy of the project root, with some documents using PLC objects."""
+    srcdir = tmp_path / "plc-project"
+    shutil.copytree(ROOT, srcdir, ignore=shutil.ignore_patterns("__pycache__"))
+    (srcdir / "index.rst").write_text(
+        ".. toctree::\n\n   block\n   function\n   folder\n"
+    )
+    (srcdir / "block.rst").write_text(".. plc:autofunctionblock:: FB_MyBlock\n")
+    (srcdir / "function.rst").write_text(".. plc:autofunction:: PlainFunction\n")
+    (srcdir / "folder.rst").write_text(".. plc:autofolder:: DUTs\n")
+    return path(str(srcdir))
+
+
+def touch(file):
+    """Make sure a file is newer than the last build."""
+    later = time.time() + 10
+    os.utime(file, (later, later))
+
+
+def test_dependencies_recorded(make_app, srcdir):
+    app = make_app("dummy", srcdir=srcdir)
+    app.build()
+
+    block = os.path.join("src_plc", "POUs", "FB_MyBlock.TcPOU")
+    assert block in app.env.dependencies["block"]
+    assert block not in app.env.dependencies["function"]
+
+    used = app.env.plc_dependencies["block"]
+    fingerprint = app._interpreter.get_object("FB_MyBlock").fingerprint
+    assert used[("object", "functionblock", "FB_MyBlock")] == fingerprint
+    assert ("folder", "DUTs", False) in app.env.plc_dependencies["folder"]
+
+
+def test_dependencies_changed_file(make_app, srcdir):
+    make_app("dummy", srcdir=srcdir).build()
+
+    file = srcdir / "src_plc" / "POUs" / "FB_MyBlock.TcPOU"
+    file.write_text(file.read_text().replace("FB_MyBlock", "FB_MyBlock (* Hi *)", 1))
+    touch(file)
+
+    app = make_app("dummy", srcdir=srcdir)
+    assert app.builder.read() == ["block"]
+
+
+def test_dependencies_changed_folder(make_app, srcdir):
+    """A new object in a folder is found, even though no used file changed."""
+    make_app("dummy", srcdir=srcdir).build()
+
+    duts = srcdir / "src_plc" / "DUTs"
+    shutil.copy(duts / "E_Error.TcDUT", duts / "E_Other.TcDUT")
+    (duts / "E_Other.TcDUT").write_text(
+        (duts / "E_Other.TcDUT").read_text().replace("E_Error", "E_Other")
+    )
+    project = srcdir / "src_plc" / "MyPLC.plcproj"
+    project.write_text(
+        project.read_text().replace(
+            '<Compile Include="DUTs\\E_Error.TcDUT">',
+            '<Compile Include="DUTs\\E_Other.TcDUT" />\n'
+            '    <Compile Include="DUTs\\E_Error.TcDUT">',
+        )
+    )
+
+    app = make_app("dummy", srcdir=srcdir)
+    assert app.builder.read() == ["folder"]
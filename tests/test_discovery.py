@@ -0,0 +1,106 @@
+"""
+Test the discovery of PLC source files.
+"""
+
+import os
+
+import pytest
+
+from plcdoc import discovery
+from plcdoc.discovery import find_source_files
+
+FILES = [
+    "src/POUs/FB_A.TcPOU",
+    "src/POUs/Sub/FB_B.TcPOU",
+    "src/POUs/notes.txt",
+    "src/DUTs/ST_C.TcDUT",
+    "src/GVLs/GVL_D.TcGVL",
+    "src/ITFs/I_E.TcIO",
+    "src/PlcTask.TcTTO",
+    "src/_Boot/FB_Boot.TcPOU",
+    "src/_Libraries/Lib/FB_Lib.TcPOU",
+    "src/.hidden/FB_Hidden.TcPOU",
+    "other/FB_Other.TcPOU",
+]
+
+
+@pytest.fixture()
+def tree(tmp_path, monkeypatch):
+    for file in FILES:
+        path = tmp_path / file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _norm(files):
+    return [file.replace(os.sep, "/") for file in files]
+
+
+def test_wildcards(tree):
+    found = find_source_files(["src/POUs/*", "src/**/*.TcPOU", "src/*/*.Tc*"])
+    assert [_norm(files) for files in found] == [
+        ["src/POUs/FB_A.TcPOU"],
+        ["src/POUs/FB_A.TcPOU", "src/POUs/Sub/FB_B.TcPOU"],
+        [
+            "src/DUTs/ST_C.TcDUT",
+            "src/GVLs/GVL_D.TcGVL",
+            "src/ITFs/I_E.TcIO",
+            "src/POUs/FB_A.TcPOU",
+        ],
+    ]
+
+
+def test_paths(tree):
+    """Existing files are used as they are, absolute patterns work as well."""
+    found = find_source_files(
+        ["src/PlcTask.TcTTO", "src/POUs/Missing.TcPOU", str(tree / "other" / "*")]
+    )
+    assert found == [
+        ["src/PlcTask.TcTTO"],
+        [],
+        [str(tree / "other" / "FB_Other.TcPOU")],
+    ]
+
+
+def test_exclude(tree):
+    found = find_source_files(["**/*.TcPOU"])
+    assert _norm(found[0]) == [
+        "other/FB_Other.TcPOU",
+        "src/POUs/FB_A.TcPOU",
+        "src/POUs/Sub/FB_B.TcPOU",
+    ]
+
+    found = find_source_files(["**/*.TcPOU"], exclude=["Sub", "other/*.TcPOU"])
+    assert _norm(found[0]) == [
+        "src/POUs/FB_A.TcPOU",
+        "src/_Boot/FB_Boot.TcPOU",
+        "src/_Libraries/Lib/FB_Lib.TcPOU",
+    ]
+
+    # The literal start of a pattern is not excluded
+    found = find_source_files(["src/_Libraries/**/*.TcPOU", "src/**/*.TcDUT"])
+    assert _norm(found[0]) == ["src/_Libraries/Lib/FB_Lib.TcPOU"]
+    assert _norm(found[1]) == ["src/DUTs/ST_C.TcDUT"]
+
+
+def test_single_walk(tree, monkeypatch):
+    """Each folder is listed once, folders without possible matches not at all."""
+    scanned = []
+    scandir = os.scandir
+
+    def scandir_counted(path):
+        scanned.append(os.path.normpath(path).replace(os.sep, "/"))
+        return scandir(path)
+
+    monkeypatch.setattr(discovery.os, "scandir", scandir_counted)
+    find_source_files(["src/POUs/*.TcPOU", "src/*/*.TcDUT", "src/POUs/**/*.TcPOU"])
+    assert sorted(scanned) == [
+        "src",
+        "src/DUTs",
+        "src/GVLs",
+        "src/ITFs",
+        "src/POUs",
+        "src/POUs/Sub",
+    ]
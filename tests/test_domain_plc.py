@@ -19,3 +19,80 @@ def test_domain_plc_objects(app, status, warning):
     assert objects["ST_MyStruct"][2] == "struct"
     assert objects["ST_MyStruct2"][2] == "struct"
     assert objects["GVL_MyList"][2] == "gvl"
+
+
+@pytest.mark.sphinx("dummy", testroot="domain-plc")
+def test_domain_plc_find_obj(app, status, warning):
+    """Relaxed searching uses an index, which should match a plain search."""
+    app.builder.build_all()
+
+    domain = app.env.domains["plc"]
+    assert list(domain.suffixes["method"]["SomeMethod"]) == [
+        "FunctionBlockWithMethod.SomeMethod"
+    ]
+
+    def find_names(name, typ):
+        return [n for n, _ in domain.find_obj(app.env, None, None, name, typ, 1)]
+
+    for name in domain.objects:
+        for typ in [None, "meth", "type", "func"]:
+            objtypes = (
+                list(domain.object_types)
+                if typ is None
+                else domain.objtypes_for_role(typ)
+            )
+            suffix = name.split(".")[-1]
+            if suffix in domain.objects and domain.objects[suffix].objtype in objtypes:
+                continue  # Exact match is found first
+
+            expected = [
+                other
+                for other, entry in domain.objects.items()
+                if other.endswith("." + suffix) and entry.objtype in objtypes
+            ]
+            assert find_names(suffix, typ) == expected
+
+    assert find_names("DoesNotExist", None) == []
+    assert find_names("DoesNotExist", None) == []  # From memory
+
+    # Re-noting an object with another type updates the index
+    app.env.temp_data["docname"] = "index"
+    domain.note_object("FunctionBlockWithMethod.SomeMethod", "function", "id")
+    assert "SomeMethod" not in domain.suffixes["method"]
+    assert find_names("SomeMethod", "func") == ["FunctionBlockWithMethod.SomeMethod"]
+
+
+@pytest.mark.sphinx("dummy", testroot="domain-plc-parallel", parallel=2)
+def test_domain_plc_parallel(app, status, warning):
+    """Objects noted in parallel processes are merged."""
+    app.builder.build_all()
+
+    domain = app.env.domains["plc"]
+    for i in range(1, 7):
+        assert f"FB_Block{i}.M_Method" in domain.documents[f"doc{i}"]
+        assert domain.objects[f"F_Function{i}"].objtype == "function"
+
+    assert "reference target not found" not in warning.getvalue()
+
+    # Depending on the order of merging, either one is reported
+    assert "Duplicate object description of F_Function1" in warning.getvalue()
+    assert domain.objects["F_Function1"].docname in ["doc1", "doc6"]
+
+
+@pytest.mark.sphinx("dummy", testroot="domain-plc-parallel")
+def test_domain_plc_clear_doc(app, status, warning):
+    """Objects of a changed document are removed again."""
+    app.builder.build_all()
+
+    domain = app.env.domains["plc"]
+    assert domain.objects["F_Function1"].docname == "doc6"
+    domain.clear_doc("doc6")
+
+    assert "doc6" not in domain.documents
+    assert "F_Function6" not in domain.objects
+    assert "F_Function1" not in domain.objects  # Replaced by the second description
+    assert "FB_Block6.M_Method" not in domain.suffixes["method"]["M_Method"]
+    assert domain.find_obj(app.env, None, None, "F_Function6", "func", 1) == []
+    assert domain.find_obj(app.env, None, None, "FB_Block5", "type", 1) == [
+        ("FB_Block5", domain.objects["FB_Block5"])
+    ]
@@ -0,0 +1,108 @@
+"""
+Test the memory-mapped index of parsed PLC objects.
+"""
+
+import os
+
+import pytest
+
+from plcdoc.frozen import FrozenIndex
+from plcdoc.interpreter import PlcInterpreter
+
+PROJECT = os.path.join(
+    os.path.dirname(__file__), "roots", "test-plc-project", "src_plc", "MyPLC.plcproj"
+)
+
+
+@pytest.fixture()
+def interpreter():
+    interpreter = PlcInterpreter()
+    assert interpreter.parse_plc_project(PROJECT)
+    return interpreter
+
+
+def test_index(interpreter, tmp_path):
+    """Objects loaded from the index are the same as the parsed ones."""
+    path = str(tmp_path / "index.bin")
+    interpreter.freeze(path)
+    frozen = PlcInterpreter.from_index(path, lazy_cache_size=1)
+    assert not frozen._models
+    assert frozen._root_folder == interpreter._root_folder
+
+    for models in interpreter._models.values():
+        for name, obj in models.items():
+            other = frozen.get_object(name, obj.objtype)
+            assert other.fingerprint == obj.fingerprint
+            assert other.file == obj.file
+    assert len(frozen._file_objects) == 1  # Only the file used last is kept
+    (filepath,) = frozen._file_objects
+    assert frozen._lazy_size == frozen._index.get_size(filepath) > 0
+
+    with pytest.raises(KeyError):
+        frozen.get_object("DoesNotExist")
+
+
+def test_index_folders(interpreter, tmp_path):
+    """Folders list the same objects, in the same order."""
+    path = str(tmp_path / "index.bin")
+    interpreter.freeze(path)
+    frozen = PlcInterpreter.from_index(path)
+
+    for folder in ["", "POUs", "DUTs"]:
+        for recursive in [False, True]:
+            try:
+                expected = interpreter.get_objects_in_folder(folder, recursive)
+            except KeyError:
+                with pytest.raises(KeyError):
+                    frozen.get_objects_in_folder(folder, recursive)
+                continue
+            objects = frozen.get_objects_in_folder(folder, recursive)
+            assert [obj.name for obj in objects] == [obj.name for obj in expected]
+
+    with pytest.raises(KeyError):
+        frozen.get_objects_in_folder("DoesNotExist")
+
+
+def test_index_file(interpreter, tmp_path):
+    """The index can be read directly, and replaced atomically."""
+    path = str(tmp_path / "index.bin")
+    interpreter.freeze(path)
+    interpreter.freeze(path)
+    assert os.listdir(tmp_path) == ["index.bin"]
+
+    index = FrozenIndex(path)
+    filepath = index.find_file("FB_MyBlock")
+    assert filepath == interpreter.get_object("FB_MyBlock").file
+    assert [obj.name for obj in index.load(filepath)] == ["FB_MyBlock"]
+    assert index.find_file("DoesNotExist") is None
+    with pytest.raises(KeyError):
+        index.load("DoesNotExist.TcPOU")
+    index.close()
+
+    with open(path, "wb") as fh:
+        fh.write(b"\0" * 100)
+    with pytest.raises(ValueError):
+        FrozenIndex(path)
+
+
+def test_freeze_lazy(tmp_path):
+    """Only fully parsed projects can be frozen."""
+    interpreter = PlcInterpreter(lazy=True)
+    assert interpreter.parse_plc_project(PROJECT)
+    with pytest.raises(ValueError):
+        interpreter.freeze(str(tmp_path / "index.bin"))
+
+
+@pytest.mark.sphinx(
+    "dummy",
+    testroot="plc-project",
+    parallel=2,
+    confoverrides={"plc_shared_index": True},
+)
+def test_shared_index(app, status, warning):
+    """Sphinx builds read the objects from the shared index."""
+    app.build()
+
+    assert app._interpreter._index is not None
+    assert os.path.isfile(os.path.join(app.doctreedir, "plc_index.bin"))
+    assert "ERROR" not in warning.getvalue()
@@ -0,0 +1,176 @@
+"""
+Test the relations between PLC objects by EXTENDS and IMPLEMENTS.
+"""
+
+import os
+import shutil
+
+import pytest
+
+from plcdoc.interpreter import PlcInterpreter
+
+PROJECT_DIR = os.path.join(
+    os.path.dirname(__file__), "plc_code", "TwinCAT PLC", "MyPLC"
+)
+
+
+def write_pou(folder, declaration, children=""):
+    """Write a TwinCAT file with a single function block or interface."""
+    words = declaration.split()
+    tag = "Itf" if words[0] == "INTERFACE" else "POU"
+    name = words[1]
+    extension = ".TcIO" if tag == "Itf" else ".TcPOU"
+    path = os.path.join(folder, name + extension)
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(
+            f'<?xml version="1.0" encoding="utf-8"?>\n<TcPlcObject>\n'
+            f'<{tag} Name="{name}"><Declaration><![CDATA[{declaration}\n]]>'
+            f"</Declaration>{children}</{tag}>\n</TcPlcObject>\n"
+        )
+    return path
+
+
+def method(name):
+    return (
+        f'<Method Name="{name}"><Declaration><![CDATA[METHOD {name} : BOOL\n]]>'
+        f"</Declaration></Method>"
+    )
+
+
+@pytest.fixture()
+def interpreter():
+    interpreter = PlcInterpreter()
+    assert interpreter.parse_plc_project(os.path.join(PROJECT_DIR, "MyPLC.plcproj"))
+    return interpreter
+
+
+def test_bases(interpreter):
+    """Function blocks and structs inherit from their bases."""
+    graph = interpreter.get_inheritance()
+    second = interpreter.get_object("FB_SecondBlock")
+    base = interpreter.get_object("FB_MyBlock")
+    assert second.extends == ["FB_MyBlock"]
+    assert graph.get_bases(second) == [base]
+    assert graph.get_bases(base) == []
+    assert graph.get_bases(second) is graph.get_bases(second)  # Memoized
+
+    inherited = graph.get_inherited_children(second)
+    assert list(inherited) == list(base.children)
+    assert interpreter.get_object("FB_SecondBlock.MyMethod", "method") is (
+        base.children["MyMethod"]
+    )
+    with pytest.raises(KeyError):
+        interpreter.get_object("FB_SecondBlock.DoesNotExist")
+
+    structure = interpreter.get_object("MyStructureExtended")
+    members = graph.get_inherited_members(structure)
+    assert [member.name for member in members] == ["member1"]
+
+
+def test_extended_by(interpreter):
+    graph = interpreter.get_inheritance()
+    base = interpreter.get_object("FB_MyBlock")
+    assert graph.get_extended_by(base) == [interpreter.get_object("FB_SecondBlock")]
+    assert graph.get_extended_by(interpreter.get_object("FB_SecondBlock")) == []
+    assert graph.get_extended_by(interpreter.get_object("MyStructure")) == [
+        interpreter.get_object("MyStructureExtended")
+    ]
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_hierarchy(tmp_path, lazy):
+    """Methods are inherited from the nearest base, interfaces through the bases."""
+    write_pou(tmp_path, "INTERFACE I_Base")
+    write_pou(tmp_path, "INTERFACE I_Derived EXTENDS I_Base")
+    write_pou(tmp_path, "INTERFACE I_Other")
+    write_pou(
+        tmp_path,
+        "FUNCTION_BLOCK FB_A IMPLEMENTS I_Derived",
+        method("M1") + method("M2"),
+    )
+    write_pou(tmp_path, "FUNCTION_BLOCK FB_B EXTENDS FB_A", method("M2"))
+    write_pou(
+        tmp_path,
+        "FUNCTION_BLOCK FB_C EXTENDS FB_B IMPLEMENTS I_Other",
+        method("M3"),
+    )
+    write_pou(tmp_path, "FUNCTION_BLOCK FB_D EXTENDS FB_B")
+    write_pou(tmp_path, "FUNCTION_BLOCK FB_Library EXTENDS Tc3_Module.FB_Unknown")
+
+    interpreter = PlcInterpreter(lazy=lazy, lazy_cache_size=1)
+    assert interpreter.parse_source_files([str(tmp_path / "*")])
+    graph = interpreter.get_inheritance()
+
+    fb_c = interpreter.get_object("FB_C")
+    assert [base.name for base in graph.get_bases(fb_c)] == ["FB_B", "FB_A"]
+    inherited = graph.get_inherited_children(fb_c)
+    assert sorted(inherited) == ["M1", "M2"]
+    assert inherited["M2"].file.endswith("FB_B.TcPOU")
+
+    names = [interface.name for interface in graph.get_interfaces(fb_c)]
+    assert names == ["I_Other", "I_Derived", "I_Base"]
+
+    fb_b = interpreter.get_object("FB_B")
+    assert [obj.name for obj in graph.get_extended_by(fb_b)] == ["FB_C", "FB_D"]
+    i_derived = interpreter.get_object("I_Derived")
+    assert [obj.name for obj in graph.get_implemented_by(i_derived)] == ["FB_A"]
+    i_base = interpreter.get_object("I_Base")
+    assert [obj.name for obj in graph.get_extended_by(i_base)] == ["I_Derived"]
+
+    assert graph.get_bases(interpreter.get_object("FB_Library")) == []
+
+
+def test_cycle(tmp_path, caplog):
+    """A circular hierarchy is reported instead of walked forever."""
+    write_pou(tmp_path, "FUNCTION_BLOCK FB_A EXTENDS FB_C", method("M1"))
+    write_pou(tmp_path, "FUNCTION_BLOCK FB_B EXTENDS FB_A")
+    write_pou(tmp_path, "FUNCTION_BLOCK FB_C EXTENDS FB_B")
+
+    interpreter = PlcInterpreter()
+    assert interpreter.parse_source_files([str(tmp_path / "*")])
+    graph = interpreter.get_inheritance()
+
+    fb_b = interpreter.get_object("FB_B")
+    assert [base.name for base in graph.get_bases(fb_b)] == ["FB_A", "FB_C"]
+    assert "circular hierarchy" in caplog.text
+    assert list(graph.get_inherited_children(fb_b)) == ["M1"]
+    fb_c = interpreter.get_object("FB_C")
+    assert [base.name for base in graph.get_bases(fb_c)] == ["FB_B", "FB_A"]
+    with pytest.raises(KeyError):
+        interpreter.get_object("FB_A.DoesNotExist")
+
+
+def test_reparse(tmp_path):
+    """The graph is made again after parsing."""
+    path = write_pou(tmp_path, "FUNCTION_BLOCK FB_A")
+    write_pou(tmp_path, "FUNCTION_BLOCK FB_B EXTENDS FB_A")
+
+    interpreter = PlcInterpreter()
+    assert interpreter.parse_source_files([str(tmp_path / "*")])
+    graph = interpreter.get_inheritance()
+    assert graph.get_extended_by(interpreter.get_object("FB_A"))
+
+    os.remove(path)
+    write_pou(tmp_path, "FUNCTION_BLOCK FB_A", method("M1"))
+    assert interpreter.parse_source_files([path])
+    assert interpreter.get_inheritance() is not graph
+    assert interpreter.get_object("FB_B.M1")
+
+
+def test_solution(tmp_path):
+    """Bases are looked for in the project of an object first."""
+    for name in ["First", "Second"]:
+        shutil.copytree(PROJECT_DIR, tmp_path / name)
+    projects = "".join(
+        f'<Project Name="{name}" PrjFilePath="{name}\\MyPLC.plcproj"/>'
+        for name in ["First", "Second"]
+    )
+    (tmp_path / "Machine.tsproj").write_text(
+        f"<TcSmProject><Project><Plc>{projects}</Plc></Project></TcSmProject>"
+    )
+
+    interpreter = PlcInterpreter()
+    assert interpreter.parse_plc_project(str(tmp_path / "Machine.tsproj"))
+    graph = interpreter.get_inheritance()
+    second = interpreter.get_object("First.FB_SecondBlock")
+    assert graph.get_bases(second) == [interpreter.get_object("First.FB_MyBlock")]
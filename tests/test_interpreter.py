@@ -4,8 +4,15 @@ Test the PLC interpreter on some TwinCAT source files.
 
 import pytest
 import os
+import shutil
 
-from plcdoc.interpreter import PlcInterpreter, PlcDeclaration
+from plcdoc import interpreter as interpreter_module
+from plcdoc.interpreter import (
+    PlcInterpreter,
+    PlcDeclaration,
+    _DeclarationReader,
+    get_meta_model,
+)
 
 
 CODE_DIR = os.path.join(os.path.dirname(__file__), "plc_code")
@@ -59,6 +66,283 @@ class TestPlcInterpreter:
         result = interpreter.parse_plc_project(file)
         assert result
 
+    def test_project_parallel(self, interpreter):
+        """Parsing with multiple processes should give the exact same result."""
+        file = os.path.join(CODE_DIR, "TwinCAT PLC", "MyPLC", "MyPLC.plcproj")
+        interpreter.parse_plc_project(file)
+
+        interpreter_parallel = PlcInterpreter(workers=2)
+        assert interpreter_parallel.parse_plc_project(file)
+
+        for objtype, models in interpreter._models.items():
+            assert list(interpreter_parallel._models[objtype]) == list(models)
+
+        objects = interpreter.get_objects_in_folder("", recursive=True)
+        objects_parallel = interpreter_parallel.get_objects_in_folder("", True)
+        assert [obj.name for obj in objects_parallel] == [obj.name for obj in objects]
+
+        fb = interpreter_parallel.get_object("FB_MyBlock")
+        assert [var.name for var in fb.get_args()] == [
+            var.name for var in interpreter.get_object("FB_MyBlock").get_args()
+        ]
+
+    def test_project_lazy(self):
+        """In lazy mode files are only parsed when their objects are requested."""
+        file = os.path.join(CODE_DIR, "TwinCAT PLC", "MyPLC", "MyPLC.plcproj")
+        interpreter = PlcInterpreter(lazy=True, lazy_cache_size=1000)
+        assert interpreter.parse_plc_project(file)
+        assert not interpreter._models
+
+        method = interpreter.get_object("FB_MyBlock.MyMethod", "method")
+        assert method.name == "MyMethod"
+        assert list(interpreter._file_objects) == [method.file]
+
+        with pytest.raises(KeyError):
+            interpreter.get_object("FB_MyBlock", "struct")
+
+        names = [obj.name for obj in interpreter.get_objects_in_folder("DUTs")]
+        assert names == ["E_Options", "MyStructure", "MyStructureExtended"]
+
+        # Only the most recently used files are kept, up to their total size
+        sizes = [os.path.getsize(path) for path in interpreter._file_objects]
+        assert sum(sizes) == interpreter._lazy_size <= 1000
+        assert len(sizes) == 2
+        assert "FB_MyBlock" not in interpreter._models["functionblock"]
+        assert "FB_MyBlock.MyMethod" not in interpreter._models["function"]
+
+        # Dropped objects are simply parsed again
+        assert interpreter.get_object("FB_MyBlock").name == "FB_MyBlock"
+
+        with pytest.raises(KeyError):
+            interpreter.get_object("DoesNotExist")
+
+        names = [obj.name for obj in interpreter.get_objects_in_folder("", True)]
+        assert len(names) == 10 and names[:3] == [
+            "E_Options",
+            "MyStructure",
+            "MyStructureExtended",
+        ]
+
+    @pytest.mark.parametrize("extension", [".sln", ".tsproj"])
+    def test_solution(self, interpreter, extension):
+        """All PLC projects of a solution are parsed, each in its own namespace."""
+        file = os.path.join(CODE_DIR, "TwinCAT PLC", "TwinCAT Solution" + extension)
+        assert interpreter.parse_plc_project(file)
+        assert list(interpreter._projects.values()) == ["MyPLC"]
+
+        block = interpreter.get_object("FB_MyBlock")
+        assert interpreter.get_object("MyPLC.FB_MyBlock") is block
+        method = interpreter.get_object("MyPLC.FB_MyBlock.MyMethod", "method")
+        assert method is interpreter.get_object("FB_MyBlock.MyMethod", "method")
+
+        names = [obj.name for obj in interpreter.get_objects_in_folder("MyPLC/DUTs")]
+        assert names == ["E_Options", "MyStructure", "MyStructureExtended"]
+        with pytest.raises(KeyError):
+            interpreter.get_objects_in_folder("DUTs")
+
+    def test_solution_projects(self, tmp_path, caplog):
+        """Projects with the same objects are kept apart by their namespace."""
+        project_dir = os.path.join(CODE_DIR, "TwinCAT PLC", "MyPLC")
+        for name in ["First", "Second"]:
+            shutil.copytree(project_dir, tmp_path / name)
+        projects = "".join(
+            f'<Project Name="{name}" PrjFilePath="{name}\\MyPLC.plcproj"/>'
+            for name in ["First", "Second", "Missing"]
+        )
+        (tmp_path / "Machine.tsproj").write_text(
+            f"<TcSmProject><Project><Plc>{projects}</Plc></Project></TcSmProject>"
+        )
+        (tmp_path / "Machine.sln").write_text(
+            'Project("{B1E792BE-AA5F-4E3C-8C82-674BF9C0715B}") = "Machine", '
+            '"Machine.tsproj", "{F4E72638-7AAA-400F-A722-C9DE6F5B1048}"\nEndProject\n'
+        )
+
+        interpreter = PlcInterpreter(io_workers=2)
+        assert interpreter.parse_plc_project(str(tmp_path / "Machine.sln"))
+        assert sorted(interpreter._projects.values()) == ["First", "Second"]
+        assert "Could not read PLC project file" in caplog.text
+        assert "declared in both" not in caplog.text  # Separate namespaces
+
+        first = interpreter.get_object("First.FB_MyBlock")
+        second = interpreter.get_object("Second.FB_MyBlock")
+        assert first.file.startswith(str(tmp_path / "First"))
+        assert second.file.startswith(str(tmp_path / "Second"))
+        assert interpreter.get_object("FB_MyBlock") is first  # First project
+        assert interpreter.get_object("FB_MyBlock.MyMethod").file == first.file
+
+        for folder in ["First", "Second"]:
+            objects = interpreter.get_objects_in_folder(folder + "/POUs")
+            assert {os.path.dirname(obj.file) for obj in objects} == {
+                str(tmp_path / folder / "POUs")
+            }
+
+        # Lazy mode and the shared index find the same objects
+        lazy = PlcInterpreter(lazy=True)
+        assert lazy.parse_plc_project(str(tmp_path / "Machine.tsproj"))
+        assert lazy.get_object("First.FB_MyBlock.MyMethod").file == first.file
+        assert lazy.get_object("Second.FB_MyBlock").file == second.file
+        assert lazy.get_object("FB_MyBlock").file == first.file
+
+        interpreter.freeze(str(tmp_path / "index.bin"))
+        frozen = PlcInterpreter.from_index(str(tmp_path / "index.bin"))
+        assert frozen.get_object("First.FB_MyBlock").file == first.file
+        assert frozen.get_object("Second.FB_MyBlock").file == second.file
+        assert frozen.get_object("FB_MyBlock").file == first.file
+        names = [obj.name for obj in frozen.get_objects_in_folder("Second/DUTs")]
+        assert names == ["E_Options", "MyStructure", "MyStructureExtended"]
+
+    def test_objects_in_folder(self, interpreter):
+        """Folders can be listed with or without their subfolders."""
+        interpreter._root_folder = CODE_DIR  # Pretend this is a project
+        files = [
+            os.path.join(CODE_DIR, "TwinCAT PLC", "MyPLC", file) for file in self.FILES
+        ]
+        interpreter.parse_source_files(files)
+
+        pous = [
+            obj.name
+            for obj in interpreter.get_objects_in_folder("TwinCAT PLC/MyPLC/POUs")
+        ]
+        assert pous == [
+            "PlainFunction",
+            "RegularFunction",
+            "PlainFunctionBlock",
+            "FB_MyBlock",
+            "FB_SecondBlock",
+            "MAIN",
+        ]
+
+        with pytest.raises(KeyError):
+            interpreter.get_objects_in_folder("TwinCAT PLC/MyPLC")
+
+        names = [
+            obj.name
+            for obj in interpreter.get_objects_in_folder("TwinCAT PLC", recursive=True)
+        ]
+        assert names == pous + ["E_Options", "GVL_Main"]
+
+        # Dropping objects again also drops their folders
+        for obj in interpreter.get_objects_in_folder("TwinCAT PLC/MyPLC/DUTs"):
+            interpreter._remove_model(obj)
+        with pytest.raises(KeyError):
+            interpreter.get_objects_in_folder("TwinCAT PLC/MyPLC/DUTs")
+        assert "DUTs" not in interpreter._folders.find("TwinCAT PLC/MyPLC").children
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_project_prefetch(self, interpreter, workers):
+        """Reading files ahead in threads should give the exact same result."""
+        file = os.path.join(CODE_DIR, "TwinCAT PLC", "MyPLC", "MyPLC.plcproj")
+        interpreter.parse_plc_project(file)
+
+        interpreter_io = PlcInterpreter(workers=workers, io_workers=3)
+        assert interpreter_io.parse_plc_project(file)
+
+        for objtype, models in interpreter._models.items():
+            assert list(interpreter_io._models[objtype]) == list(models)
+            for name, obj in models.items():
+                other = interpreter_io._models[objtype][name]
+                assert other.fingerprint == obj.fingerprint
+
+        interpreter_lazy = PlcInterpreter(lazy=True, io_workers=3)
+        assert interpreter_lazy.parse_plc_project(file)
+        names = [obj.name for obj in interpreter_lazy.get_objects_in_folder("", True)]
+        objects = interpreter.get_objects_in_folder("", True)
+        assert names == [obj.name for obj in objects]
+
+    def test_prefetch_order(self):
+        """Files are read ahead, but given in their original order."""
+        interpreter = PlcInterpreter(io_workers=2)
+        read = []
+
+        def function(item):
+            read.append(item)
+            return item * 2
+
+        results = interpreter._prefetch(function, range(20))
+        assert next(results) == (0, 0)
+        assert len(read) <= 5  # Two per thread ahead of the first
+        assert list(results) == [(item, item * 2) for item in range(1, 20)]
+
+    def test_meta_model_shared(self, monkeypatch):
+        """The grammar is compiled on first use only, and then shared."""
+        monkeypatch.setattr(interpreter_module, "_meta_models", {})
+        file = os.path.join(CODE_DIR, "TwinCAT PLC", "MyPLC", "POUs", "MAIN.TcPOU")
+
+        interpreter = PlcInterpreter()
+        assert not interpreter_module._meta_models
+        assert interpreter.parse_source_files([file])
+        meta_model = interpreter_module._meta_models[False]
+
+        assert PlcInterpreter().parse_source_files([file])
+        assert get_meta_model() is meta_model
+
+    def test_duplicate_sources(self, interpreter, tmp_path, caplog):
+        """Files matched multiple times are parsed once, duplicates are reported."""
+        project_dir = os.path.join(CODE_DIR, "TwinCAT PLC", "MyPLC")
+        link = tmp_path / "link"
+        link.symlink_to(project_dir)
+        paths = [
+            os.path.join(project_dir, "DUTs", "*.TcDUT"),
+            os.path.join(project_dir, "DUTs", "E_*.TcDUT"),
+            str(link / "DUTs" / "E_Options.TcDUT"),
+        ]
+
+        files = interpreter.resolve_source_files(paths)
+        assert len(files) == len(set(files)) == 3
+        assert all(file.startswith(project_dir) for file in files)
+
+        parsed = []
+        original = interpreter._parse_file
+        interpreter._parse_file = lambda file: parsed.append(file) or original(file)
+        assert interpreter.parse_source_files(paths)
+        assert parsed == files
+        assert "declared in both" not in caplog.text
+
+        # The same file again replaces its objects, another file is a duplicate
+        duplicate = tmp_path / "E_Options.TcDUT"
+        duplicate.write_bytes((link / "DUTs" / "E_Options.TcDUT").read_bytes())
+        assert interpreter.parse_source_files([files[0], str(duplicate)])
+        assert caplog.text.count("declared in both") == 1
+        assert interpreter.get_object("E_Options").file == str(duplicate)
+
+    def test_memoization(self, interpreter):
+        """TextX with memoization should give the exact same result."""
+        file = os.path.join(CODE_DIR, "TwinCAT PLC", "MyPLC", "MyPLC.plcproj")
+        interpreter.parse_plc_project(file)
+
+        interpreter_memo = PlcInterpreter(memoization=True)
+        assert interpreter_memo.parse_plc_project(file)
+        assert get_meta_model(True) is not get_meta_model(False)
+
+        for objtype, models in interpreter._models.items():
+            for name, obj in models.items():
+                other = interpreter_memo._models[objtype][name]
+                assert other.fingerprint == obj.fingerprint
+
+    def test_declaration_reader(self):
+        """Only declarations should be read from the XML."""
+        project_dir = os.path.join(CODE_DIR, "TwinCAT PLC", "MyPLC")
+        with open(os.path.join(project_dir, "POUs", "FB_MyBlock.TcPOU"), "rb") as fh:
+            content = fh.read()
+
+        reader = _DeclarationReader(PlcInterpreter.XML_TYPES)
+        reader.read(content)
+        assert reader.is_plc_object and not reader.skipped
+        assert len(reader.objects) == 1
+        fb = reader.objects[0]
+        assert fb.tag == "POU" and fb.name == "FB_MyBlock"
+        assert "FUNCTION_BLOCK FB_MyBlock" in fb.declaration
+        methods = [node for node in fb.children if node.declaration is not None]
+        assert [node.name for node in methods] == ["AnotherMethod", "MyMethod"]
+        assert all("METHOD" in node.declaration for node in methods)
+
+        # Non-code objects are not read beyond their opening tag
+        reader = _DeclarationReader(PlcInterpreter.XML_TYPES)
+        with open(os.path.join(project_dir, "PlcTask.TcTTO"), "rb") as fh:
+            reader.read_stream(fh)
+        assert reader.is_plc_object and reader.skipped == ["Task"]
+        assert not reader.objects
+
     external_projects = [
         (
             "extern/lcls-twincat-general/LCLSGeneral/LCLSGeneral/LCLSGeneral.plcproj",
@@ -0,0 +1,67 @@
+"""
+Test the compact copies of parsed declarations.
+"""
+
+import os
+import pickle
+
+import pytest
+
+from plcdoc.interpreter import PlcInterpreter, get_meta_model
+from plcdoc.model import NODE_ATTRIBUTES, detach, make_node
+
+CODE_DIR = os.path.join(os.path.dirname(__file__), "plc_code")
+
+
+def test_attributes_match_grammar():
+    """The detached classes must cover exactly the attributes of the grammar."""
+    rules = {
+        cls.__name__: tuple(cls._tx_attrs)
+        for cls in get_meta_model()
+        if getattr(cls, "_tx_attrs", None)
+    }
+    expected = dict(NODE_ATTRIBUTES)
+    expected["Variable"] = tuple(
+        name for name in expected["Variable"] if name != "kind"
+    )
+    assert rules == expected
+
+
+def test_compact_nodes():
+    with open(os.path.join(CODE_DIR, "FB_MyBlock.txt"), "r") as fh:
+        model = detach(get_meta_model().model_from_str(fh.read()))
+
+    function = model.functions[0]
+    assert type(function).__name__ == "Function"
+    assert not hasattr(function, "__dict__")
+
+    variables = [var for var_list in function.lists for var in var_list.variables]
+    names = [var.type.name for var in variables if var.type.name == "BOOL"]
+    assert len(names) > 1
+    assert all(name is names[0] for name in names)  # Interned
+
+    copy = pickle.loads(pickle.dumps(model))
+    assert type(copy.functions[0]) is type(function)
+    assert [var.name for var in copy.functions[0].lists[0].variables] == [
+        var.name for var in function.lists[0].variables
+    ]
+
+
+def test_make_node_errors():
+    with pytest.raises(TypeError):
+        make_node("CommentLine", text="// Hi", unknown=1)
+
+    with pytest.raises(ValueError):
+        make_node("NotARule")
+
+
+def test_pickle_declaration():
+    file = os.path.join(CODE_DIR, "TwinCAT PLC", "MyPLC", "POUs", "FB_MyBlock.TcPOU")
+    interpreter = PlcInterpreter()
+    interpreter.parse_source_files([file])
+    fb = interpreter.get_object("FB_MyBlock")
+
+    copy = pickle.loads(pickle.dumps(fb))
+    assert copy.name == fb.name and copy.objtype == fb.objtype
+    assert list(copy.children) == list(fb.children)
+    assert [var.name for var in copy.get_args()] == [var.name for var in fb.get_args()]
@@ -159,3 +159,44 @@ def test_autodoc_gvl(app, status, warning):
     assert "   :var BOOL otherSection:" == actual[7]
     assert "   :var INT MY_CONST:" == actual[8]
     assert "   :var UDINT runtime_sec:" == actual[9]
+
+
+@pytest.mark.sphinx("html", testroot="plc-autodoc")
+def test_autodoc_functionblock_inherited(app, status, warning):
+    """Inherited methods and properties are added after the own ones."""
+
+    options = {"members": None}
+    actual = do_autodoc(app, "plc:functionblock", "AutoDerivedBlock", options)
+    assert "   .. plc:method:: DerivedMethod()" in actual
+    assert "   .. plc:method:: AutoMethod(methodInput)" not in actual
+
+    options = {"members": None, "inherited-members": None}
+    actual = do_autodoc(app, "plc:functionblock", "AutoDerivedBlock", options)
+    methods = [line for line in actual if ".. plc:" in line]
+    assert methods == [
+        ".. plc:functionblock:: AutoDerivedBlock(extraInput)",
+        "   .. plc:method:: DerivedMethod()",
+        "   .. plc:method:: AutoMethod(methodInput)",
+        "   .. plc:property:: AutoProperty",
+    ]
+    assert "      Method description!" in actual
+    assert "WARNING" not in warning.getvalue()
+
+
+@pytest.mark.sphinx("html", testroot="plc-autodoc")
+def test_autodoc_struct_inherited(app, status, warning):
+    """Members of the base struct come first."""
+
+    actual = do_autodoc(app, "plc:struct", "AutoDerivedStruct")
+    members = [line for line in actual if ".. plc:member::" in line]
+    assert members == ["   .. plc:member:: someCounter : UDINT"]
+
+    actual = do_autodoc(
+        app, "plc:struct", "AutoDerivedStruct", {"inherited-members": None}
+    )
+    members = [line for line in actual if ".. plc:member::" in line]
+    assert members == [
+        "   .. plc:member:: someDouble : LREAL",
+        "   .. plc:member:: someBoolean : BOOL",
+        "   .. plc:member:: someCounter : UDINT",
+    ]
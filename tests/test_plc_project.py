@@ -4,14 +4,17 @@ Test PLC documentation when loading in a *.plcproj file.
 
 import pytest
 
+from plcdoc.analysis import get_interpreter
+
+from .test_plc_autodoc import do_autodoc
+
 
 @pytest.mark.sphinx("dummy", testroot="plc-project")
 def test_project_interpret(app, status, warning):
     """Test building a document loading a project."""
 
-    assert hasattr(app, "_interpreter")
-
-    interpreter = getattr(app, "_interpreter")
+    interpreter = get_interpreter(app)
+    assert interpreter is not None
 
     expected = {
         "functionblock": ["FB_MyBlock", "FB_SecondBlock", "PlainFunctionBlock"],
@@ -37,3 +40,18 @@ def test_project_build(app, status, warning, caplog):
     app.builder.build_all()
     # Project contains a function with an outright syntax error, but the project
     # completes nonetheless.
+
+
+@pytest.mark.sphinx("dummy", testroot="plc-project")
+def test_project_autofolder(app, status, warning):
+    """Document folders, optionally including their subfolders."""
+
+    def get_objects(result):
+        directives = [line.split("::")[1] for line in result if ".. plc:" in line]
+        return [directive.split("(")[0].strip() for directive in directives]
+
+    objects = get_objects(do_autodoc(app, "plc:folder", "DUTs"))
+    assert "ST_MyStruct" in objects and "FB_MyBlock" not in objects
+
+    objects = get_objects(do_autodoc(app, "plc:folder", ".", {"recursive": None}))
+    assert "ST_MyStruct" in objects and "FB_MyBlock" in objects
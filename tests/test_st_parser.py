@@ -0,0 +1,165 @@
+"""
+Compare the hand-written declaration parser with the TextX grammar.
+"""
+
+import glob
+import os
+import time
+
+import pytest
+from textx import metamodel_from_file, TextXSyntaxError
+
+from plcdoc.interpreter import PlcInterpreter, _DeclarationReader
+from plcdoc.model import detach, DetachedNode
+from plcdoc.st_parser import StDeclarationParser, FastParserError
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+
+code_files = sorted(glob.glob(os.path.join(tests_dir, "plc_code", "*.txt")))
+
+xml_files = sorted(glob.glob(os.path.join(tests_dir, "**", "*.Tc*"), recursive=True))
+
+snippets = [
+    "TYPE E_Empty : ( ) ; END_TYPE",
+    "TYPE E_Numbers : (\n a := 1,\n b := -2,\n c\n) UINT; END_TYPE",
+    "TYPE T_Alias : POINTER TO ARRAY[0..(N - 1), 1..2] OF INT := [1, 2]; END_TYPE",
+    "FUNCTION F_Str : STRING(80)\nVAR_INPUT\n s : STRING[10] := 'it''s';\nEND_VAR",
+    "FUNCTION_BLOCK ABSTRACT FB_Abc EXTENDS FB_Base IMPLEMENTS I_One, I_Two\n"
+    "VAR\n  a, b AT %I* : BOOL; // Comment\n  c : FB_Other(1, 2) ;\nEND_VAR",
+    "METHOD PRIVATE FINAL M_Test : BOOL\n(* Block (* not nested *)\n"
+    "VAR_IN_OUT CONSTANT\n x : REFERENCE TO INT;\nEND_VAR",
+    "PROPERTY PUBLIC Prop : LREAL",
+    "{attribute 'qualified_only'}\nVAR_GLOBAL\n  {attribute 'hide'}\n"
+    "  x : INT := 16#FF;\nEND_VAR",
+    "INTERFACE I_Test EXTENDS I_Base",
+    "TYPE ST_Union :\nUNION\n  a : INT;\n  b : ARRAY [1..2] OF BYTE;\nEND_UNION\n"
+    "END_TYPE",
+    "TYPE ST_Struct EXTENDS ST_Base :\nSTRUCT\n  x : LREAL := 1.5E3;\nEND_STRUCT\n"
+    "END_TYPE",
+    "FUNCTION Broken\nVAR\n  x : ;\nEND_VAR",
+    "TYPE Missing\nEND_TYPE",
+    "// Only a comment",
+    "(* Unclosed comment",
+    "(**)\n(***)\n(* a ** ) b (*)\nPROPERTY P : INT",
+    "FUNCTION F_Test : INT (* Unclosed (* comment *",
+    "FUNCTION F_Test : INT\nVAR\n  s : STRING := '(* not a comment *)'; // (* Line\n"
+    "  t : STRING := 'x'; {attribute 'a}b'}\nEND_VAR",
+    "VAR_GLOBAL\n  x : INT := 5 (* Inside the value *) ; //\n  y : INT;\nEND_VAR",
+]
+
+
+@pytest.fixture(scope="module")
+def meta_model():
+    return metamodel_from_file(
+        os.path.join(tests_dir, "..", "src", "plcdoc", "st_declaration.tx")
+    )
+
+
+def plain(node):
+    """Convert a tree of detached nodes into something comparable."""
+    if isinstance(node, list):
+        return [plain(item) for item in node]
+    if isinstance(node, DetachedNode):
+        return type(node).__name__, {k: plain(getattr(node, k)) for k in node.__slots__}
+    return type(node).__name__, node
+
+
+def assert_equivalent(meta_model, text: str):
+    """Parse with both backends, they must agree (including on failure)."""
+    try:
+        expected = plain(detach(meta_model.model_from_str(text)))
+    except TextXSyntaxError:
+        expected = None
+
+    try:
+        result = plain(StDeclarationParser().parse(text))
+    except FastParserError:
+        result = None
+
+    assert result == expected
+
+
+@pytest.mark.parametrize("file", code_files, ids=os.path.basename)
+def test_equivalent_on_files(meta_model, file):
+    with open(file, "r") as fh:
+        assert_equivalent(meta_model, fh.read())
+
+
+@pytest.mark.parametrize("file", xml_files, ids=os.path.basename)
+def test_equivalent_on_xml(meta_model, file):
+    with open(file, "rb") as fh:
+        content = fh.read()
+
+    reader = _DeclarationReader(PlcInterpreter.XML_TYPES)
+    reader.read(content)
+
+    for obj in reader.objects:
+        for node in [obj] + obj.children:
+            if node.declaration and node.declaration.strip():
+                assert_equivalent(meta_model, node.declaration)
+
+
+@pytest.mark.parametrize("text", snippets)
+def test_equivalent_on_snippets(meta_model, text):
+    assert_equivalent(meta_model, text)
+
+
+@pytest.mark.parametrize("terminated", [True, False])
+def test_large_comments(meta_model, terminated):
+    """Comments of megabytes should be handled in linear time, also if unterminated."""
+    comment = "(*" + "Comment with * stars, (parentheses) and ** ) more\n" * 80_000
+    end = "*)" if terminated else ""
+    text = (
+        f"{comment}*)\nFUNCTION_BLOCK FB_Test\nVAR_INPUT\n  {comment}*)\n"
+        f"  a : INT; {comment}{end}\nEND_VAR\n"
+    )
+    assert len(text) > 12_000_000
+
+    start = time.perf_counter()
+    assert_equivalent(meta_model, text)
+    assert time.perf_counter() - start < 5.0
+
+
+def test_comments_matched_once(monkeypatch):
+    """Comments are found by the pre-scan, not by every rule that allows them."""
+    calls = []
+    original = StDeclarationParser._comment_block
+
+    def comment_block(self):
+        calls.append(self._pos)
+        return original(self)
+
+    monkeypatch.setattr(StDeclarationParser, "_comment_block", comment_block)
+    text = (
+        "(* Header *)\n(* Docs *)\nFUNCTION_BLOCK FB_Test\nVAR_INPUT\n"
+        "  (* Input *)\n  a : INT;\n  (* Trailing *)\nEND_VAR\n"
+    )
+    model = StDeclarationParser().parse(text)
+
+    assert [c.text for c in model.functions[0].comments] == [
+        "(* Header *)",
+        "(* Docs *)",
+    ]
+    assert len(calls) == len(set(calls)) == 4
+
+
+@pytest.mark.parametrize("text", ["", "  \n", "FUNCTION F_Test\u00a0: INT"])
+def test_unsupported(text):
+    """Input that is left to TextX entirely."""
+    with pytest.raises(FastParserError):
+        StDeclarationParser().parse(text)
+
+
+def test_interpreter_fallback(caplog):
+    """A syntax error is still reported through the TextX fallback."""
+    file = os.path.join(
+        tests_dir, "roots", "test-plc-project", "src_plc", "POUs", "F_SyntaxError.TcPOU"
+    )
+    interpreter = PlcInterpreter(backend="fast")
+    interpreter.parse_source_files([file])
+    assert "Error parsing node" in caplog.text
+
+
+def test_interpreter_backend():
+    with pytest.raises(ValueError):
+        PlcInterpreter(backend="unknown")
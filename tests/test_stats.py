@@ -0,0 +1,113 @@
+"""
+Test the statistics of processing PLC files.
+"""
+
+import os
+import json
+
+import pytest
+
+from plcdoc.cache import ParseCache
+from plcdoc.interpreter import PlcInterpreter, get_meta_model
+from plcdoc.stats import ParseStats
+
+PROJECT = os.path.join(
+    os.path.dirname(__file__), "roots", "test-plc-project", "src_plc", "MyPLC.plcproj"
+)
+
+
+def test_stats_disabled():
+    interpreter = PlcInterpreter()
+    assert interpreter.parse_plc_project(PROJECT) is not None
+    assert interpreter.stats is None
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_stats(workers):
+    """Each parsed file is measured, also in worker processes."""
+    interpreter = PlcInterpreter(workers=workers, stats=ParseStats())
+    interpreter.parse_plc_project(PROJECT)
+    stats = interpreter.stats
+
+    assert set(stats.files) == set(interpreter._file_objects)
+
+    fb = stats.files[interpreter.get_object("FB_MyBlock").file]
+    assert not fb.cached and fb.size > 0
+    assert fb.xml_time > 0.0 and fb.parse_time > 0.0
+    names = [name for name, _, _ in fb.declarations]
+    assert names[0] == "FB_MyBlock" and "MyMethod" in names
+    assert fb.parse_time == pytest.approx(sum(t for _, t, _ in fb.declarations))
+
+    totals = stats.totals()
+    assert totals["files"] == len(stats.files)
+    assert totals["failures"] == 1  # The project has a syntax error on purpose
+    assert totals["declarations"] >= len(stats.files)
+
+    slowest = stats.slowest(3)
+    assert len(slowest) == 3
+    assert slowest[0].total_time >= slowest[1].total_time >= slowest[2].total_time
+
+    report = stats.report(3)
+    assert len(report) == 4 and "1 failure(s)" in report[0]
+
+
+def test_stats_cached(tmp_path):
+    """Files loaded from the cache are counted, without parsing times."""
+    cache = ParseCache(str(tmp_path))
+    PlcInterpreter(cache).parse_plc_project(PROJECT)
+
+    interpreter = PlcInterpreter(cache, stats=ParseStats())
+    interpreter.parse_plc_project(PROJECT)
+
+    totals = interpreter.stats.totals()
+    assert totals["cached"] == totals["files"] > 0
+    assert totals["declarations"] == 0 and totals["parse_time"] == 0.0
+
+
+def test_stats_json(tmp_path):
+    interpreter = PlcInterpreter(stats=ParseStats())
+    interpreter.parse_plc_project(PROJECT)
+
+    path = tmp_path / "sub" / "stats.json"
+    interpreter.stats.write_json(str(path))
+    data = json.loads(path.read_text())
+
+    assert data["totals"]["files"] == len(data["files"])
+    assert {"path", "read_time", "xml_time", "declarations"} <= set(data["files"][0])
+
+
+@pytest.mark.sphinx(
+    "dummy",
+    testroot="plc-project",
+    confoverrides={"plc_parse_stats_file": "_build/stats.json"},
+)
+def test_stats_build_finished(app, status, warning):
+    """Statistics are reported and written at the end of the build."""
+    app.build()
+
+    assert "[plcdoc] Processed" in status.getvalue()
+    with open(os.path.join(app.confdir, "_build", "stats.json")) as fh:
+        assert json.load(fh)["totals"]["files"] > 0
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_rule_profile(workers):
+    """Grammar rules are profiled in the main process, in a meta-model of its own."""
+    interpreter = PlcInterpreter(workers=workers, stats=ParseStats(profile_rules=True))
+    interpreter.parse_plc_project(PROJECT)
+    rules = interpreter.stats.rules.rules
+
+    assert rules["Declaration"].attempts == interpreter.stats.totals()["declarations"]
+    variable = rules["Variable"]
+    assert variable.attempts > variable.matches > 0
+    assert variable.time >= variable.own_time > 0.0
+    assert "CommentAny" in rules and not any(name.startswith("__") for name in rules)
+
+    report = interpreter.stats.report(3)
+    assert "Grammar rules" in report[4] and len(report) == 8
+    assert set(interpreter.stats.as_dict()["rules"]) == set(rules)
+
+    # The shared meta-model is left alone
+    assert get_meta_model()._parser_blueprint.parser_model.parse is not (
+        interpreter._get_meta_model()._parser_blueprint.parser_model.parse
+    )
@@ -0,0 +1,224 @@
+"""
+Test the SQLite store of parsed PLC objects.
+"""
+
+import os
+import shutil
+
+import pytest
+
+from plcdoc.interpreter import PlcInterpreter
+from plcdoc.store import SymbolStore
+
+PROJECT_DIR = os.path.join(
+    os.path.dirname(__file__), "roots", "test-plc-project", "src_plc"
+)
+
+
+@pytest.fixture()
+def project(tmp_path):
+    """Copy of the project, to modify files in."""
+    shutil.copytree(PROJECT_DIR, tmp_path / "src_plc")
+    return str(tmp_path / "src_plc" / "MyPLC.plcproj")
+
+
+@pytest.fixture()
+def interpreter(project):
+    interpreter = PlcInterpreter()
+    assert interpreter.parse_plc_project(project)
+    return interpreter
+
+
+def fill(path, project, **kwargs) -> PlcInterpreter:
+    store = SymbolStore(str(path))
+    interpreter = PlcInterpreter(store=store, **kwargs)
+    assert interpreter.parse_plc_project(project)
+    return interpreter
+
+
+def test_store(interpreter, project, tmp_path):
+    """Objects loaded from the store are the same as the parsed ones."""
+    stored = fill(tmp_path / "symbols.sqlite", project, lazy_cache_size=1)
+    assert not stored._models
+
+    for models in interpreter._models.values():
+        for name, obj in models.items():
+            other = stored.get_object(name, obj.objtype)
+            assert other.fingerprint == obj.fingerprint
+            assert other.file == obj.file
+    assert len(stored._file_objects) == 1  # Only the file used last is kept
+
+    with pytest.raises(KeyError):
+        stored.get_object("DoesNotExist")
+
+
+def test_store_folders(interpreter, project, tmp_path):
+    """Folders list the same objects, in the same order."""
+    stored = fill(tmp_path / "symbols.sqlite", project)
+
+    for folder in ["", "POUs", "DUTs"]:
+        for recursive in [False, True]:
+            try:
+                expected = interpreter.get_objects_in_folder(folder, recursive)
+            except KeyError:
+                with pytest.raises(KeyError):
+                    stored.get_objects_in_folder(folder, recursive)
+                continue
+            objects = stored.get_objects_in_folder(folder, recursive)
+            assert [obj.name for obj in objects] == [obj.name for obj in expected]
+
+
+def test_store_reopen(interpreter, project, tmp_path):
+    """A filled store can be used without parsing anything."""
+    path = tmp_path / "symbols.sqlite"
+    fill(path, project)._store.close()
+
+    stored = PlcInterpreter(store=SymbolStore(str(path)))
+    assert stored._root_folder == interpreter._root_folder
+    obj = stored.get_object("FB_MyBlock")
+    assert obj.fingerprint == interpreter.get_object("FB_MyBlock").fingerprint
+
+
+def test_store_incremental(project, tmp_path, monkeypatch):
+    """Only new and changed files are parsed again."""
+    path = tmp_path / "symbols.sqlite"
+    fill(path, project)
+
+    parsed = []
+    process_file = PlcInterpreter._process_file
+
+    def track(self, content, filepath, *args):
+        parsed.append(os.path.basename(filepath))
+        return process_file(self, content, filepath, *args)
+
+    monkeypatch.setattr(PlcInterpreter, "_process_file", track)
+
+    fill(path, project)
+    assert parsed == ["F_SyntaxError.TcPOU"]  # Files with errors are tried again
+    parsed.clear()
+
+    os.remove(os.path.join(os.path.dirname(project), "POUs", "F_SyntaxError.TcPOU"))
+    fill(path, project)
+    assert parsed == []
+
+    pou = os.path.join(os.path.dirname(project), "POUs", "PlainFunction.TcPOU")
+    os.utime(pou)  # Touched, but not changed
+    fill(path, project)
+    assert parsed == []
+
+    with open(pou, "r", encoding="utf-8") as fh:
+        content = fh.read()
+    with open(pou, "w", encoding="utf-8") as fh:
+        fh.write(content.replace("PlainFunction", "OtherFunction"))
+    stored = fill(path, project)
+    assert parsed == ["PlainFunction.TcPOU"]
+    assert stored.get_object("OtherFunction").file == pou
+    with pytest.raises(KeyError):
+        stored.get_object("PlainFunction")
+
+    os.remove(pou)
+    stored = fill(path, project)
+    assert parsed == ["PlainFunction.TcPOU"]
+    with pytest.raises(KeyError):
+        stored.get_object("OtherFunction")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="Needs fork")
+def test_store_fork(project, tmp_path):
+    """A forked process opens its own connection and leaves the inherited one alone."""
+    stored = fill(tmp_path / "symbols.sqlite", project)
+    connection = stored._store._db
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            stored._file_objects.clear()
+            stored._models.clear()
+            ok = stored._store._db is not connection and stored.get_object("FB_MyBlock")
+            stored._store.close()
+        finally:
+            os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+
+    # The connection of the parent still works
+    assert stored._store._db is connection
+    assert stored._store.find_file("FB_MyBlock")
+
+
+def test_store_queries(interpreter, project, tmp_path):
+    """Declarations and their members can be queried directly."""
+    stored = fill(tmp_path / "symbols.sqlite", project)
+    db = stored._store._db
+
+    rows = db.execute(
+        "SELECT d.name, d.objtype FROM declarations d "
+        "JOIN declarations p ON d.parent_id = p.id WHERE p.name = 'FB_MyBlock' "
+        "ORDER BY d.name"
+    ).fetchall()
+    assert ("FB_MyBlock.MyMethod", "method") in rows
+
+    variables = db.execute(
+        "SELECT v.kind, v.name, v.type FROM variables v "
+        "JOIN declarations d ON v.declaration_id = d.id "
+        "WHERE d.name = 'ST_MyStruct' AND d.parent_id IS NULL ORDER BY v.position"
+    ).fetchall()
+    expected = interpreter.get_object("ST_MyStruct")
+    assert [name for _, name, _ in variables] == [
+        member.name for member in expected.members
+    ]
+
+    fingerprint = db.execute(
+        "SELECT fingerprint FROM declarations WHERE name = 'FB_MyBlock'"
+    ).fetchone()[0]
+    assert fingerprint == interpreter.get_object("FB_MyBlock").fingerprint
+
+
+def test_store_solution(tmp_path, caplog):
+    """Objects of projects in a solution are stored under their namespace too."""
+    code_dir = os.path.join(os.path.dirname(__file__), "plc_code")
+    project_dir = os.path.join(code_dir, "TwinCAT PLC", "MyPLC")
+    for name in ["First", "Second"]:
+        shutil.copytree(project_dir, tmp_path / name)
+    projects = "".join(
+        f'<Project Name="{name}" PrjFilePath="{name}\\MyPLC.plcproj"/>'
+        for name in ["First", "Second"]
+    )
+    (tmp_path / "Machine.tsproj").write_text(
+        f"<TcSmProject><Project><Plc>{projects}</Plc></Project></TcSmProject>"
+    )
+
+    path = tmp_path / "symbols.sqlite"
+    stored = fill(path, str(tmp_path / "Machine.tsproj"), workers=2)
+    assert sorted(stored._projects.values()) == ["First", "Second"]
+    assert "declared in both" not in caplog.text
+
+    reopened = PlcInterpreter(store=SymbolStore(str(path)))
+    first = reopened.get_object("First.FB_MyBlock")
+    second = reopened.get_object("Second.FB_MyBlock")
+    assert first.file.startswith(str(tmp_path / "First"))
+    assert second.file.startswith(str(tmp_path / "Second"))
+    assert reopened.get_object("FB_MyBlock").file == first.file
+    names = [obj.name for obj in reopened.get_objects_in_folder("Second/DUTs")]
+    assert names == ["E_Options", "MyStructure", "MyStructureExtended"]
+
+
+@pytest.mark.sphinx(
+    "dummy",
+    testroot="plc-project",
+    confoverrides={
+        "plc_symbol_store": "_build/plc_symbols.sqlite",
+        "plc_cache_dir": "_build/.plc_cache",
+    },
+)
+def test_store_extension(app, status, warning):
+    app.build()
+
+    interpreter = app._interpreter
+    assert interpreter._store is not None
+    assert os.path.isfile(os.path.join(app.confdir, "_build", "plc_symbols.sqlite"))
+    assert interpreter.get_object("FB_MyBlock")
+    assert interpreter._cache is None  # Replaced by the store
+    assert not os.path.exists(os.path.join(app.confdir, "_build", ".plc_cache"))
+    assert "Parse cache" not in status.getvalue()
+    assert "WARNING" not in warning.getvalue()